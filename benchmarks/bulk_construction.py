@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Construction time of the MakerStopLossOrders for the columns of the recovery targets: one create_from_start_amount
+call per target vs one create_from_start_amounts call for all targets, with and without the markets index.
+
+Run: python3 benchmarks/bulk_construction.py [number of orders] [number of runs]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tkgpro import MakerStopLossOrder
+from tkgpro.threshold_order import MarketIndex
+
+TARGETS = (("ETH/BTC", "ETH", 1, "BTC", 0.0829236),
+           ("ETH/BTC", "BTC", 0.1, "ETH", 1.2),
+           ("BTC/USDT", "BTC", 0.3, "USDT", 2000),
+           ("BTC/USDT", "USDT", 1000, "BTC", 0.15))
+
+PARAMETERS = dict(maker_price_threshold=-0.003, maker_order_max_updates=60, taker_price_threshold=-0.02,
+                  threshold_check_after_updates=6)
+
+
+def columns(orders_count: int):
+    rows = [TARGETS[i % len(TARGETS)] for i in range(orders_count)]
+    return [list(column) for column in zip(*rows)]
+
+
+def create_single(targets, markets):
+    return [MakerStopLossOrder.create_from_start_amount(*target, markets=markets, **PARAMETERS)
+            for target in zip(*targets)]
+
+
+def create_bulk(targets, markets):
+    return MakerStopLossOrder.create_from_start_amounts(*targets, markets=markets, **PARAMETERS)
+
+
+def measure(create, targets, markets, runs: int):
+    best = None
+    for i in range(runs):
+        start = time.perf_counter()
+        create(targets, markets)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return best
+
+
+if __name__ == "__main__":
+    orders_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    targets = columns(orders_count)
+    markets = MarketIndex.load("test_data/markets.json")
+
+    print("Orders: {}, runs: {}".format(orders_count, runs))
+    print("{:<20} {:>14} {:>14} {:>9}".format("markets", "single, us", "bulk, us", "speedup"))
+
+    for name, index in (("-", None), ("MarketIndex", markets)):
+        single = measure(create_single, targets, index, runs)
+        bulk = measure(create_bulk, targets, index, runs)
+        print("{:<20} {:>14.2f} {:>14.2f} {:>8.2f}x".format(name, single / orders_count * 1e6,
+                                                            bulk / orders_count * 1e6, single / bulk))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Import time of the tkgpro package and its public classes in the fresh interpreter, as in the spawned sweep/replay
+workers and one-shot scripts. For every import statement reports the best time of the runs, number of the imported
+modules and which of the heavy dependencies (ztom, ccxt, numpy, asyncio) were imported.
+
+Run: python3 benchmarks/import_time.py [number of runs]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+HEAVY_MODULES = ("ztom", "ccxt", "numpy", "asyncio")
+
+STATEMENTS = (
+    "import tkgpro",
+    "import tkgpro.threshold_order",
+    "from tkgpro.threshold_order import OrderCommands",
+    "from tkgpro.threshold_order import MarketIndex",
+    "from tkgpro.execution import CheckScheduler",
+    "from tkgpro import MakerStopLossOrder",
+    "from tkgpro import ThresholdRecoveryOrder",
+    "from tkgpro.threshold_order import MakerStopLossBatch",
+    "from tkgpro.backtest import Replay",
+    "from tkgpro.execution import AsyncOrderDriver",
+)
+
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+modules = set(sys.modules)
+start = time.perf_counter()
+{statement}
+duration = time.perf_counter() - start
+print(json.dumps({{"time": duration,
+                  "modules": len(set(sys.modules) - modules),
+                  "heavy": [m for m in {heavy!r} if m in sys.modules and m not in modules]}}))
+"""
+
+
+def measure(statement: str, runs: int):
+    code = CHILD.format(root=ROOT, statement=statement, heavy=HEAVY_MODULES)
+
+    best = None
+    for i in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", code])
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        if best is None or result["time"] < best["time"]:
+            best = result
+
+    return best
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("Runs: {}".format(runs))
+    print("{:<55} {:>10} {:>8}  {}".format("statement", "time, ms", "modules", "heavy dependencies"))
+
+    for statement in STATEMENTS:
+        result = measure(statement, runs)
+        print("{:<55} {:>10.2f} {:>8}  {}".format(statement, result["time"] * 1000, result["modules"],
+                                                   ", ".join(result["heavy"]) or "-"))
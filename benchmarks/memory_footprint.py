@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Per-order memory footprint of the threshold orders in the default and compact representation.
+
+Every order goes through several trade orders (cancelled by the max updates limit) and gets tags, so the history
+and tags are populated the same way as during the recovery.
+
+Run: python3 benchmarks/memory_footprint.py [number of orders]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tkgpro import ThresholdRecoveryOrder, MakerStopLossOrder
+from tkgpro.threshold_order.compact import compact_order
+
+TRADE_ORDERS = 5
+
+
+def create_threshold_recovery_order():
+    return ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, max_best_amount_order_updates=1)
+
+
+def create_maker_stop_loss_order():
+    return MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                       maker_order_max_updates=1, taker_order_max_updates=1)
+
+
+def run_order(order):
+    ticker = [{"ask": 2, "bid": 1}]
+    for i in range(TRADE_ORDERS):
+        order.update_from_exchange({"status": "open", "filled": 0.01}, ticker)
+        order.update_from_exchange({"status": "canceled", "filled": 0.01}, ticker)
+        order.tags.append("#benchmark")
+
+
+def footprint(create_order, orders_count, compact):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    orders = list()
+    for i in range(orders_count):
+        order = create_order()
+        if compact:
+            compact_order(order, history_size=2)
+        run_order(order)
+        orders.append(order)
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (current - start) / orders_count
+
+
+if __name__ == "__main__":
+    orders_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print("Orders: {}, trade orders per order: {}".format(orders_count, TRADE_ORDERS))
+    print("{:<25} {:>15} {:>15}".format("order", "default, B", "compact, B"))
+
+    for name, create in (("ThresholdRecoveryOrder", create_threshold_recovery_order),
+                         ("MakerStopLossOrder", create_maker_stop_loss_order)):
+        default = footprint(create, orders_count, False)
+        compact = footprint(create, orders_count, True)
+        print("{:<25} {:>15.0f} {:>15.0f}".format(name, default, compact))
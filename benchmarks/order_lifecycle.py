@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of the threshold orders' logic on the typical lifecycles: maker fill, threshold breach, forced taker and
+repeated reprices of MakerStopLossOrder, best amount fill and threshold breach of ThresholdRecoveryOrder.
+
+The lifecycles are replayed offline on the tkgpro.backtest fill model from the price paths started at the
+test_data tickers. For every scenario the benchmark reports:
+- callbacks/s: update_from_exchange calls per second on the recorded exchange responses and market data (order logic
+only, without the fill model)
+- bytes/update: peak traced memory per update and blocks/update: allocated memory blocks kept per update
+- lifecycle, ms: end to end time of the replay till the order is closed
+
+Run: python3 benchmarks/order_lifecycle.py [--repeat N] [--save baseline.json] [--compare baseline.json]
+[--tolerance 0.1]
+
+With --compare the results are compared against the saved baseline and the exit code is 1 if any scenario regressed
+by more than the tolerance (slower callbacks or lifecycle, more memory per update).
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tkgpro import ThresholdRecoveryOrder, MakerStopLossOrder
+from tkgpro.backtest import Replay, SimpleFillModel, read_tickers_csv
+
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_data'))
+
+SNAPSHOTS = 1000  # max snapshots of the lifecycle
+SPREAD = 0.001  # relative bid/ask spread of the price paths
+
+METRICS = (
+    # metric, format, True if the higher value is better
+    ("callbacks_per_second", "{:>12.0f}", True),
+    ("bytes_per_update", "{:>12.1f}", False),
+    ("blocks_per_update", "{:>12.2f}", False),
+    ("lifecycle_ms", "{:>12.3f}", False),
+)
+
+
+def first_ticker(file_name: str, symbol: str):
+    for timestamp, tickers in read_tickers_csv(os.path.join(TEST_DATA, file_name)):
+        if symbol in tickers:
+            return tickers[symbol]
+
+    raise ValueError("No {} ticker in {}".format(symbol, file_name))
+
+
+def price_path(symbol: str, ticker: dict, moves):
+    """
+    :param ticker: ticker to start from, the path's bid is SPREAD below the ask
+    :param moves: list of (number of snapshots, relative change of bid, relative change of ask) from the ticker's prices
+    :return: list of (timestamp, tickers) snapshots
+    """
+    snapshots = list()
+    timestamp = ticker["timestamp"]
+
+    for count, bid_change, ask_change in moves:
+        for i in range(count):
+            timestamp += 1000
+            snapshots.append((timestamp, {symbol: {"bid": ticker["ask"] * (1 - SPREAD) * (1 + bid_change),
+                                                   "ask": ticker["ask"] * (1 + ask_change),
+                                                   "timestamp": timestamp}}))
+
+    return snapshots
+
+
+def oscillating_path(symbol: str, ticker: dict, count: int, step: float):
+    return price_path(symbol, ticker, [(1, 0.0, step * (i % 3)) for i in range(count)])
+
+
+class Scenario(object):
+
+    def __init__(self, name: str, create_order, snapshots: list, maker_fill_ratio: float = 0.0):
+        self.name = name
+        self.create_order = create_order
+        self.snapshots = snapshots[:SNAPSHOTS]
+        self.maker_fill_ratio = maker_fill_ratio
+
+    def replay(self, order=None):
+        order = order if order is not None else self.create_order()
+        replay = Replay(SimpleFillModel(maker_fill_ratio=self.maker_fill_ratio, use_volume=False))
+        replay.add_order(order)
+        report = replay.run(self.snapshots)
+        return order, report[0]
+
+    def record(self):
+        """
+        :return: list of (exchange response, market data) of the order's updates during the lifecycle
+        """
+        order = self.create_order()
+        updates = list()
+        update_from_exchange = order.update_from_exchange
+
+        def recording_update(resp, market_data=None):
+            updates.append((dict(resp), market_data))
+            return update_from_exchange(resp, market_data)
+
+        order.update_from_exchange = recording_update
+        order, report = self.replay(order)
+
+        if report["status"] != "closed":
+            raise RuntimeError("Scenario {} is not closed: {}".format(self.name, report))
+
+        return updates
+
+    def run_callbacks(self, updates: list):
+        order = self.create_order()
+        for resp, market_data in updates:
+            order.update_from_exchange(resp, market_data)
+        return order
+
+
+def sell_ticker():
+    return first_ticker("tickers_maker.csv", "BTC/USDT")
+
+
+def buy_ticker():
+    return first_ticker("tickers.csv", "ETH/BTC")
+
+
+def maker_stop_loss(**kwargs):
+    ticker = sell_ticker()
+    parameters = dict(taker_price_threshold=-0.02, threshold_check_after_updates=0)
+    parameters.update(kwargs)
+    return lambda: MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", ticker["ask"],
+                                                               **parameters)
+
+
+def threshold_recovery(**kwargs):
+    ticker = buy_ticker()
+    return lambda: ThresholdRecoveryOrder("ETH/BTC", "BTC", 1, "ETH", 1 / (ticker["ask"] * (1 - SPREAD)), **kwargs)
+
+
+def get_scenarios():
+    sell, buy = sell_ticker(), buy_ticker()
+
+    return [
+        Scenario("maker_fill", maker_stop_loss(),
+                 price_path("BTC/USDT", sell, [(SNAPSHOTS, 0.0, 0.0)]), maker_fill_ratio=0.02),
+        Scenario("threshold_breach", maker_stop_loss(),
+                 price_path("BTC/USDT", sell, [(20, 0.0, 0.0), (SNAPSHOTS, -0.03, -0.03)]), maker_fill_ratio=0.01),
+        Scenario("forced_taker", maker_stop_loss(force_taker_updates=50),
+                 price_path("BTC/USDT", sell, [(SNAPSHOTS, 0.0, 0.0)])),
+        Scenario("reprices", maker_stop_loss(maker_order_max_updates=3, maker_price_threshold=-0.5),
+                 oscillating_path("BTC/USDT", sell, SNAPSHOTS, 0.001), maker_fill_ratio=0.002),
+        Scenario("recovery_best_amount", threshold_recovery(),
+                 price_path("ETH/BTC", buy, [(SNAPSHOTS, 0.0, 0.0)]), maker_fill_ratio=0.02),
+        Scenario("recovery_threshold", threshold_recovery(taker_price_threshold=-0.01),
+                 price_path("ETH/BTC", buy, [(20, 0.0, 0.0), (SNAPSHOTS, 0.02, 0.02)]), maker_fill_ratio=0.01),
+    ]
+
+
+def measure(scenario: Scenario, repeat: int):
+    updates = scenario.record()
+
+    callbacks_time = float("inf")
+    lifecycle_time = float("inf")
+
+    gc.disable()
+    try:
+        for i in range(repeat):
+            start = time.perf_counter()
+            scenario.run_callbacks(updates)
+            callbacks_time = min(callbacks_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scenario.replay()
+            lifecycle_time = min(lifecycle_time, time.perf_counter() - start)
+
+        tracemalloc.start()
+        blocks = sys.getallocatedblocks()
+        start, _ = tracemalloc.get_traced_memory()
+        order = scenario.run_callbacks(updates)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - blocks
+        tracemalloc.stop()
+    finally:
+        gc.enable()
+
+    if order.status != "closed":
+        raise RuntimeError("Scenario {} is not closed on the recorded updates".format(scenario.name))
+
+    return {"updates": len(updates),
+            "callbacks_per_second": len(updates) / callbacks_time,
+            "bytes_per_update": (peak - start) / len(updates),
+            "blocks_per_update": blocks / len(updates),
+            "lifecycle_ms": lifecycle_time * 1000}
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """
+    :return: list of (scenario, metric, baseline value, value, relative change) of the regressed metrics
+    """
+    regressions = list()
+
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        for metric, _, higher_is_better in METRICS:
+            value, base_value = result[metric], base.get(metric)
+            if not base_value:
+                continue
+
+            change = (value - base_value) / abs(base_value)
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append((name, metric, base_value, value, change))
+
+    return regressions
+
+
+def print_results(results: dict, baseline: dict = None):
+    print("{:<22} {:>8}".format("scenario", "updates") + "".join(" {:>12}".format(m[:12]) for m, _, _ in METRICS))
+
+    for name, result in results.items():
+        line = "{:<22} {:>8}".format(name, result["updates"])
+        line += "".join(" " + fmt.format(result[metric]) for metric, fmt, _ in METRICS)
+        print(line)
+
+        base = baseline.get(name) if baseline is not None else None
+        if base is not None:
+            changes = list()
+            for metric, _, _ in METRICS:
+                changes.append(" {:>+11.1f}%".format((result[metric] - base[metric]) / abs(base[metric]) * 100)
+                               if base.get(metric) else " {:>12}".format("-"))
+            print("{:<22} {:>8}".format("  vs baseline", "") + "".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threshold orders lifecycle benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="number of runs, the best time is taken")
+    parser.add_argument("--save", help="save the results as the baseline json file")
+    parser.add_argument("--compare", help="compare the results with the baseline json file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change treated as the regression")
+    parser.add_argument("--scenario", action="append", help="run only the scenario (could be repeated)")
+    args = parser.parse_args(argv)
+
+    results = dict()
+    for scenario in get_scenarios():
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        results[scenario.name] = measure(scenario, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline saved to {}".format(args.save))
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, base_value, value, change in regressions:
+            print("REGRESSION {} {}: {:.4g} -> {:.4g} ({:+.1f}%)".format(name, metric, base_value, value,
+                                                                         change * 100))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.backtest import SimpleFillModel
+from tkgpro.execution import AsyncOrderDriver, FakeAsyncExchange
+
+import unittest
+import asyncio
+
+
+class AsyncOrderDriverTestSuite(unittest.TestCase):
+
+    def _maker_order(self, symbol="BTC/USDT"):
+        return MakerStopLossOrder.create_from_start_amount(symbol, "BTC", 1, symbol.split("/")[1], 1,
+                                                           maker_order_max_updates=50, taker_order_max_updates=5,
+                                                           threshold_check_after_updates=0)
+
+    def test_run_orders(self):
+        exchange = FakeAsyncExchange({"BTC/USDT": {"ask": 1, "bid": 0.995}, "BTC/EUR": {"ask": 1, "bid": 0.995},
+                                      "ADA/ETH": {"ask": 0.00032485, "bid": 0.00032484}},
+                                     SimpleFillModel(maker_fill_ratio=0.1))
+
+        orders = [self._maker_order() for i in range(10)] + [self._maker_order("BTC/EUR") for i in range(10)]
+        orders.append(ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485))
+
+        driver = AsyncOrderDriver(exchange, batch_window=0.001)
+        for o in orders:
+            driver.add_order(o)
+
+        asyncio.run(driver.run())
+
+        self.assertEqual(21, len(driver.closed_orders))
+        for o in orders:
+            self.assertEqual("closed", o.status)
+            self.assertAlmostEqual(o.start_amount, o.filled_start_amount, 6)
+
+        # tickers of all orders are fetched by one call per batch window
+        stats = driver.get_stats()
+        self.assertEqual(exchange.calls["fetch_tickers"], stats["tickers_fetches"])
+        self.assertLess(stats["tickers_fetches"] * 10, stats["tickers_requests"])
+
+        # status requests are batched
+        self.assertNotIn("fetch_order", exchange.calls)
+        self.assertEqual(exchange.calls["fetch_orders"], stats["status_fetches"])
+        self.assertLess(stats["status_fetches"] * 10, stats["status_requests"])
+
+    def test_slow_symbol_does_not_block(self):
+        exchange = FakeAsyncExchange({"BTC/USDT": {"ask": 1, "bid": 0.99}, "BTC/EUR": {"ask": 1, "bid": 0.99}},
+                                     SimpleFillModel(maker_fill_ratio=1),
+                                     latency=lambda method, symbol: 10 if symbol == "BTC/EUR" else 0.001)
+        exchange.fetch_orders = None  # exchange without batch status requests
+
+        fast, slow = self._maker_order(), self._maker_order("BTC/EUR")
+        driver = AsyncOrderDriver(exchange)
+        driver.add_order(fast)
+        driver.add_order(slow)
+
+        async def run():
+            task = asyncio.create_task(driver.run())
+            await asyncio.sleep(0.1)
+
+            self.assertEqual("closed", fast.status)
+            self.assertEqual("open", slow.status)
+            self.assertEqual([fast], driver.closed_orders)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            # orders' tasks are cancelled with the run
+            self.assertEqual(1, len(asyncio.all_tasks()))
+
+        asyncio.run(run())
+
+    def test_threshold(self):
+        exchange = FakeAsyncExchange({"BTC/USDT": {"ask": 1, "bid": 0.97, "bidVolume": 0.5}},
+                                     SimpleFillModel(maker_fill_ratio=0))
+
+        order = self._maker_order()
+        driver = AsyncOrderDriver(exchange)
+        driver.add_order(order)
+
+        asyncio.run(driver.run())
+
+        self.assertEqual("closed", order.status)
+        self.assertEqual("taker", order.state)
+        self.assertIn("#below_threshold_taker_price", order.tags)
+        self.assertAlmostEqual(0.97, order.filled_dest_amount, 8)
+
+    def test_proceed_order_without_run(self):
+        exchange = FakeAsyncExchange({"BTC/USDT": {"ask": 1, "bid": 0.99}}, SimpleFillModel(maker_fill_ratio=0.5))
+        exchange.fetch_orders = None
+
+        order = self._maker_order()
+        driver = AsyncOrderDriver(exchange)
+
+        async def proceed():
+            await driver.proceed_order(order)  # creation
+            await driver.proceed_order(order)
+
+        asyncio.run(proceed())
+
+        self.assertEqual(1, exchange.calls["create_order"])
+        self.assertEqual(1, exchange.calls["fetch_order"])
+        self.assertAlmostEqual(1, order.filled, 8)  # filled on the creation and the status request
+
+    def test_errors(self):
+        failures = [ConnectionError("timeout")]
+
+        class Exchange(FakeAsyncExchange):
+
+            async def create_order(self, trade_order):
+                if trade_order.symbol == "BTC/EUR":
+                    raise ConnectionError("timeout")
+                if failures:
+                    raise failures.pop()
+                return await super().create_order(trade_order)
+
+        exchange = Exchange({"BTC/USDT": {"ask": 1, "bid": 0.99}, "BTC/EUR": {"ask": 1, "bid": 0.99}},
+                            SimpleFillModel(maker_fill_ratio=1))
+
+        order, failing = self._maker_order(), self._maker_order("BTC/EUR")
+        removed = list()
+        driver = AsyncOrderDriver(exchange, max_retries=2, max_errors=2, on_order_removed=removed.append)
+        driver.add_order(order)
+        driver.add_order(failing)
+
+        asyncio.run(driver.run())
+
+        # failed request is repeated, permanently failing order does not stop the other orders
+        self.assertEqual("closed", order.status)
+        self.assertEqual([order], driver.closed_orders)
+        self.assertEqual([failing], driver.failed_orders)
+        self.assertEqual([failing], removed)
+        self.assertEqual(2, len(driver.errors))
+        self.assertEqual(failing.id, driver.errors[-1][0])
+        self.assertIsInstance(driver.errors[-1][1], ConnectionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import CheckCadence
+from tkgpro.threshold_order import price_levels
+
+import unittest
+
+
+class CheckCadenceTestSuite(unittest.TestCase):
+
+    def test_headroom(self):
+        self.assertAlmostEqual(0.01, price_levels.trigger_headroom("sell", 0.99, 0.9999), 8)
+        self.assertAlmostEqual(-0.01, price_levels.trigger_headroom("sell", 1, 0.99), 8)
+        self.assertAlmostEqual(0.01, price_levels.trigger_headroom("buy", 1, 0.99), 8)
+        self.assertIsNone(price_levels.trigger_headroom("buy", None, 0.99))
+        self.assertIsNone(price_levels.trigger_headroom("buy", 1, 0))
+
+    def test_delay(self):
+        cadence = CheckCadence(min_delay=1, max_delay=60, safety_factor=4, smoothing=0.5)
+
+        # volatility is not known
+        self.assertEqual(1, cadence.update(1, 0.05, 100))
+
+        # 0.1% change in 1 second
+        cadence.update(1.001, 0.05, 101)
+        self.assertAlmostEqual(0.001, cadence.volatility, 8)
+        self.assertEqual(60, cadence.delay)  # (0.05 / 0.001) ** 2 / 4 seconds to the trigger
+
+        self.assertAlmostEqual(6.25, cadence.suggest_delay(0.005), 6)
+        self.assertEqual(1, cadence.suggest_delay(0.001))
+        self.assertEqual(1, cadence.suggest_delay(-0.01))  # triggered
+
+        # volatility is smoothed
+        cadence.update(1.001 * 1.003, 0.005, 102)
+        self.assertAlmostEqual(0.002, cadence.volatility, 8)
+
+        # same timestamp does not change the volatility
+        cadence.update(2, 0.005, 102)
+        self.assertAlmostEqual(0.002, cadence.volatility, 8)
+
+    def test_orders_next_check_delay(self):
+        o = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                        maker_price_threshold=-0.01,
+                                                        taker_price_threshold=-0.05,
+                                                        threshold_check_after_updates=0)
+        o.cadence = CheckCadence(min_delay=1, max_delay=600)
+
+        o.update_from_exchange({"status": "open", "filled": 0})
+        o.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 1.1, "bid": 1, "timestamp": 1000}])
+        o.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 1.1, "bid": 1.001, "timestamp": 2000}])
+
+        # taker price is closer to its trigger (1.001 vs 0.95) than the maker price (1.1 vs 0.99)
+        self.assertAlmostEqual(1.001 / 0.95 - 1, o.cadence.headroom, 8)
+        self.assertEqual(o.cadence.delay, o.next_check_delay)
+        self.assertLess(1, o.next_check_delay)
+
+        o.state = "taker"
+        self.assertEqual(1, o.next_check_delay)
+
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485)
+        ro.cadence = CheckCadence(min_delay=1, max_delay=600)
+        ro.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 0.00033, "bid": 0.00032485,
+                                                                  "timestamp": 1000}])
+        ro.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 0.00033, "bid": 0.000325,
+                                                                  "timestamp": 2000}])
+        self.assertAlmostEqual(0.000325 / ro.taker_trigger_price - 1, ro.cadence.headroom, 8)
+        self.assertLess(1, ro.next_check_delay)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder
+from tkgpro.execution import CheckScheduler
+
+import unittest
+
+
+class CheckSchedulerTestSuite(unittest.TestCase):
+
+    def _order(self, delay=None):
+        order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+        if delay is not None:
+            order.cadence.delay = delay
+        return order
+
+    def test_schedule(self):
+        scheduler = CheckScheduler(default_delay=5)
+
+        near, far, default = self._order(1), self._order(30), self._order()
+        del default.cadence  # order without suggested delay
+
+        scheduler.schedule(far, now=0)
+        scheduler.schedule(near, now=0)
+        scheduler.schedule(default, now=0)
+
+        self.assertEqual(3, len(scheduler))
+        self.assertEqual(1, scheduler.next_due_time())
+
+        self.assertEqual([], scheduler.pop_due(0.5))
+        self.assertEqual([near], scheduler.pop_due(1))
+        self.assertNotIn(near, scheduler)
+
+        scheduler.schedule(near, now=1)
+        self.assertEqual([near, default], scheduler.pop_due(10))
+        self.assertEqual(30, scheduler.next_due_time())
+
+    def test_reschedule_and_remove(self):
+        scheduler = CheckScheduler()
+        o1, o2 = self._order(10), self._order(20)
+
+        scheduler.schedule(o1, now=0)
+        scheduler.schedule(o2, now=0)
+
+        # rescheduling replaces the previous due time
+        scheduler.schedule(o2, delay=5, now=0)
+        self.assertEqual(2, len(scheduler))
+        self.assertEqual([o2], scheduler.pop_due(6))
+
+        scheduler.remove(o1)
+        self.assertIsNone(scheduler.next_due_time())
+        self.assertEqual([], scheduler.pop_due(100))
+        self.assertEqual(0, len(scheduler))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import ThresholdRecoveryOrder
+from tkgpro.threshold_order import TagFlags, compact_order
+from tkgpro.threshold_order.compact import TradeOrdersHistory
+
+import unittest
+import copy
+import pickle
+
+
+class TagFlagsTestSuite(unittest.TestCase):
+
+    def test_tags(self):
+        tags = TagFlags()
+        self.assertEqual(0, len(tags))
+        self.assertNotIn("#below_threshold", tags)
+
+        tags.append("#below_threshold")
+        tags.append("#force_taker_max_maker_updates")
+        tags.append("#below_threshold")
+
+        self.assertIn("#below_threshold", tags)
+        self.assertIn("#force_taker_max_maker_updates", tags)
+        self.assertEqual(2, len(tags))
+        self.assertEqual(["#below_threshold", "#force_taker_max_maker_updates"], tags)
+
+        tags.remove("#below_threshold")
+        self.assertNotIn("#below_threshold", tags)
+        with self.assertRaises(ValueError):
+            tags.remove("#below_threshold")
+
+        self.assertEqual(tags, copy.deepcopy(tags))
+        self.assertEqual(TagFlags(["#force_taker_max_maker_updates"]), tags)
+        self.assertEqual(1, len({tags, TagFlags(["#force_taker_max_maker_updates"])}))
+
+
+class CompactOrderTestSuite(unittest.TestCase):
+
+    def test_compact_fill_market_price(self):
+        ro = compact_order(ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, -0.02,
+                                                  max_best_amount_order_updates=1), history_size=2)
+
+        resp = {"status": "open", "filled": 100, "cost": 0.032485131}
+        ro.update_from_exchange(resp, [{"ask": 1, "bid": ro.best_price * (1 - 0.021)}])
+        self.assertEqual("cancel tickers ADA/ETH", ro.order_command)
+        self.assertIn("#below_threshold", ro.tags)
+        self.assertIsInstance(ro.tags, TagFlags)
+
+        ro.update_from_exchange({"status": "canceled", "filled": 100}, [{"ask": 1, "bid": 0.00032483}])
+
+        for i in range(4):
+            ro.update_from_exchange({"status": "open", "filled": 100}, [{"ask": 1, "bid": 0.00032483}])
+            ro.update_from_exchange({"status": "canceled", "filled": 100}, [{"ask": 1, "bid": 0.00032483}])
+
+        # history is bounded but filled amounts of all trade orders are accounted
+        self.assertEqual(2, len(ro.orders_history))
+        self.assertEqual(500, ro.filled)
+        self.assertEqual("market_price", ro.state)
+
+        # supplementary dicts are dropped from the history only
+        self.assertEqual([dict(), dict()], [dict(o.supplementary) for o in ro.orders_history])
+        self.assertIsInstance(ro.active_trade_order.supplementary, dict)
+
+        restored = pickle.loads(pickle.dumps(ro))
+        self.assertIsInstance(restored.orders_history, TradeOrdersHistory)
+        self.assertEqual(2, restored.orders_history.maxlen)
+        self.assertIs(ro.orders_history[0].supplementary, restored.orders_history[0].supplementary)
+        with self.assertRaises(TypeError):
+            restored.orders_history[0].supplementary["parent_action_order"] = dict()
+
+
+if __name__ == '__main__':
+    unittest.main()
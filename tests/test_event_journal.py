@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import EventJournal, EventJournalReader
+from tkgpro.threshold_order.event_journal import TRANSITION, COMMAND, FILL, RECORD
+
+import os
+import tempfile
+import unittest
+
+
+class EventJournalTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "events.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    @staticmethod
+    def run_orders(journal):
+        maker_order = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                                  taker_price_threshold=-0.02,
+                                                                  threshold_check_after_updates=0)
+        recovery_order = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, amount_precision=0)
+
+        journal.update(maker_order)
+        journal.update(recovery_order)
+
+        steps = [({"status": "open", "filled": 0.1}, [{"ask": 1, "bid": 0.99}]),
+                 ({"status": "open", "filled": 0.3}, [{"ask": 1, "bid": 0.97}]),
+                 ({"status": "canceled", "filled": 0.3}, [{"ask": 1, "bid": 0.97}])]
+
+        for resp, market_data in steps:
+            maker_order.update_from_exchange(dict(resp), market_data)
+            journal.update(maker_order)
+
+        recovery_order.update_from_exchange({"status": "closed", "filled": 1000}, [{"ask": 0.00033, "bid": 0.00032}])
+        journal.update(recovery_order)
+
+        return maker_order, recovery_order
+
+    def test_journal_and_read(self):
+        journal = EventJournal(self.path, buffer_records=2)
+        maker_order, recovery_order = self.run_orders(journal)
+        journal.close()
+
+        self.assertEqual(journal.events * RECORD.size, os.path.getsize(self.path))
+        self.assertGreater(journal.batches, 1)
+
+        reader = EventJournalReader(self.path)
+        self.assertEqual(journal.events, len(reader))
+        self.assertEqual(journal.events, sum(reader.counts().values()))
+
+        transitions = [t[1:] for t in reader.transitions(maker_order.id)]
+        self.assertEqual([(maker_order.id, None, "maker"), (maker_order.id, "maker", "taker")], transitions)
+        self.assertEqual("BTC/USDT", reader.symbols[reader.order_code(maker_order.id)])
+
+        commands = [reader.name("command", c) for c in reader.select(COMMAND, maker_order.id)["a"]]
+        self.assertEqual("new", commands[0])
+        self.assertIn("cancel", commands)
+
+        filled = reader.filled()
+        self.assertAlmostEqual(maker_order.filled, filled[maker_order.id], 8)
+        self.assertAlmostEqual(recovery_order.filled, filled[recovery_order.id], 8)
+
+        fills = reader.select(FILL, maker_order.id)
+        self.assertEqual([1.0, 1.0], fills["price"].tolist())
+
+        self.assertEqual(0, len(reader.select(TRANSITION, "unknown")))
+
+    def test_synchronous_and_append(self):
+        journal = EventJournal(self.path, background=False)
+        self.run_orders(journal)
+        journal.flush()
+        events = journal.events
+        self.assertEqual(events * RECORD.size, os.path.getsize(self.path))
+        journal.close()
+
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")  # torn record
+        with open(self.path + ".names", "a") as f:
+            f.write("order\t3\tto")  # torn name
+
+        journal = EventJournal(self.path)
+        maker_order, recovery_order = self.run_orders(journal)
+        journal.close()
+
+        reader = EventJournalReader(self.path)
+        self.assertEqual(2 * events, len(reader))
+        self.assertEqual(4, len(reader.names["order"]))
+        self.assertEqual(["best_amount", "maker", "taker"], sorted(reader.names["state"].values()))
+        self.assertAlmostEqual(maker_order.filled, reader.filled()[maker_order.id], 8)
+
+    def test_writer_error(self):
+        class FailingFile(object):
+
+            def __init__(self):
+                self.closed = False
+
+            def write(self, data):
+                raise OSError("No space left on device")
+
+            def flush(self):
+                pass
+
+            def close(self):
+                self.closed = True
+
+        journal = EventJournal(self.path, buffer_records=2)
+        failing_file = FailingFile()
+        journal._file.close()
+        journal._file = failing_file
+
+        journal.add_event(1, FILL, amount=0.1)
+        with self.assertRaises(OSError):
+            journal.flush()
+
+        # the next hand off of the buffer
+        journal.add_event(1, FILL, amount=0.1)
+        with self.assertRaises(OSError):
+            journal.add_event(1, FILL, amount=0.1)
+
+        with self.assertRaises(OSError):
+            journal.close()
+
+        self.assertIsNone(journal._writer)
+        self.assertTrue(failing_file.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
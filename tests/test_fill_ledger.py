@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import ThresholdRecoveryOrder
+from tkgpro.threshold_order import FillLedger
+
+import unittest
+
+
+class FakeTradeOrder(object):
+
+    def __init__(self, filled=0.0, filled_start_amount=0.0, filled_dest_amount=0.0):
+        self.filled = filled
+        self.filled_start_amount = filled_start_amount
+        self.filled_dest_amount = filled_dest_amount
+
+
+class FillLedgerTestSuite(unittest.TestCase):
+
+    def test_update(self):
+        ledger = FillLedger("sell")
+        t1 = FakeTradeOrder()
+
+        self.assertTrue(ledger.update(t1))
+        self.assertFalse(ledger.update(t1))
+
+        t1.filled, t1.filled_start_amount, t1.filled_dest_amount = 0.5, 0.5, 0.05
+        self.assertTrue(ledger.update(t1))
+        self.assertEqual(0.5, ledger.last_delta)
+        self.assertFalse(ledger.update(t1))
+
+        # next trade order
+        t2 = FakeTradeOrder(0.2, 0.2, 0.03)
+        self.assertTrue(ledger.update(t2))
+        self.assertAlmostEqual(0.7, ledger.filled, 10)
+        self.assertAlmostEqual(0.08, ledger.filled_dest_amount, 10)
+        self.assertAlmostEqual(0.08 / 0.7, ledger.filled_price, 10)
+
+        self.assertEqual(5, ledger.updates)
+        self.assertEqual(3, ledger.changes)
+
+        self.assertFalse(ledger.is_start_amount_filled(1))
+        self.assertTrue(ledger.is_start_amount_filled(0.700001))
+
+    def test_lots(self):
+        ledger = FillLedger("sell", amount_precision=3)
+        trade_orders = [FakeTradeOrder(0.1, 0.1, 0.01) for i in range(3)]
+
+        for t in trade_orders:
+            ledger.update(t)
+
+        self.assertEqual(0.3, ledger.filled)  # 0.1 + 0.1 + 0.1 != 0.3 for floats
+        self.assertTrue(ledger.is_start_amount_filled(0.3))
+        self.assertFalse(ledger.is_start_amount_filled(0.301))
+
+        buy_ledger = FillLedger("buy", amount_precision=3)
+        buy_ledger.update(FakeTradeOrder(10, 0.1, 10))
+        self.assertEqual(0.01, buy_ledger.filled_price)
+        self.assertTrue(buy_ledger.is_start_amount_filled(0.1))
+        self.assertTrue(buy_ledger.is_start_amount_filled(0.100004))  # the rest is 0.0004 of base currency
+        self.assertFalse(buy_ledger.is_start_amount_filled(0.1001))
+
+        # the rest of the start amount is 500 lots: filled within the float tolerance, not filled in lots
+        buy_ledger = FillLedger("buy", amount_precision=3)
+        buy_ledger.update(FakeTradeOrder(99999.5, 999995, 99999.5))
+        self.assertFalse(buy_ledger.is_start_amount_filled(1000000))
+
+        float_ledger = FillLedger("buy")
+        float_ledger.update(FakeTradeOrder(99999.5, 999995, 99999.5))
+        self.assertTrue(float_ledger.is_start_amount_filled(1000000))
+
+    def test_previous_totals(self):
+        ledger = FillLedger("sell", amount_precision=3)
+        t1, t2 = FakeTradeOrder(0.1, 0.1, 0.01), FakeTradeOrder(0.2, 0.2, 0.02)
+
+        ledger.update(t1)
+        self.assertEqual((0, 0.0, 0.0), ledger.previous_totals(t1))
+        self.assertEqual((0.1, 0.1, 0.01), ledger.previous_totals(None))  # t1 is closed, next is not created yet
+
+        ledger.update(t2)
+        self.assertEqual((0.1, 0.1, 0.01), ledger.previous_totals(t2))
+
+    def test_threshold_recovery_order(self):
+        order = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485, amount_precision=0)
+
+        # the ledger is the only fill state of the order
+        self.assertEqual(0, order._fills.updates)
+        self.assertNotIn("_prev_filled", order.__dict__)
+
+        order.update_from_exchange({"status": "open", "filled": 400})
+        order.update_from_exchange({"status": "open", "filled": 400})
+        self.assertEqual(1, order._fills.changes)
+        self.assertEqual(400, order.filled)
+        self.assertEqual(0, order._prev_filled)
+
+        order.update_from_exchange({"status": "canceled", "filled": 400}, [{"ask": 0.00033, "bid": 0.00032}])
+        self.assertEqual("market_price", order.state)
+        self.assertEqual(400, order._prev_filled)
+        self.assertAlmostEqual(400 * 0.00032485, order._prev_filled_dest_amount, 10)
+
+        order.update_from_exchange({"status": "closed", "filled": 600})
+        self.assertEqual(1000, order.filled)
+        self.assertEqual(1000, order.filled_start_amount)
+        self.assertEqual("closed", order.status)
+        self.assertEqual(1000, order._prev_filled)  # the last trade order is moved to the history
+
+    def test_buy_threshold_recovery_order(self):
+        order = ThresholdRecoveryOrder("ADA/ETH", "ETH", 0.32485, "ADA", 1000, amount_precision=0)
+        self.assertEqual("buy", order._fills.side)
+
+        order.update_from_exchange({"status": "canceled", "filled": 999}, [{"ask": 0.00032485, "bid": 0.00032}])
+        self.assertEqual("market_price", order.state)  # the rest of the start amount is 1 lot
+
+        order.update_from_exchange({"status": "closed", "filled": order.active_trade_order.amount})
+        self.assertEqual("closed", order.status)
+
+
+if __name__ == '__main__':
+    unittest.main()
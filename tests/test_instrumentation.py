@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import Instrumentation
+
+import unittest
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 0.5
+        return self.time
+
+
+class InstrumentationTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation(clock=FakeClock())
+
+    def tearDown(self):
+        self.instrumentation.disable()
+
+    def test_enable_disable(self):
+        original = MakerStopLossOrder.__dict__["update_from_exchange"]
+
+        self.instrumentation.enable()
+        self.assertIsNot(original, MakerStopLossOrder.__dict__["update_from_exchange"])
+        self.assertTrue(self.instrumentation.snapshot()["enabled"])
+
+        self.instrumentation.disable()
+        self.assertIs(original, MakerStopLossOrder.__dict__["update_from_exchange"])
+        self.assertNotIn("_on_open_order", ThresholdRecoveryOrder.__dict__)
+        self.assertNotIn("close_order", MakerStopLossOrder.__dict__)  # inherited method is restored
+
+        # disabled instrumentation does not collect anything
+        order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+        order.update_from_exchange({"status": "open", "filled": 0})
+        self.assertEqual({}, self.instrumentation.snapshot()["timings"])
+
+    def test_snapshot(self):
+        self.instrumentation.enable()
+
+        order = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                            taker_price_threshold=-0.02,
+                                                            threshold_check_after_updates=0)
+        order.update_from_exchange({"status": "open", "filled": 0})
+        order.update_from_exchange({"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.99}])
+        order.update_from_exchange({"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.97}])
+        order.update_from_exchange({"status": "canceled", "filled": 0.5}, [{"ask": 1, "bid": 0.97}])
+        order.update_from_exchange({"status": "closed", "filled": 0.5})
+
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485)
+        ro.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 0.00033, "bid": 0.00032485}])
+
+        snapshot = self.instrumentation.snapshot()
+
+        self.assertEqual(5, snapshot["timings"]["MakerStopLossOrder.update_from_exchange"]["count"])
+        self.assertEqual(3, snapshot["timings"]["MakerStopLossOrder._on_open_order"]["count"])
+        self.assertEqual(2, snapshot["timings"]["MakerStopLossOrder._on_closed_order"]["count"])
+        self.assertEqual(1, snapshot["timings"]["ThresholdRecoveryOrder.update_from_exchange"]["count"])
+        self.assertEqual(0.5, snapshot["timings"]["MakerStopLossOrder._on_open_order"]["mean"])
+
+        self.assertEqual({"hold tickers": 3, "cancel tickers": 1, "new tickers": 1, "": 1}, snapshot["commands"])
+        self.assertEqual({"#below_threshold_taker_price": 1}, snapshot["tags"])
+
+        self.assertEqual(1, snapshot["dwell"]["maker"]["count"])
+        self.assertEqual(1, snapshot["dwell"]["taker"]["count"])
+        self.assertEqual(1, snapshot["dwell"]["maker"]["histogram"]["<=10.0"])
+        self.assertEqual(1, snapshot["tracked_orders"])  # ThresholdRecoveryOrder is still open
+
+        self.instrumentation.reset()
+        self.assertEqual({}, self.instrumentation.snapshot()["commands"])
+
+    def test_dwell_from_creation(self):
+        clock = FakeClock()
+        instrumentation = Instrumentation(clock=clock)
+        instrumentation.enable()
+        try:
+            order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")  # maker state is entered on creation
+            clock.time += 100
+            order.update_from_exchange({"status": "closed", "filled": 1})
+
+            dwell = instrumentation.snapshot()["dwell"]["maker"]
+            self.assertEqual(1, dwell["count"])
+            self.assertGreaterEqual(dwell["total"], 100)  # includes the time before the first update
+
+            # order removed from the manager without closing is not tracked anymore
+            order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+            order.update_from_exchange({"status": "open", "filled": 0})
+            self.assertEqual(1, instrumentation.snapshot()["tracked_orders"])
+
+            Instrumentation.order_removed(order)
+            self.assertEqual(0, instrumentation.snapshot()["tracked_orders"])
+            self.assertEqual(2, instrumentation.snapshot()["dwell"]["maker"]["count"])
+        finally:
+            instrumentation.disable()
+
+    def test_closed_without_update(self):
+        self.instrumentation.enable()
+
+        order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+        old_order = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+        self.assertEqual(2, self.instrumentation.snapshot()["tracked_orders"])
+
+        # order closed by other paths than the update (replay, drivers) is not tracked anymore
+        order.close_order()
+        order.close_order()
+        snapshot = self.instrumentation.snapshot()
+        self.assertEqual(1, snapshot["tracked_orders"])
+        self.assertEqual(1, snapshot["dwell"]["maker"]["count"])
+
+        # updates of the closed order do not add the dwell
+        order.update_from_exchange({"status": "closed", "filled": 1})
+        self.assertEqual(1, self.instrumentation.snapshot()["dwell"]["maker"]["count"])
+
+        # order created before the instrumentation was enabled is tracked from the first update
+        self.instrumentation.reset()
+        old_order.update_from_exchange({"status": "open", "filled": 0})
+        self.assertEqual(1, self.instrumentation.snapshot()["tracked_orders"])
+        old_order.update_from_exchange({"status": "closed", "filled": 1})
+        snapshot = self.instrumentation.snapshot()
+        self.assertEqual(0, snapshot["tracked_orders"])
+        self.assertEqual(1, snapshot["dwell"]["maker"]["count"])
+
+    def test_single_enabled_instrumentation(self):
+        original = MakerStopLossOrder.__dict__["update_from_exchange"]
+        other = Instrumentation()
+
+        self.instrumentation.enable()
+        with self.assertRaises(RuntimeError):
+            other.enable()
+
+        other.disable()  # not enabled, does not restore anything
+        self.assertIsNot(original, MakerStopLossOrder.__dict__["update_from_exchange"])
+
+        self.instrumentation.disable()
+        self.assertIs(original, MakerStopLossOrder.__dict__["update_from_exchange"])
+
+        other.enable()
+        other.disable()
+        self.assertIs(original, MakerStopLossOrder.__dict__["update_from_exchange"])
+
+
+if __name__ == '__main__':
+    unittest.main()
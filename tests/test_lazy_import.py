@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro.lazy_import import lazy_import, LazyModule
+
+import os
+import subprocess
+import sys
+import types
+import unittest
+
+
+class LazyImportTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.module = types.ModuleType("lazy_import_test_module")
+        sys.modules[self.module.__name__] = self.module
+
+    def tearDown(self):
+        del sys.modules[self.module.__name__]
+
+    def test_lazy_attributes(self):
+        lazy_import(self.module.__name__, {"tkgpro.threshold_order.order_command": ["OrderCommand",
+                                                                                    "parse_order_command"]})
+
+        self.assertIsInstance(self.module, LazyModule)
+        self.assertEqual(["OrderCommand", "parse_order_command"], self.module.__all__)
+        self.assertIn("OrderCommand", dir(self.module))
+        self.assertNotIn("OrderCommand", self.module.__dict__)
+
+        from tkgpro.threshold_order.order_command import OrderCommand
+        self.assertIs(OrderCommand, self.module.OrderCommand)
+        self.assertIs(OrderCommand, self.module.__dict__["OrderCommand"])
+
+        with self.assertRaises(AttributeError):
+            self.module.OrderCommands
+
+        from tkgpro.threshold_order import OrderCommands, price_levels  # lazy attribute and submodule of the package
+        self.assertEqual("OrderCommands", OrderCommands.__name__)
+        self.assertTrue(hasattr(price_levels, "trigger_price"))
+
+    def test_package_import_is_lazy(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = "import sys; sys.path.insert(0, {!r}); import tkgpro, tkgpro.threshold_order, tkgpro.execution, " \
+               "tkgpro.backtest; print(sorted(m for m in ('ztom', 'numpy', 'asyncio', " \
+               "'tkgpro.threshold_order.maker_stop_loss') if m in sys.modules))".format(root)
+
+        output = subprocess.check_output([sys.executable, "-c", code]).decode().strip()
+        self.assertEqual("[]", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -77,6 +77,190 @@ class MakerStopLossOrderTestSuite(unittest.TestCase):
 
         self.assertEqual("new", o.order_command)
 
+    def test_create_from_start_amounts(self):
+        targets = [("ETH/BTC", "ETH", 1, "BTC", 0.01),
+                   ("ETH/BTC", "BTC", 0.5, "ETH", 40),
+                   ("BTC/USDT", "BTC", 0.3, "USDT", 2000),
+                   ("ETH/BTC", "ETH", 2, "BTC", 0.03)]
+
+        parameters = dict(cancel_threshold=0.001, maker_price_threshold=-0.003, maker_order_max_updates=60,
+                          force_taker_updates=1000, taker_price_threshold=-0.02, taker_order_max_updates=20,
+                          threshold_check_after_updates=6)
+
+        orders = MakerStopLossOrder.create_from_start_amounts(*zip(*targets), **parameters)
+        self.assertEqual(len(targets), len(orders))
+
+        for order, target in zip(orders, targets):
+            expected = MakerStopLossOrder.create_from_start_amount(*target, **parameters)
+
+            for attribute in ("symbol", "side", "amount", "price", "start_currency", "start_amount",
+                              "dest_currency", "cancel_threshold", "maker_price_threshold", "maker_order_max_updates",
+                              "force_taker_updates", "taker_price_threshold", "taker_order_max_updates",
+                              "threshold_check_after_updates", "maker_trigger_price", "taker_trigger_price", "state",
+                              "status", "order_command"):
+                self.assertEqual(getattr(expected, attribute), getattr(order, attribute), attribute)
+
+            self.assertEqual(expected.active_trade_order.amount, order.active_trade_order.amount)
+            self.assertEqual(expected.active_trade_order.price, order.active_trade_order.price)
+
+        self.assertEqual("buy", orders[1].side)
+        self.assertAlmostEqual(40, orders[1].amount, 8)
+
+        with self.assertRaises(ValueError):
+            MakerStopLossOrder.create_from_start_amounts(["ETH/BTC"], ["ETH"], [1], ["USDT"], [1])
+
+        with self.assertRaises(ValueError):
+            MakerStopLossOrder.create_from_start_amounts(["ETH/BTC"], ["ETH"], [1, 2], ["BTC"], [1])
+
+        for start_amounts, target_amounts in (([1, 0], [1, 1]), ([1, 1], [1, float("nan")]), ([1, -1], [1, 1])):
+            with self.assertRaisesRegex(ValueError, "row 1"):
+                MakerStopLossOrder.create_from_start_amounts(["ETH/BTC"] * 2, ["ETH"] * 2, start_amounts,
+                                                             ["BTC"] * 2, target_amounts)
+
+    def test_trigger_prices(self):
+        o = MakerStopLossOrder.create_from_start_amount(
+            symbol="BTC/USDT",
+            start_currency="BTC",
+            start_amount=1,
+            dest_currency="USDT",
+            target_amount=1,
+            maker_price_threshold=-0.01,
+            taker_price_threshold=-0.02
+        )
+
+        self.assertAlmostEqual(0.99, o.maker_trigger_price, 8)
+        self.assertAlmostEqual(0.98, o.taker_trigger_price, 8)
+
+        # buy order: price should raise to reach the threshold
+        o = MakerStopLossOrder("BTC/USDT", 1, 1, "buy", maker_price_threshold=-0.01, taker_price_threshold=-0.02)
+        self.assertAlmostEqual(1.01, o.maker_trigger_price, 8)
+        self.assertAlmostEqual(1.02, o.taker_trigger_price, 8)
+
+        o.taker_price_threshold = -0.05
+        o.update_trigger_prices()
+        self.assertAlmostEqual(1.05, o.taker_trigger_price, 8)
+
+        # trigger prices are recalculated for the new trade order
+        o.active_trade_order = o._create_next_trade_order_for_remained_amount(2)
+        self.assertAlmostEqual(2.02, o.maker_trigger_price, 8)
+        self.assertAlmostEqual(2.1, o.taker_trigger_price, 8)
+
+    def test_threshold_check_schedule(self):
+        o = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                        maker_price_threshold=-0.01,
+                                                        taker_price_threshold=-0.02,
+                                                        threshold_check_after_updates=1,
+                                                        threshold_check_interval=3)
+        far = [{"ask": 1, "bid": 0.995}]
+        triggered = [{"ask": 1, "bid": 0.97}]
+
+        # warm-up: tickers are not requested and thresholds are not checked
+        o.update_from_exchange({"status": "open", "filled": 0})
+        self.assertEqual("hold tickers BTC/USDT", o.order_command)  # check is due on the 2nd update
+
+        o.update_from_exchange({"status": "open", "filled": 0}, far)
+        self.assertEqual("hold", o.order_command)
+
+        # next checks are on every 3rd update
+        o.update_from_exchange({"status": "open", "filled": 0}, triggered)
+        self.assertEqual("maker", o.state)
+        self.assertEqual("hold", o.order_command)
+
+        o.update_from_exchange({"status": "open", "filled": 0}, triggered)
+        self.assertEqual("maker", o.state)
+        self.assertEqual("hold tickers BTC/USDT", o.order_command)
+
+        o.update_from_exchange({"status": "open", "filled": 0}, triggered)
+        self.assertEqual("taker", o.state)
+        self.assertEqual("cancel tickers BTC/USDT", o.order_command)
+
+        # price near the trigger: check on every update
+        o = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                        maker_price_threshold=-0.01,
+                                                        taker_price_threshold=-0.02,
+                                                        threshold_check_after_updates=1,
+                                                        threshold_check_interval=3,
+                                                        threshold_check_proximity=0.01)
+        o.update_from_exchange({"status": "open", "filled": 0})
+        o.update_from_exchange({"status": "open", "filled": 0}, [{"ask": 1, "bid": 0.985}])
+        self.assertEqual("maker", o.state)
+        self.assertEqual("hold tickers BTC/USDT", o.order_command)
+
+        o.update_from_exchange({"status": "open", "filled": 0}, triggered)
+        self.assertEqual("taker", o.state)
+
+    def test_taker_depth_pricing(self):
+        from tkgpro.threshold_order import price_levels
+
+        book = {"bids": [[0.99, 0.3], [0.98, 0.5], [0.97, 1]], "asks": [[1.01, 0.3], [1.02, 2]]}
+
+        self.assertEqual(0.99, price_levels.depth_price("sell", 0.3, price_levels.taker_depth_levels("sell", [book])))
+        self.assertEqual(0.97, price_levels.depth_price("sell", 1, price_levels.taker_depth_levels("sell", [book])))
+        self.assertEqual(1.02, price_levels.depth_price("buy", 1, price_levels.taker_depth_levels("buy", [book])))
+        self.assertAlmostEqual(0.97 * 0.99,
+                               price_levels.depth_price("sell", 5, price_levels.taker_depth_levels("sell", [book]),
+                                                        0.01), 8)
+
+        # ticker's top of book volume
+        ticker = {"bid": 0.99, "ask": 1.01, "bidVolume": 0.3, "askVolume": None}
+        self.assertEqual([(0.99, 0.3)], price_levels.taker_depth_levels("sell", [ticker]))
+        self.assertAlmostEqual(0.99 * 0.995, price_levels.depth_price("sell", 1, [(0.99, 0.3)], 0.005), 8)
+        self.assertEqual(1.01, price_levels.depth_price("buy", 1, price_levels.taker_depth_levels("buy", [ticker])))
+        self.assertIsNone(price_levels.depth_price("buy", 1, price_levels.taker_depth_levels("buy", [None])))
+
+        # taker order for the remained amount is priced by the depth of the market data
+        o = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                        taker_price_threshold=-0.02,
+                                                        threshold_check_after_updates=0,
+                                                        taker_depth_pricing=True)
+        o.update_from_exchange({"status": "open", "filled": 0})
+        o.update_from_exchange({"status": "open", "filled": 0.2}, [{"ask": 1, "bid": 0.97}])
+        self.assertEqual("taker", o.state)
+
+        o.update_from_exchange({"status": "canceled", "filled": 0.2}, [{"ask": 1, "bid": 0.97}, book])
+        self.assertEqual(0.8, o.active_trade_order.amount)
+        self.assertEqual(0.98, o.active_trade_order.price)  # 0.3 on 0.99 and 0.5 on 0.98
+
+    def test_short_circuit_unchanged_updates(self):
+        def create_order():
+            return MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                               maker_price_threshold=-0.01,
+                                                               taker_price_threshold=-0.02,
+                                                               maker_order_max_updates=20,
+                                                               threshold_check_after_updates=2,
+                                                               threshold_check_interval=3,
+                                                               threshold_check_proximity=0.01)
+
+        order, full_path_order = create_order(), create_order()
+        full_path_order._is_update_unchanged = lambda resp, market_data: False
+
+        updates = [({"status": "open", "filled": 0}, None)] + \
+                  [({"status": "open", "filled": 0.1}, {"ask": 1, "bid": 0.995})] * 5 + \
+                  [({"status": "open", "filled": 0.1}, {"ask": 1, "bid": 0.985})] * 4 + \
+                  [({"status": "open", "filled": 0.2}, {"ask": 1, "bid": 0.985})] * 4 + \
+                  [({"status": "open", "filled": 0.2}, {"ask": 1, "bid": 0.975})] * 2
+
+        for i, (resp, ticker) in enumerate(updates):
+            # the same prices with the new timestamps
+            market_data = [dict(ticker, timestamp=1000 * (i + 1))] if ticker is not None else None
+
+            order.update_from_exchange(resp, market_data)
+            full_path_order.update_from_exchange(resp, market_data)
+
+            self.assertEqual(full_path_order.order_command, order.order_command)
+            self.assertEqual(full_path_order.state, order.state)
+            self.assertEqual(full_path_order.active_trade_order.update_requests_count,
+                             order.active_trade_order.update_requests_count)
+            self.assertEqual(full_path_order._total_maker_updates, order._total_maker_updates)
+            self.assertEqual(full_path_order.cadence.volatility, order.cadence.volatility)
+            self.assertEqual(full_path_order.cadence.headroom, order.cadence.headroom)
+            self.assertEqual(full_path_order.next_check_delay, order.next_check_delay)
+
+        self.assertEqual("taker", order.state)
+        self.assertIsNotNone(order.cadence.volatility)
+        self.assertLess(0, order.short_circuited_updates)
+        self.assertEqual(0, full_path_order.short_circuited_updates)
+
     def test_relative_maker_price_dff(self):
         """
         check how relative price difference works
@@ -150,6 +334,92 @@ class MakerStopLossOrderTestSuite(unittest.TestCase):
         om.add_order(order)
         om.proceed_orders()  # update 1: order creation
 
+        self.assertEqual("hold", order.order_command)  # warm-up: tickers are not requested
+
+        market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.99}}}
+
+        om.data_for_orders.update(market_data)
+        om.proceed_orders()  # update 2: order fill 1/10 from 1 (0.1)
+
+        self.assertEqual("maker", order.state)
+        self.assertEqual("open", order.status)
+
+        self.assertEqual("hold", order.order_command)
+
+        # maker price (ask) below threshold is not checked during the warm-up (updates 3-6)
+        market_data = {"tickers": {"BTC/USDT": {"ask": 0.6, "bid": 0.99}}}
+        om.data_for_orders.update(market_data)
+
+        for i in range(3):
+            om.proceed_orders()
+            self.assertEqual("maker", order.state)
+            self.assertEqual("hold", order.order_command)
+            self.assertNotIn("#below_threshold_maker", order.tags)
+
+        om.proceed_orders()  # update 6: tickers are requested for the first check on the next update
+
+        self.assertEqual("hold tickers BTC/USDT", order.order_command)
+        self.assertNotIn("#below_threshold_maker", order.tags)
+        self.assertAlmostEqual(0.5, order.filled, 8)
+
+        om.proceed_orders()  # update 7: first price thresholds check
+
+        self.assertEqual(order.state, "maker")
+        self.assertEqual("open", order.status)
+
+        self.assertEqual("cancel tickers BTC/USDT", order.order_command)
+        self.assertIn("#below_threshold_maker", order.tags)
+        self.assertAlmostEqual(0.6, order.filled, 8)
+
+        # first trade order canceled. new trade order request for maker price 0.999
+        market_data = {"tickers": {"BTC/USDT": {"ask": 0.999, "bid": 0.99}}}
+        om.data_for_orders.update(market_data)
+        om.proceed_orders()
+
+        self.assertEqual(0.999, order.active_trade_order.price)
+        self.assertAlmostEqual(0.6, order.orders_history[-1].filled, 8)
+        self.assertEqual(order.state, "maker")
+        self.assertEqual("open", order.status)
+
+        self.assertEqual("new tickers BTC/USDT", order.order_command)
+        self.assertAlmostEqual(0.6, order.filled, 8)
+
+        # new order created, the warm-up starts again for the new trade order
+        om.proceed_orders()
+
+        self.assertAlmostEqual(0.6, order.filled, 8)
+        self.assertEqual("open", order.active_trade_order.status)
+        self.assertAlmostEqual(0.4, order.active_trade_order.amount, 8)
+        self.assertEqual("hold", order.order_command)
+
+        # 1st update of the new trade order. filled 1/10 of the new order (0.04 from 0.4)
+        om.proceed_orders()
+
+        self.assertAlmostEqual(0.64, order.filled, 8)
+
+    def test_multi_maker_fill_is_good_without_warm_up(self):
+        ex = ccxtExchangeWrapper.load_from_id("binancae") # type: ccxtExchangeWrapper
+        ex.set_offline_mode("test_data/markets.json", "test_data/tickers_maker.csv")
+
+        om = ActionOrderManager(ex)
+        om.offline_order_updates = 10  # number of updates to fill order from offline data
+
+        order = MakerStopLossOrder.create_from_start_amount(
+            symbol="BTC/USDT",
+            start_currency="BTC",
+            start_amount=1,
+            dest_currency="USDT",
+            target_amount=1,
+            cancel_threshold=0.001,
+            maker_price_threshold=-0.01,
+            maker_order_max_updates=60,
+            taker_price_threshold=-0.02,
+            taker_order_max_updates=20,
+            threshold_check_after_updates=0
+        )
+        om.add_order(order)
+        om.proceed_orders()  # update 1: order creation
+
         market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.99}}}
 
         om.data_for_orders.update(market_data)
@@ -333,6 +603,71 @@ class MakerStopLossOrderTestSuite(unittest.TestCase):
         self.assertEqual("maker", order.state)
         self.assertEqual("open", order.status)
 
+        # taker threshold (bid price) is reached during the warm-up: the thresholds are not checked
+        market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.97}}}
+        om.data_for_orders.update(market_data)
+        om.proceed_orders()
+
+        self.assertAlmostEqual(0.2, order.filled, 8)
+        self.assertEqual("maker", order.state)
+        self.assertEqual("open", order.status)
+
+        self.assertEqual("hold", order.order_command)
+        self.assertNotIn("#below_threshold_taker_price", order.tags)
+
+        # maker trade order reaches maker_order_max_updates before the warm-up ends and is re-opened
+        om.proceed_orders()
+
+        self.assertAlmostEqual(0.3, order.filled, 8)
+        self.assertEqual("maker", order.state)
+        self.assertEqual("cancel tickers BTC/USDT", order.order_command)
+        self.assertNotIn("#below_threshold_taker_price", order.tags)
+
+        om.proceed_orders()
+
+        self.assertEqual("maker", order.state)
+        self.assertEqual("open", order.status)
+
+        self.assertEqual("new tickers BTC/USDT", order.order_command)
+        self.assertEqual(1, len(order.orders_history))
+        self.assertEqual(1, order.active_trade_order.price)  # maker price (ask)
+        self.assertNotIn("#below_threshold_taker_price", order.tags)
+
+    def test_maker_threshold_triggered_without_warm_up(self):
+        ex = ccxtExchangeWrapper.load_from_id("binancae")  # type: ccxtExchangeWrapper
+        ex.set_offline_mode("test_data/markets.json", "test_data/tickers_maker.csv")
+
+        om = ActionOrderManager(ex)
+        om.offline_order_updates = 10  # number of updates to fill order from offline data
+
+        order = MakerStopLossOrder.create_from_start_amount(
+            symbol="BTC/USDT",
+            start_currency="BTC",
+            start_amount=1,
+            dest_currency="USDT",
+            target_amount=1,
+            cancel_threshold=0.001,
+            maker_price_threshold=-0.01,
+            maker_order_max_updates=4,
+            force_taker_updates=50,
+            taker_price_threshold=-0.02,
+            taker_order_max_updates=5,
+            threshold_check_after_updates=0
+        )
+
+        om.add_order(order)
+
+        market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.99}}}
+        om.data_for_orders.update(market_data)
+        om.proceed_orders()
+
+        market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.99}}}
+        om.data_for_orders.update(market_data)
+        om.proceed_orders()
+
+        self.assertEqual("maker", order.state)
+        self.assertEqual("open", order.status)
+
         # let's trigger taker threshold - bid price
         market_data = {"tickers": {"BTC/USDT": {"ask": 1, "bid": 0.97}}}
         om.data_for_orders.update(market_data)
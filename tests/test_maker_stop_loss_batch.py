@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder
+from tkgpro.threshold_order import MakerStopLossBatch
+
+import unittest
+
+
+def create_order(symbol="BTC/USDT", start_currency="BTC", dest_currency="USDT", start_amount=1, target_amount=1,
+                 **kwargs):
+    params = dict(cancel_threshold=0.001,
+                  maker_price_threshold=-0.01,
+                  maker_order_max_updates=4,
+                  force_taker_updates=50,
+                  taker_price_threshold=-0.02,
+                  taker_order_max_updates=5,
+                  threshold_check_after_updates=0)
+    params.update(kwargs)
+
+    return MakerStopLossOrder.create_from_start_amount(symbol, start_currency, start_amount, dest_currency,
+                                                      target_amount, **params)
+
+
+class MakerStopLossBatchTestSuite(unittest.TestCase):
+
+    def _assert_same_as_orders(self, orders_params, tickers_sequence):
+        """
+        runs the batch and the orders' own update path on the same tickers and compares the commands and states
+        """
+        orders = [create_order(**p) for p in orders_params]
+        batch_orders = [create_order(**p) for p in orders_params]
+
+        batch = MakerStopLossBatch(capacity=1)
+        for o in batch_orders:
+            batch.add_order(o)
+
+        for tickers in tickers_sequence:
+            batch.evaluate(tickers)
+
+            for i, o in enumerate(orders):
+                if o.order_command is not None and o.order_command.startswith("cancel"):
+                    continue
+
+                o.update_from_exchange({"status": "open", "filled": 0}, [tickers.get(o.symbol)])
+
+                self.assertEqual(o.order_command, batch.get_order_command(i))
+                self.assertEqual(o.state, batch_orders[i].state)
+                self.assertEqual(o.tags, batch_orders[i].tags)
+
+        return orders, batch_orders, batch
+
+    def test_add_remove(self):
+        batch = MakerStopLossBatch(capacity=1)
+        o1 = create_order()
+        o2 = create_order("ETH/BTC", "BTC", "ETH", 1, 10)
+        o3 = create_order()
+
+        self.assertEqual(0, batch.add_order(o1))
+        self.assertEqual(1, batch.add_order(o2))
+        self.assertEqual(2, batch.add_order(o3))
+        self.assertEqual(3, len(batch))
+        self.assertEqual(["BTC/USDT", "ETH/BTC"], batch.symbols)
+
+        batch.remove_order(o1)
+        self.assertEqual(2, len(batch))
+        self.assertEqual([o3, o2], batch.orders)
+        self.assertEqual(0, batch.refresh(o3))
+
+    def test_hold(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}, "ETH/BTC": {"ask": 0.1, "bid": 0.0999}}
+
+        orders, batch_orders, batch = self._assert_same_as_orders(
+            [dict(), dict(symbol="ETH/BTC", start_currency="BTC", dest_currency="ETH", start_amount=1,
+                          target_amount=10)],
+            [tickers, tickers, tickers])
+
+        self.assertEqual([batch.COMMAND_HOLD, batch.COMMAND_HOLD], list(batch.commands))
+
+        batch.sync_orders()
+        self.assertEqual(3, batch_orders[0]._total_maker_updates)
+        self.assertEqual(3, batch_orders[0].active_trade_order.update_requests_count)
+
+    def test_thresholds(self):
+        tickers = [{"BTC/USDT": {"ask": 1, "bid": 0.99}, "ETH/BTC": {"ask": 0.1, "bid": 0.0999}},
+                   {"BTC/USDT": {"ask": 1, "bid": 0.97}, "ETH/BTC": {"ask": 0.1015, "bid": 0.1011}}]
+
+        orders, batch_orders, batch = self._assert_same_as_orders(
+            [dict(), dict(symbol="ETH/BTC", start_currency="BTC", dest_currency="ETH", start_amount=1,
+                          target_amount=10)],
+            tickers)
+
+        self.assertEqual([batch.COMMAND_CANCEL, batch.COMMAND_CANCEL], list(batch.commands))
+        self.assertEqual("taker", batch_orders[0].state)
+        self.assertIn("#below_threshold_taker_price", batch_orders[0].tags)
+
+        self.assertEqual("maker", batch_orders[1].state)
+        self.assertIn("#below_threshold_maker", batch_orders[1].tags)
+        self.assertEqual("cancel tickers ETH/BTC", batch_orders[1].order_command)
+
+        # cancelled orders are suspended till the refresh
+        batch.evaluate(tickers[0])
+        self.assertEqual([batch.COMMAND_NONE, batch.COMMAND_NONE], list(batch.commands))
+
+    def test_max_updates(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+
+        orders, batch_orders, batch = self._assert_same_as_orders(
+            [dict(maker_order_max_updates=3), dict(force_taker_updates=2)],
+            [tickers, tickers, tickers])
+
+        self.assertEqual("cancel tickers BTC/USDT", batch_orders[0].order_command)
+        self.assertEqual("maker", batch_orders[0].state)
+
+        self.assertEqual("cancel tickers BTC/USDT", batch_orders[1].order_command)
+        self.assertEqual("taker", batch_orders[1].state)
+        self.assertIn("#force_taker_max_maker_updates", batch_orders[1].tags)
+
+    def test_threshold_check_schedule(self):
+        far = {"BTC/USDT": {"ask": 1, "bid": 0.995}}
+        near = {"BTC/USDT": {"ask": 1, "bid": 0.985}}
+        triggered = {"BTC/USDT": {"ask": 1, "bid": 0.97}}
+
+        schedule = dict(maker_order_max_updates=50, threshold_check_after_updates=2, threshold_check_interval=3)
+
+        orders, batch_orders, batch = self._assert_same_as_orders(
+            [dict(schedule), dict(schedule, threshold_check_proximity=0.01),
+             dict(schedule, taker_price_threshold=-0.05)],
+            [triggered, triggered, near, triggered, far, triggered, far])
+
+        self.assertEqual("taker", batch_orders[0].state)
+        self.assertEqual("taker", batch_orders[1].state)
+        self.assertEqual("maker", batch_orders[2].state)
+        self.assertEqual([batch.COMMAND_NONE, batch.COMMAND_NONE, batch.COMMAND_HOLD_WITHOUT_TICKERS],
+                         list(batch.commands))
+
+    def test_same_as_orders_updates(self):
+        """
+        cancelled orders get the next trade orders on both paths, the batch keeps the same check cadence, last checked
+        prices, proximity flag and tags as the orders' own update and writes them back by sync_orders()
+        """
+        def tickers(bid, ask, timestamp):
+            return {"BTC/USDT": {"ask": ask, "bid": bid, "timestamp": timestamp}}
+
+        tickers_sequence = [tickers(0.995, 1, 1000), tickers(0.992, 1, 2000), dict(), tickers(0.985, 0.992, 4000),
+                            dict(), tickers(0.984, 0.985, 6000), tickers(0.98, 0.982, 7000), dict(),
+                            tickers(0.95, 0.96, 9000), tickers(0.94, 0.95, 10000), dict(), tickers(0.93, 0.94, 12000)]
+
+        params = [dict(maker_order_max_updates=50), dict(maker_order_max_updates=50, threshold_check_proximity=0.01),
+                  dict(maker_order_max_updates=50, threshold_check_interval=2, threshold_check_proximity=0.005),
+                  dict(maker_order_max_updates=50, force_taker_updates=4)]
+
+        orders = [create_order(**p) for p in params]
+        batch_orders = [create_order(**p) for p in params]
+
+        batch = MakerStopLossBatch(capacity=1)
+        for o in batch_orders:
+            batch.add_order(o)
+
+        last_ticker = None
+        for snapshot in tickers_sequence:
+            batch.evaluate(snapshot)
+            batch.sync_orders()
+            last_ticker = snapshot.get("BTC/USDT", last_ticker)
+
+            for i, o in enumerate(orders):
+                market_data = [snapshot.get(o.symbol)]
+                o.update_from_exchange({"status": "open", "filled": 0}, market_data)
+
+                batch_order = batch_orders[i]
+                self.assertEqual(o.order_command, batch.get_order_command(i))
+                self.assertEqual(o.state, batch_order.state)
+                self.assertEqual(o.tags, batch_order.tags)
+                self.assertEqual(o._near_trigger, bool(batch._near_trigger[i]))
+                self.assertEqual(o._last_checked_prices, batch_order._last_checked_prices)
+                self.assertEqual(o.cadence.delay, batch_order.cadence.delay)
+                self.assertEqual(o.cadence.headroom, batch_order.cadence.headroom)
+                self.assertEqual(o.cadence.volatility, batch_order.cadence.volatility)
+                self.assertEqual(o.next_check_delay, batch_order.next_check_delay)
+
+                # cancelled orders get the next trade order
+                if o.order_command.startswith("cancel"):
+                    o.update_from_exchange({"status": "canceled", "filled": 0}, [last_ticker])
+                    batch_order.update_from_exchange({"status": "canceled", "filled": 0}, [last_ticker])
+                    batch.refresh(batch_order)
+
+        self.assertEqual(["taker", "taker", "taker", "taker"], [o.state for o in batch_orders])
+        self.assertEqual(["#below_threshold_maker", "#below_threshold_taker_price"], batch_orders[0].tags)
+        self.assertEqual(["#force_taker_max_maker_updates"], batch_orders[3].tags)
+        self.assertIsNotNone(batch_orders[1].cadence.volatility)
+
+    def test_no_tickers(self):
+        orders, batch_orders, batch = self._assert_same_as_orders([dict()], [dict(), dict()])
+        self.assertEqual([batch.COMMAND_HOLD], list(batch.commands))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import MarketIndex
+
+import unittest
+
+
+class MarketIndexTestSuite(unittest.TestCase):
+
+    def test_load(self):
+        markets = MarketIndex.load("test_data/markets.json")
+
+        self.assertEqual(10, len(markets))
+        self.assertIs(markets, MarketIndex.load("test_data/markets.json"))
+
+        self.assertIn("ETH/BTC", markets)
+        self.assertNotIn("ETH/XRP", markets)
+        self.assertIsNone(markets.get("ETH/XRP"))
+
+        record = markets.get("ETH/BTC")
+        self.assertIs(record, markets.get_by_id(markets.symbol_id("ETH/BTC")))
+        self.assertEqual(("ETH", "BTC"), (record.base, record.quote))
+        self.assertEqual(0.001, record.amount_min)
+        self.assertEqual(3, record.amount_precision)
+        self.assertEqual(6, record.price_precision)
+        self.assertAlmostEqual(0.000001, record.price_tick, 12)
+
+    def test_lookups(self):
+        markets = MarketIndex.load("test_data/markets.json")
+
+        self.assertEqual("buy", markets.side("ETH/BTC", "ETH"))
+        self.assertEqual("sell", markets.side("ETH/BTC", "BTC"))
+        self.assertFalse(markets.side("ETH/BTC", "USDT"))
+        self.assertEqual("sell", markets.side("ETH/XRP", "XRP"))  # not indexed symbol
+
+        self.assertEqual(0.082924, markets.round_price("ETH/BTC", 0.0829236))
+        self.assertEqual(682.5, markets.round_price("ETH/USDT", 682.4987))
+        self.assertEqual(0.0829236, markets.round_price("ETH/XRP", 0.0829236))
+
+        self.assertEqual(0.001, markets.cancel_threshold("ETH/BTC", 0.000001))
+        self.assertEqual(0.01, markets.cancel_threshold("ETH/BTC", 0.01))
+        self.assertEqual(0.000001, markets.cancel_threshold("ETH/XRP", 0.000001))
+
+    def test_tick_size_precision(self):
+        markets = MarketIndex({"ETH/BTC": {"symbol": "ETH/BTC", "base": "ETH", "quote": "BTC",
+                                           "limits": {"amount": {"min": 0.001}},
+                                           "precision": {"amount": 0.001, "price": 0.000005}}})
+
+        record = markets.get("ETH/BTC")
+        self.assertEqual(3, record.amount_precision)
+        self.assertEqual(6, record.price_precision)
+        self.assertEqual(0.082925, record.round_price(0.0829236))
+
+        # market without precision and limits
+        markets.add_market({"symbol": "ETH/BTC"})
+        self.assertEqual(1, len(markets))
+        self.assertEqual(("ETH", "BTC"), (markets.get("ETH/BTC").base, markets.get("ETH/BTC").quote))
+        self.assertEqual(0.0829236, markets.round_price("ETH/BTC", 0.0829236))
+        self.assertEqual(0.000001, markets.cancel_threshold("ETH/BTC", 0.000001))
+
+    def test_maker_stop_loss_order(self):
+        markets = MarketIndex.load("test_data/markets.json")
+
+        order = MakerStopLossOrder.create_from_start_amount("ETH/BTC", "ETH", 1, "BTC", 0.0829236, markets=markets)
+        self.assertEqual("sell", order.side)
+        self.assertEqual(0.001, order.cancel_threshold)
+        self.assertEqual(0.082924, order.price)
+        self.assertEqual(0.082924, order.active_trade_order.price)
+
+        # reprice of the maker trade order is rounded
+        order.update_from_exchange({"status": "open", "filled": 0.5})
+        order.update_from_exchange({"status": "canceled", "filled": 0.5}, [{"ask": 0.0829111, "bid": 0.0828}])
+        self.assertEqual(0.082911, order.active_trade_order.price)
+
+        orders = MakerStopLossOrder.create_from_start_amounts(["ETH/BTC", "ETH/BTC"], ["ETH", "BTC"], [1, 0.0829236],
+                                                              ["BTC", "ETH"], [0.0829236, 1], markets=markets)
+        self.assertEqual(["sell", "buy"], [o.side for o in orders])
+        self.assertEqual([0.082924, 0.082924], [o.price for o in orders])
+        self.assertEqual([0.001, 0.001], [o.cancel_threshold for o in orders])
+
+        # bulk rounding by the symbols' ticks is the same as MarketRecord.round_price, symbols out of the index are
+        # not rounded
+        targets = [(symbol, symbol.split("/")[0], 1 + i / 7, symbol.split("/")[1], 0.0829236 * (i + 1) / 3)
+                   for symbol in list(markets._symbol_ids) + ["XXX/YYY"] for i in range(10)]
+
+        orders = MakerStopLossOrder.create_from_start_amounts(*zip(*targets), markets=markets)
+        for order, target in zip(orders, targets):
+            expected = MakerStopLossOrder.create_from_start_amount(*target, markets=markets)
+            self.assertEqual((expected.price, expected.amount, expected.cancel_threshold),
+                             (order.price, order.amount, order.cancel_threshold))
+            self.assertIs(markets.get(order.symbol), order._market)
+
+    def test_threshold_recovery_order(self):
+        markets = MarketIndex.load("test_data/markets.json")
+
+        order = ThresholdRecoveryOrder("ETH/BTC", "ETH", 1, "BTC", 0.0829236, markets=markets)
+        self.assertEqual(0.001, order.cancel_threshold)
+        self.assertEqual(3, order.amount_precision)
+        self.assertEqual(0.082924, order.active_trade_order.price)
+
+        order = ThresholdRecoveryOrder("ETH/BTC", "ETH", 1, "BTC", 0.0829236, amount_precision=2, markets=markets)
+        self.assertEqual(2, order.amount_precision)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import OrderCommand, OrderCommands
+
+import unittest
+import copy
+import pickle
+
+
+class OrderCommandTestSuite(unittest.TestCase):
+
+    def test_command(self):
+        command = OrderCommand(OrderCommand.HOLD, "ETH/BTC")
+
+        self.assertEqual("hold tickers ETH/BTC", command)
+        self.assertEqual(["hold", "tickers", "ETH/BTC"], command.split(" "))
+        self.assertEqual("hold", command.kind)
+        self.assertEqual("ETH/BTC", command.symbol)
+        self.assertTrue(command.request_tickers)
+
+        command = OrderCommand(OrderCommand.NEW)
+        self.assertEqual("new", command)
+        self.assertIsNone(command.symbol)
+        self.assertFalse(command.request_tickers)
+
+        self.assertEqual("", OrderCommand(OrderCommand.NONE))
+
+    def test_copy(self):
+        command = OrderCommand(OrderCommand.CANCEL, "ETH/BTC")
+
+        for c in (copy.copy(command), copy.deepcopy(command), pickle.loads(pickle.dumps(command))):
+            self.assertEqual(command, c)
+            self.assertEqual("cancel", c.kind)
+            self.assertEqual("ETH/BTC", c.symbol)
+
+    def test_commands_cache(self):
+        commands = OrderCommands.get("ETH/BTC")
+
+        self.assertIs(commands, OrderCommands.get("ETH/BTC"))
+        self.assertEqual("new tickers ETH/BTC", commands.new_tickers)
+        self.assertEqual("hold tickers ETH/BTC", commands.hold_tickers)
+        self.assertEqual("cancel tickers ETH/BTC", commands.cancel_tickers)
+        self.assertEqual("", commands.none)
+
+    def test_get_command(self):
+        commands = OrderCommands.get("ETH/BTC")
+
+        self.assertIs(commands.hold_tickers, commands.get_command(pickle.loads(pickle.dumps(commands.hold_tickers))))
+        self.assertIs(commands.cancel_tickers, commands.get_command("cancel tickers ETH/BTC"))
+        self.assertIs(commands.new, commands.get_command("new"))
+        self.assertIs(commands.none, commands.get_command(""))
+        self.assertIsNone(commands.get_command(None))
+        self.assertEqual("hold tickers ADA/ETH", commands.get_command("hold tickers ADA/ETH"))
+
+    def test_orders_commands(self):
+        o = MakerStopLossOrder("ETH/BTC", 1, 0.01, "sell", threshold_check_after_updates=0)
+        self.assertIs(OrderCommands.get("ETH/BTC").new, o.order_command)
+
+        o.update_from_exchange({"status": "open", "filled": 0})
+        self.assertIs(OrderCommands.get("ETH/BTC").hold_tickers, o.order_command)
+
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131)
+        self.assertIs(OrderCommands.get("ADA/ETH").new_tickers, ro.order_command)
+        self.assertEqual("tickers", ro.order_command.split(" ")[1])
+
+        ro.update_from_exchange({"status": "open", "filled": 0})
+        self.assertIs(OrderCommands.get("ADA/ETH").hold_tickers, ro.order_command)
+
+
+if __name__ == '__main__':
+    unittest.main()
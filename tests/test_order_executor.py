@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.backtest import SimpleFillModel
+from tkgpro.execution import ThreadPoolOrderExecutor, FakeExchange, DelayedExchange
+from ztom import ccxtExchangeWrapper
+
+import threading
+import time
+import unittest
+
+
+class ThreadPoolOrderExecutorTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolOrderExecutor(max_workers=8)
+
+    def tearDown(self):
+        self.executor.close()
+
+    @staticmethod
+    def _maker_order(symbol="BTC/USDT"):
+        return MakerStopLossOrder.create_from_start_amount(symbol, "BTC", 1, symbol.split("/")[1], 1,
+                                                           maker_order_max_updates=50, taker_order_max_updates=5,
+                                                           threshold_check_after_updates=0)
+
+    def test_run_orders(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.995}, "BTC/EUR": {"ask": 1, "bid": 0.995},
+                   "ADA/ETH": {"ask": 0.00032485, "bid": 0.00032484}}
+        binance = FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=0.1), latency=0.001)
+        kraken = FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=0.1), latency=0.001)
+
+        self.executor.add_exchange("binance", binance, max_concurrent_requests=3)
+        self.executor.add_exchange("kraken", kraken, max_concurrent_requests=2)
+
+        orders = [self._maker_order() for i in range(10)] + [self._maker_order("BTC/EUR") for i in range(10)]
+        orders.append(ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485))
+
+        for i, o in enumerate(orders):
+            self.executor.add_order(o, "binance" if i % 2 else "kraken")
+
+        self.executor.run(tickers)
+
+        self.assertEqual(21, len(self.executor.closed_orders))
+        self.assertEqual([], self.executor.open_orders)
+        for o in orders:
+            self.assertEqual("closed", o.status)
+            self.assertAlmostEqual(o.start_amount, o.filled_start_amount, 6)
+
+        stats = self.executor.get_stats()
+        self.assertEqual(sum(binance.calls.values()), stats["binance"]["requests"])
+        self.assertEqual(10, binance.calls["place_limit_order"])
+        self.assertLessEqual(stats["binance"]["max_concurrent_requests"], 3)
+        self.assertLessEqual(stats["kraken"]["max_concurrent_requests"], 2)
+        self.assertGreater(stats["binance"]["max_concurrent_requests"], 1)
+
+    def test_slow_exchange_does_not_block(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        response = threading.Event()  # slow exchange responds when set
+
+        self.executor.add_exchange("fast", FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=1), latency=0.001))
+        self.executor.add_exchange("slow", FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=1),
+                                                        latency=lambda method, symbol: response.wait(10) and 0))
+
+        fast, slow = self._maker_order(), self._maker_order()
+        self.executor.add_order(slow, "slow")
+        self.executor.add_order(fast, "fast")
+
+        while fast.status != "closed":
+            self.executor.proceed_orders(tickers, timeout=1)
+
+        self.assertEqual("open", slow.status)
+        self.assertEqual([fast], self.executor.closed_orders)
+
+        response.set()
+        self.executor.run()
+        self.assertEqual("closed", slow.status)
+
+    def test_requests_in_order(self):
+        responses = list()
+
+        class Exchange(FakeExchange):
+
+            def get_order_update(self, trade_order):
+                resp = super().get_order_update(trade_order)
+                responses.append(resp["filled"])
+                return resp
+
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        exchange = Exchange(tickers, SimpleFillModel(maker_fill_ratio=0.25), latency=lambda m, s: 0.002)
+        order = self._maker_order()
+
+        self.executor.add_exchange("binance", exchange, max_concurrent_requests=4)
+        self.executor.add_order(order)
+
+        filled = list()
+        while order.status != "closed":
+            for o in self.executor.proceed_orders(tickers):
+                filled.append(o.filled)
+
+        # one request of the order in flight: the order gets the responses in the order of the requests
+        self.assertEqual(sorted(filled), filled)
+        self.assertEqual(responses, filled[1:len(responses) + 1])
+        self.assertEqual(1, self.executor.get_stats()["binance"]["max_concurrent_requests"])
+
+    def test_rate_limit(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        self.executor.add_exchange("binance", FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=0)),
+                                   max_concurrent_requests=4, rate_limit=100)
+
+        for i in range(10):
+            self.executor.add_order(self._maker_order())
+
+        start = time.monotonic()
+        self.executor.proceed_orders(tickers)
+        while sum(o._total_maker_updates for o in self.executor.open_orders) < 10:
+            self.executor.proceed_orders()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_rate_limit_does_not_take_workers(self):
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        executor = ThreadPoolOrderExecutor(max_workers=1)
+        executor.add_exchange("limited", FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=1)), rate_limit=1)
+        executor.add_exchange("fast", FakeExchange(tickers, SimpleFillModel(maker_fill_ratio=1)))
+
+        limited = [self._maker_order() for i in range(3)]
+        fast = [self._maker_order() for i in range(3)]
+        for o in limited:
+            executor.add_order(o, "limited")
+        for o in fast:
+            executor.add_order(o, "fast")
+
+        while any(o.status != "closed" for o in fast):
+            executor.proceed_orders(tickers, timeout=0.01)
+
+        # limited orders wait in the exchange's queue, the only pool's thread serves the other exchange
+        self.assertEqual(1, executor.get_stats()["limited"]["requests"])
+        self.assertEqual(2, len([o for o in limited if o.status != "closed"]))
+        executor.close()
+
+    def test_errors(self):
+        failures = [ConnectionError("timeout")]
+
+        class Exchange(FakeExchange):
+
+            def place_limit_order(self, trade_order):
+                if failures:
+                    raise failures.pop()
+                return super().place_limit_order(trade_order)
+
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        order = self._maker_order()
+        self.executor.add_exchange("binance", Exchange(tickers, SimpleFillModel(maker_fill_ratio=1)))
+        self.executor.add_order(order)
+
+        self.assertEqual([], self.executor.proceed_orders(tickers))
+        self.assertEqual(order.id, self.executor.errors[0][0])
+        self.assertIsInstance(self.executor.errors[0][1], ConnectionError)
+        self.assertEqual(1, self.executor.get_stats()["binance"]["errors"])
+
+        # failed request is repeated
+        self.executor.run()
+        self.assertEqual("closed", order.status)
+        self.assertEqual([order], self.executor.closed_orders)
+
+        with self.assertRaises(ValueError):
+            self.executor.add_order(order, "kraken")
+
+    def test_max_retries(self):
+        class Exchange(FakeExchange):
+
+            def place_limit_order(self, trade_order):
+                raise ConnectionError("timeout")
+
+        removed = list()
+        executor = ThreadPoolOrderExecutor(max_retries=2, max_errors=2, on_order_removed=removed.append)
+        executor.add_exchange("binance", Exchange({"BTC/USDT": {"ask": 1, "bid": 0.99}}))
+
+        order = self._maker_order()
+        executor.add_order(order)
+        cycles = executor.run(max_cycles=10)
+        executor.close()
+
+        # permanently failing order is dropped after max_retries repeated requests
+        self.assertEqual(3, cycles)
+        self.assertEqual([order], executor.failed_orders)
+        self.assertEqual([order], removed)
+        self.assertEqual([], executor.open_orders)
+        self.assertEqual(2, len(executor.errors))
+        self.assertEqual(3, executor.get_stats()["binance"]["errors"])
+
+    def test_offline_ccxt_exchange(self):
+        ex = ccxtExchangeWrapper.load_from_id("binance")  # type: ccxtExchangeWrapper
+        ex.set_offline_mode("test_data/markets.json", "test_data/tickers_maker.csv")
+
+        self.executor.add_exchange("binance", DelayedExchange(ex, 0.01), offline_order_updates=10)
+
+        orders = [self._maker_order() for i in range(4)]
+        for o in orders:
+            self.executor.add_order(o)
+
+        tickers = {"BTC/USDT": {"ask": 1, "bid": 0.99}}
+        self.executor.run(tickers, max_cycles=100)
+
+        for o in orders:
+            self.assertEqual("closed", o.status)
+            self.assertAlmostEqual(1, o.filled, 6)
+
+        # requests of the orders are concurrent
+        self.assertGreater(self.executor.get_stats()["binance"]["max_concurrent_requests"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import OrderStore, MarketIndex, snapshot_order
+from tkgpro.threshold_order.order_command import OrderCommand
+
+import os
+import pickle
+import tempfile
+import unittest
+
+ATTRIBUTES = ("id", "symbol", "side", "state", "status", "order_command", "filled", "filled_start_amount",
+              "filled_dest_amount", "tags", "_total_maker_updates", "taker_trigger_price", "maker_trigger_price")
+
+
+class OrderStoreTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "orders")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    @staticmethod
+    def create_orders():
+        maker_order = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                                  taker_price_threshold=-0.02,
+                                                                  maker_order_max_updates=3,
+                                                                  threshold_check_after_updates=0)
+        recovery_order = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, amount_precision=0)
+        return [maker_order, recovery_order]
+
+    def assertOrdersEqual(self, expected, order, same_trade_order=True):
+        for attribute in ATTRIBUTES:
+            self.assertEqual(getattr(expected, attribute, None), getattr(order, attribute, None), attribute)
+
+        self.assertEqual(len(expected.orders_history), len(order.orders_history))
+        if expected.active_trade_order is None:
+            self.assertIsNone(order.active_trade_order)
+            return
+
+        for attribute in ("price", "amount", "filled", "status", "update_requests_count"):
+            self.assertEqual(getattr(expected.active_trade_order, attribute),
+                             getattr(order.active_trade_order, attribute), attribute)
+
+        if same_trade_order:
+            self.assertEqual(expected.active_trade_order.internal_id, order.active_trade_order.internal_id)
+
+    @staticmethod
+    def update(order, resp, market_data=None):
+        order.update_from_exchange(dict(resp), market_data)
+
+    def test_restore_and_resume(self):
+        orders = self.create_orders()
+        maker_order, recovery_order = orders
+
+        store = OrderStore(self.path)
+        self.assertEqual([], store.restore())
+
+        steps = [({"status": "open", "filled": 0.1}, [{"ask": 1, "bid": 0.99}]),
+                 ({"status": "open", "filled": 0.1}, [{"ask": 1, "bid": 0.99}]),
+                 ({"status": "open", "filled": 0.3}, [{"ask": 1, "bid": 0.99}])]
+
+        for resp, market_data in steps:
+            self.update(maker_order, resp, market_data)
+            store.update(maker_order)
+
+        self.update(recovery_order, {"status": "open", "filled": 100}, [{"ask": 0.00033, "bid": 0.00032}])
+        store.update(recovery_order)
+        store.close()
+
+        restored = OrderStore(self.path).restore()
+        self.assertEqual([o.id for o in orders], [o.id for o in restored])
+
+        for expected, order in zip(orders, restored):
+            self.assertOrdersEqual(expected, order)
+
+        # maker trade order is cancelled by the updates limit
+        self.assertIs(restored[0]._commands.cancel_tickers, restored[0].order_command)
+
+        # restored orders continue exactly as the original ones: new maker trade order is created, then the taker
+        # threshold is reached
+        steps = [({"status": "canceled", "filled": 0.3}, [{"ask": 1, "bid": 0.99}]),
+                 ({"status": "open", "filled": 0}, [{"ask": 1, "bid": 0.97}]),
+                 ({"status": "canceled", "filled": 0}, [{"ask": 1, "bid": 0.97}]),
+                 ({"status": "open", "filled": 0.2}, [{"ask": 1, "bid": 0.97}])]
+
+        for resp, market_data in steps:
+            for order in (maker_order, restored[0]):
+                self.update(order, resp, market_data)
+            self.assertOrdersEqual(maker_order, restored[0], same_trade_order=False)
+
+        self.assertEqual("taker", restored[0].state)
+        self.assertAlmostEqual(0.5, restored[0].filled, 8)
+
+        for order in (recovery_order, restored[1]):
+            self.update(order, {"status": "closed", "filled": 1000}, [{"ask": 0.00033, "bid": 0.00032}])
+        self.assertOrdersEqual(recovery_order, restored[1])
+        self.assertEqual("closed", restored[1].status)
+
+    def test_update_journals_changes(self):
+        order = self.create_orders()[0]
+        store = OrderStore(self.path)
+        store.restore()
+
+        self.assertTrue(store.update(order))
+        self.assertFalse(store.update(order))
+
+        self.update(order, {"status": "open", "filled": 0}, [{"ask": 1, "bid": 0.99}])
+        self.assertTrue(store.update(order))  # command is changed
+
+        self.update(order, {"status": "open", "filled": 0}, [{"ask": 1, "bid": 0.99}])
+        self.assertFalse(store.update(order))  # only the update counters are changed
+
+        self.update(order, {"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.99}])
+        self.assertTrue(store.update(order))
+        self.assertEqual(3, store.records)
+
+    def test_records_of_changes(self):
+        order = self.create_orders()[0]
+        store = OrderStore(self.path)
+        store.restore()
+
+        sizes = list()
+        for i in range(150):
+            # maker trade order is cancelled by the updates limit and replaced by the new one
+            status = "canceled" if order.order_command.kind == OrderCommand.CANCEL else "open"
+            self.update(order, {"status": status, "filled": 0}, [{"ask": 1, "bid": 0.99}])
+
+            journal_size = os.path.getsize(store.journal_file)
+            if store.update(order):
+                sizes.append(os.path.getsize(store.journal_file) - journal_size)
+        store.record(order)  # the update counters of the last updates
+        store.close()
+
+        # records have only the changed fields, their size does not grow with the trade orders history
+        self.assertLess(30, len(order.orders_history))
+        self.assertLess(max(sizes[-20:]), len(pickle.dumps(snapshot_order(order))) / 4)
+        self.assertLessEqual(max(sizes[-20:]), max(sizes[1:20]))
+
+        restored = OrderStore(self.path).restore()[0]
+        self.assertOrdersEqual(order, restored)
+        self.assertEqual([t.internal_id for t in order.orders_history],
+                         [t.internal_id for t in restored.orders_history])
+        self.assertEqual("canceled", restored.orders_history[-1].status)
+        self.assertIs(restored.active_trade_order, restored._last_response.trade_order)
+
+    def test_checkpoint(self):
+        orders = self.create_orders()
+        maker_order, recovery_order = orders
+
+        store = OrderStore(self.path, checkpoint_records=2)
+        store.restore()
+
+        store.update(maker_order)
+        store.update(recovery_order)
+        self.assertTrue(store.is_checkpoint_due)
+
+        with open(store.journal_file, "rb") as f:
+            old_journal = f.read()
+
+        self.update(maker_order, {"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.99}])
+        self.update(recovery_order, {"status": "closed", "filled": 1000}, [{"ask": 0.00033, "bid": 0.00032}])
+        store.checkpoint([maker_order])
+
+        self.assertFalse(store.is_checkpoint_due)
+        self.assertEqual(0, os.path.getsize(store.journal_file))
+        store.close()
+
+        restored = OrderStore(self.path).restore()
+        self.assertEqual(1, len(restored))
+        self.assertOrdersEqual(maker_order, restored[0])
+
+        # stopped before the journal truncation: records older than the checkpoint are skipped
+        with open(store.journal_file, "wb") as f:
+            f.write(old_journal)
+
+        restored = OrderStore(self.path).restore()
+        self.assertEqual(1, len(restored))
+        self.assertEqual(0.5, restored[0].filled)
+
+    def test_closed_and_torn_records(self):
+        orders = self.create_orders()
+        maker_order, recovery_order = orders
+
+        store = OrderStore(self.path)
+        store.restore()
+        store.update(maker_order)
+        self.update(recovery_order, {"status": "closed", "filled": 1000}, [{"ask": 0.00033, "bid": 0.00032}])
+        store.update(recovery_order)
+        store.close()
+
+        with open(store.journal_file, "ab") as f:
+            f.write(b"\x10\x00\x00")  # torn record
+
+        store = OrderStore(self.path)
+        self.assertEqual([maker_order.id], [o.id for o in store.restore()])
+        self.assertEqual(2, len(store.restore(include_closed=True)))
+
+        # torn record is dropped, new records are readable
+        self.update(maker_order, {"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.99}])
+        store.update(maker_order)
+        store.close()
+
+        restored = OrderStore(self.path).restore()
+        self.assertEqual(0.5, restored[0].filled)
+
+    def test_write_before_restore(self):
+        orders = self.create_orders()
+        maker_order, recovery_order = orders
+
+        store = OrderStore(self.path)
+        store.update(maker_order)
+        store.update(recovery_order)
+        store.checkpoint(orders)
+        store.close()
+
+        with open(store.journal_file, "ab") as f:
+            f.write(b"\x10\x00\x00")  # torn record
+
+        # reopened store is written without restore(): the records continue the sequence after the checkpoint
+        store = OrderStore(self.path)
+        self.update(maker_order, {"status": "open", "filled": 0.5}, [{"ask": 1, "bid": 0.99}])
+        store.update(maker_order)
+        self.assertEqual(1, store.records)
+        store.close()
+
+        restored = OrderStore(self.path).restore()
+        self.assertEqual([o.id for o in orders], [o.id for o in restored])
+        self.assertOrdersEqual(maker_order, restored[0])
+
+        store = OrderStore(self.path)
+        store.checkpoint([maker_order])
+        store.update(recovery_order)
+        store.close()
+        self.assertEqual(2, len(OrderStore(self.path).restore()))
+
+    def test_markets(self):
+        markets = MarketIndex.load("test_data/markets.json")
+        order = MakerStopLossOrder.create_from_start_amount("ETH/BTC", "ETH", 1, "BTC", 0.0829236, markets=markets)
+
+        store = OrderStore(self.path)
+        store.restore()
+        store.update(order)
+        store.close()
+
+        restored = OrderStore(self.path).restore(markets=markets)[0]
+        self.assertIs(markets, restored.markets)
+        self.assertIs(markets.get("ETH/BTC"), restored._market)
+        self.assertIsNone(restored.trigger_book)
+
+
+if __name__ == '__main__':
+    unittest.main()
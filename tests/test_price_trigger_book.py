@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import PriceTriggerBook
+
+import unittest
+
+
+class PriceTriggerBookTestSuite(unittest.TestCase):
+
+    def _maker_order(self, price=1, side="sell", symbol="BTC/USDT"):
+        return MakerStopLossOrder(symbol, 1, price, side, maker_price_threshold=-0.01, taker_price_threshold=-0.02)
+
+    def test_levels(self):
+        book = PriceTriggerBook()
+        sell, buy = self._maker_order(), self._maker_order(side="buy")
+
+        book.add_order(sell)
+        book.add_order(buy)
+
+        self.assertIs(book, sell.trigger_book)
+        self.assertEqual(4, len(book))
+        self.assertAlmostEqual(0.98, book.get_levels(sell)["taker"], 8)
+        self.assertAlmostEqual(1.01, book.get_levels(buy)["maker"], 8)
+
+        # not crossed
+        self.assertEqual([], book.update_ticker("BTC/USDT", {"ask": 1.0, "bid": 0.995}))
+        self.assertEqual([], book.update_ticker("ETH/BTC", {"ask": 0.5, "bid": 0.4}))
+
+        # sell maker: ask falls to 0.99, buy maker: bid rises to 1.01
+        fired = book.update_ticker("BTC/USDT", {"ask": 0.99, "bid": 1.015})
+        self.assertEqual([(buy, "maker", 1.015), (sell, "maker", 0.99)], fired)
+        self.assertEqual(2, len(book))
+
+        # fired levels are one-shot
+        self.assertEqual([], book.update_ticker("BTC/USDT", {"ask": 0.99, "bid": 1.015}))
+
+        fired = book.update_tickers({"BTC/USDT": {"ask": 1.03, "bid": 0.97}})
+        self.assertEqual([(sell, "taker", 0.97), (buy, "taker", 1.03)], fired)
+        self.assertEqual(0, len(book))
+        self.assertEqual(4, book.fired)
+
+    def test_callbacks_and_reprice(self):
+        book = PriceTriggerBook()
+        calls = list()
+
+        orders = [self._maker_order(price) for price in (1, 1.01, 1.02, 1.05)]
+        for o in orders:
+            book.add_order(o, lambda order, kind, price: calls.append((order, kind)))
+
+        book.update_ticker("BTC/USDT", {"ask": 1.0, "bid": 1.5})
+
+        # maker levels 1.0098 and 1.0395 are crossed by ask 1.0
+        self.assertEqual([(orders[2], "maker"), (orders[3], "maker")], calls)
+
+        # order's reprice moves its levels
+        orders[0].active_trade_order = orders[0]._create_next_trade_order_for_remained_amount(2)
+        self.assertAlmostEqual(1.98, book.get_levels(orders[0])["maker"], 8)
+        self.assertAlmostEqual(1.96, book.get_levels(orders[0])["taker"], 8)
+
+        calls.clear()
+        book.update_ticker("BTC/USDT", {"ask": 1.97, "bid": 1.97})
+        self.assertEqual([(orders[0], "maker")], calls)
+
+        # levels of the order which left the maker state are dropped without firing
+        orders[1].state = "taker"
+        calls.clear()
+        book.update_ticker("BTC/USDT", {"ask": 2, "bid": 0.5})
+        self.assertEqual([(orders[2], "taker"), (orders[3], "taker"), (orders[0], "taker")], calls)
+
+        self.assertEqual({"maker": orders[1].maker_trigger_price}, book.get_levels(orders[1]))
+        book.remove_order(orders[1])
+        self.assertIsNone(orders[1].trigger_book)
+        self.assertEqual(0, len(book))
+
+    def test_threshold_recovery_order(self):
+        book = PriceTriggerBook()
+        order = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485)
+        book.add_order(order)
+
+        self.assertEqual({"taker": order.taker_trigger_price}, book.get_levels(order))
+        self.assertEqual([(order, "taker", order.taker_trigger_price)],
+                         book.update_ticker("ADA/ETH", {"ask": 0.00033, "bid": order.taker_trigger_price}))
+
+
+if __name__ == '__main__':
+    unittest.main()
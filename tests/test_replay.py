@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.backtest import Replay, SimpleFillModel, read_tickers_csv
+
+import unittest
+
+
+class ReplayTestSuite(unittest.TestCase):
+
+    def test_read_tickers_csv(self):
+        snapshots = list(read_tickers_csv("test_data/tickers.csv"))
+
+        self.assertEqual(3, len(snapshots))
+        self.assertEqual(10, len(snapshots[0][1]))
+        timestamp, tickers = snapshots[0]
+        self.assertEqual(1527000539980, timestamp)
+        self.assertEqual({"ask": 0.082975, "bid": 0.082923, "askVolume": 6.33, "bidVolume": 10.011,
+                          "timestamp": 1527000539980}, tickers["ETH/BTC"])
+
+        snapshots = list(read_tickers_csv("test_data/tickers_maker.csv"))
+        self.assertEqual(7, len(snapshots))
+        self.assertEqual(1, snapshots[0][1]["BTC/USDT"]["ask"])
+
+    def test_fill_model(self):
+        o = MakerStopLossOrder("BTC/USDT", 1, 1, "sell")
+        fill_model = SimpleFillModel(maker_fill_ratio=0.5)
+
+        # on the best price: maker fill
+        resp = fill_model.create_order(o.active_trade_order, {"ask": 1, "bid": 0.9, "bidVolume": 0.1})
+        self.assertEqual({"status": "open", "filled": 0.5, "cost": 0.5}, resp)
+
+        # crossed by bid: taker fill limited by volume
+        resp = fill_model.fetch_order(o.active_trade_order, {"ask": 1.1, "bid": 1, "bidVolume": 0.1})
+        self.assertEqual("open", resp["status"])
+        self.assertAlmostEqual(0.6, resp["filled"], 8)
+
+        resp = fill_model.cancel_order(o.active_trade_order)
+        self.assertEqual("canceled", resp["status"])
+        self.assertAlmostEqual(0.6, resp["filled"], 8)
+
+    def test_maker_stop_loss_taker_threshold(self):
+        order = MakerStopLossOrder.create_from_start_amount(
+            symbol="BTC/USDT",
+            start_currency="BTC",
+            start_amount=1,
+            dest_currency="USDT",
+            target_amount=1,
+            cancel_threshold=0.001,
+            maker_price_threshold=-0.01,
+            maker_order_max_updates=50,
+            taker_price_threshold=-0.02,
+            taker_order_max_updates=5,
+            threshold_check_after_updates=0)
+
+        # tickers_maker.csv has bid 0.9: taker threshold is reached on the 1st update
+        replay = Replay(SimpleFillModel())
+        replay.add_order(order)
+        report = replay.run(read_tickers_csv("test_data/tickers_maker.csv"))
+
+        self.assertEqual(1, len(report))
+        result = report[0]
+
+        self.assertEqual("closed", result["status"])
+        self.assertEqual("taker", result["state"])
+        self.assertEqual(1, result["filled"])
+        self.assertAlmostEqual(0.9, result["filled_price"], 8)
+        self.assertAlmostEqual(-0.1, result["slippage"], 8)
+        self.assertEqual(0, result["time_to_fill"])
+        self.assertEqual(1, result["target_price"])
+        self.assertEqual([(1527000539972, "maker", "taker")], result["transitions"])
+        self.assertIn("#below_threshold_taker_price", result["tags"])
+
+    def test_threshold_recovery_order_best_amount(self):
+        # ETH/BTC ask is 0.082975 and bid is 0.082923 in the 1st snapshot
+        order = ThresholdRecoveryOrder("ETH/BTC", "ETH", 1, "BTC", 0.0829, taker_price_threshold=-0.01)
+
+        replay = Replay(SimpleFillModel())
+        replay.add_order(order)
+        report = replay.run(read_tickers_csv("test_data/tickers.csv"))
+
+        self.assertEqual("closed", report[0]["status"])
+        self.assertEqual("best_amount", report[0]["state"])
+        self.assertAlmostEqual(0.0829, report[0]["filled_price"], 8)
+        self.assertAlmostEqual(0, report[0]["slippage"], 8)
+        self.assertEqual(1, report[0]["updates"])
+
+
+if __name__ == '__main__':
+    unittest.main()
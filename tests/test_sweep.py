@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro.backtest import Sweep, MakerStopLossFactory, ThresholdRecoveryFactory, parameter_grid
+
+import unittest
+import tempfile
+import os
+import csv
+
+
+class SweepTestSuite(unittest.TestCase):
+
+    def test_parameter_grid(self):
+        grid = parameter_grid(maker_price_threshold=[-0.005, -0.01], force_taker_updates=[100, 500, 1000])
+
+        self.assertEqual(6, len(grid))
+        self.assertIn({"maker_price_threshold": -0.01, "force_taker_updates": 500}, grid)
+
+    def test_tasks(self):
+        sweep = Sweep(MakerStopLossFactory("BTC/USDT", "BTC", 1, "USDT"),
+                      parameter_grid(maker_price_threshold=[-0.005, -0.01], force_taker_updates=[100, 500, 1000]),
+                      ["a", "b"], parameters_per_task=4)
+
+        tasks = sweep.tasks(["a", "b"])
+        self.assertEqual(4, len(tasks))
+        self.assertEqual(4, len(tasks[0][0]))
+        self.assertEqual(2, len(tasks[1][0]))
+        self.assertEqual(["a", "a", "b", "b"], [t[1] for t in tasks])
+
+    def test_run_maker_stop_loss(self):
+        grid = parameter_grid(taker_price_threshold=[-0.05, -0.2], maker_order_max_updates=[2, 50],
+                              threshold_check_after_updates=[0])
+
+        sweep = Sweep(MakerStopLossFactory("BTC/USDT", "BTC", 1, "USDT", target_amount=1), grid,
+                      ["test_data/tickers_maker.csv", "test_data/tickers_maker.csv"], max_workers=2,
+                      parameters_per_task=3)
+
+        results = sweep.run()
+        self.assertEqual(8, len(results))
+
+        for row in results:
+            # bid 0.9 is below the -0.05 threshold: filled on taker price, otherwise stays open on maker price
+            if row["taker_price_threshold"] == -0.05:
+                self.assertEqual("closed", row["status"])
+                self.assertAlmostEqual(0.9, row["filled_price"], 8)
+            else:
+                self.assertEqual("open", row["status"])
+                self.assertEqual("maker", row["state"])
+
+        with tempfile.TemporaryDirectory() as path:
+            sweep.save_csv(os.path.join(path, "results.csv"))
+            with open(os.path.join(path, "results.csv")) as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(8, len(rows))
+        self.assertIn("taker_price_threshold", rows[0])
+
+    def test_run_threshold_recovery(self):
+        sweep = Sweep(ThresholdRecoveryFactory("ETH/BTC", "ETH", 1, "BTC"),
+                      parameter_grid(taker_price_threshold=[-0.01, -0.02]),
+                      ["test_data/tickers.csv"], max_workers=1)
+
+        results = sweep.run()
+        self.assertEqual(2, len(results))
+        self.assertEqual(0.082975, results[0]["target_price"])
+
+
+if __name__ == '__main__':
+    unittest.main()
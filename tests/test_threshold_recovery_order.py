@@ -55,6 +55,39 @@ class ThresholdThresholdRecoverOrderTestSuite(unittest.TestCase):
 
         self.assertEqual(rm.amount, 1000)
 
+    def test_trigger_price(self):
+        # sell order
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, taker_price_threshold=-0.01)
+        self.assertAlmostEqual(ro.best_price * 0.99, ro.taker_trigger_price, 12)
+        self.assertIsNone(ro.maker_trigger_price)
+
+        # buy order
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ETH", 0.32485131, "ADA", 1000, taker_price_threshold=-0.01)
+        self.assertAlmostEqual(ro.best_price * 1.01, ro.taker_trigger_price, 12)
+
+    def test_short_circuit_unchanged_updates(self):
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, taker_price_threshold=-0.01,
+                                    max_best_amount_order_updates=5)
+        ticker = {"ask": 0.00033, "bid": 0.00032484}
+
+        ro.update_from_exchange({"status": "open", "filled": 100}, [ticker])
+        ro.update_from_exchange({"status": "open", "filled": 100}, [ticker])
+        ro.update_from_exchange({"status": "open", "filled": 100}, None)
+        self.assertEqual(2, ro.short_circuited_updates)
+        self.assertEqual(3, ro.active_trade_order.update_requests_count)
+        self.assertEqual("hold tickers ADA/ETH", ro.order_command)
+
+        # changed fill and price are evaluated
+        ro.update_from_exchange({"status": "open", "filled": 200}, [ticker])
+        self.assertEqual(200, ro.filled)
+        ro.update_from_exchange({"status": "open", "filled": 200}, [{"ask": 0.00033, "bid": 0.00032483}])
+        self.assertEqual(2, ro.short_circuited_updates)
+
+        # updates limit is reached
+        ro.update_from_exchange({"status": "open", "filled": 200}, [{"ask": 0.00033, "bid": 0.00032483}])
+        self.assertEqual("cancel tickers ADA/ETH", ro.order_command)
+        self.assertEqual(2, ro.short_circuited_updates)
+
     def test_update_from_exchange(self):
         ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, taker_price_threshold=-0.01)
 
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.execution import TickerCoalescer
+from ztom import ccxtExchangeWrapper
+
+import unittest
+
+
+class FakeExchange(object):
+
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.fetch_tickers_calls = list()
+
+    def fetch_tickers(self, symbols=None):
+        self.fetch_tickers_calls.append(symbols)
+        return {s: self.tickers[s] for s in symbols if s in self.tickers}
+
+
+class TickerCoalescerTestSuite(unittest.TestCase):
+
+    def _maker_order(self, symbol):
+        order = MakerStopLossOrder.create_from_start_amount(symbol, "ETH", 1, "BTC", 0.03,
+                                                            threshold_check_after_updates=0)
+        order.update_from_exchange({"status": "open", "filled": 0})
+        return order
+
+    def test_coalesce(self):
+        exchange = FakeExchange({"ETH/BTC": {"ask": 0.031, "bid": 0.0305},
+                                 "ADA/ETH": {"ask": 0.00032485, "bid": 0.00032484}})
+
+        orders = [self._maker_order("ETH/BTC") for i in range(50)]
+        orders.append(ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485))
+        no_tickers_order = MakerStopLossOrder.create_from_start_amount("ETH/BTC", "ETH", 1, "BTC", 0.03)
+        orders.append(no_tickers_order)
+
+        coalescer = TickerCoalescer()
+        market_data = coalescer.proceed(orders, exchange)
+
+        self.assertEqual([["ADA/ETH", "ETH/BTC"]], exchange.fetch_tickers_calls)
+        self.assertEqual([exchange.tickers["ETH/BTC"]], market_data[0])
+        self.assertEqual([exchange.tickers["ADA/ETH"]], market_data[50])
+        self.assertIsNone(market_data[51])
+
+        stats = coalescer.get_stats()
+        self.assertEqual(51, stats["tickers_requests"])
+        self.assertEqual(1, stats["tickers_fetches"])
+        self.assertEqual(50, stats["requests_saved"])
+        self.assertEqual(2, stats["symbols_fetched"])
+
+    def test_per_exchange(self):
+        exchange1 = FakeExchange({"ETH/BTC": {"ask": 0.031, "bid": 0.0305}})
+        exchange2 = FakeExchange({"ETH/BTC": {"ask": 0.032, "bid": 0.0315}})
+
+        order1, order2 = self._maker_order("ETH/BTC"), self._maker_order("ETH/BTC")
+
+        coalescer = TickerCoalescer()
+        coalescer.new_cycle()
+        coalescer.add_request(order1, exchange1)
+        coalescer.add_request(order2, exchange2)
+        coalescer.fetch()
+
+        self.assertEqual(1, len(exchange1.fetch_tickers_calls))
+        self.assertEqual(1, len(exchange2.fetch_tickers_calls))
+        self.assertEqual(0.031, coalescer.market_data(order1)[0]["ask"])
+        self.assertEqual(0.032, coalescer.market_data(order2)[0]["ask"])
+
+        # tickers of the previous cycle are not reused
+        coalescer.new_cycle()
+        self.assertIsNone(coalescer.market_data(order1))
+        self.assertEqual(0, coalescer.get_stats()["requests_saved"])
+
+    def test_offline_ccxt_exchange(self):
+        ex = ccxtExchangeWrapper.load_from_id("binance")  # type: ccxtExchangeWrapper
+        ex.set_offline_mode("test_data/markets.json", "test_data/tickers_maker.csv")
+
+        order = MakerStopLossOrder.create_from_start_amount("BTC/USDT", "BTC", 1, "USDT", 1,
+                                                            threshold_check_after_updates=0)
+        order.update_from_exchange({"status": "open", "filled": 0})
+
+        # tickers are fetched through the wrapper in the offline mode
+        market_data = TickerCoalescer().proceed([order], ex)
+        self.assertEqual(1, market_data[0][0]["ask"])
+        self.assertEqual(0.9, market_data[0][0]["bid"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder, ThresholdRecoveryOrder
+from tkgpro.threshold_order import TickerDispatcher
+
+import unittest
+
+
+class TickerDispatcherTestSuite(unittest.TestCase):
+
+    def _maker_order(self):
+        return MakerStopLossOrder.create_from_start_amount(
+            symbol="BTC/USDT",
+            start_currency="BTC",
+            start_amount=1,
+            dest_currency="USDT",
+            target_amount=1,
+            maker_price_threshold=-0.01,
+            taker_price_threshold=-0.02)
+
+    def test_index(self):
+        d = TickerDispatcher()
+        o1 = self._maker_order()
+        o2 = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131)
+
+        d.add_order(o1)
+        d.add_order(o2)
+
+        self.assertEqual([o1], d.get_orders("BTC/USDT"))
+        self.assertEqual([o2], d.get_orders("ADA/ETH"))
+
+        d.remove_order(o1)
+        self.assertEqual([], d.get_orders("BTC/USDT"))
+        self.assertNotIn("BTC/USDT", d.orders_by_symbol)
+
+    def test_trigger_levels(self):
+        o = self._maker_order()
+        taker_trigger, maker_trigger = TickerDispatcher.get_trigger_levels(o)
+
+        self.assertAlmostEqual(0.98, taker_trigger, 8)
+        self.assertAlmostEqual(0.99, maker_trigger, 8)
+
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ETH", 0.32485131, "ADA", 1000, -0.02)
+        taker_trigger, maker_trigger = TickerDispatcher.get_trigger_levels(ro)
+        self.assertAlmostEqual(ro.best_price * 1.02, taker_trigger, 12)
+        self.assertIsNone(maker_trigger)
+
+        o.state = "taker"
+        self.assertEqual((None, None), TickerDispatcher.get_trigger_levels(o))
+
+    def test_update_tickers(self):
+        d = TickerDispatcher()
+        o = self._maker_order()
+        ro = ThresholdRecoveryOrder("ADA/ETH", "ADA", 1000, "ETH", 0.32485131, -0.02)
+
+        d.add_order(o)
+        d.add_order(ro)
+
+        # prices within the thresholds
+        triggered = d.update_tickers({"BTC/USDT": {"ask": 1, "bid": 0.99},
+                                      "ADA/ETH": {"ask": ro.best_price, "bid": ro.best_price},
+                                      "ETH/BTC": {"ask": 0.1, "bid": 0.09}})
+        self.assertEqual([], triggered)
+
+        market_data = d.get_market_data(o)
+        self.assertEqual([{"ask": 1, "bid": 0.99}], market_data)
+
+        # taker price crossed the threshold
+        triggered = d.update_tickers({"BTC/USDT": {"ask": 1, "bid": 0.97}})
+        self.assertEqual([o], triggered)
+        self.assertIs(market_data, d.get_market_data(o))
+        self.assertEqual(0.97, market_data[0]["bid"])
+
+        # unchanged ticker is skipped
+        self.assertEqual([], d.update_tickers({"BTC/USDT": {"ask": 1, "bid": 0.97}}))
+
+        # maker price crossed the threshold
+        self.assertEqual([o], d.update_tickers({"BTC/USDT": {"ask": 0.985, "bid": 0.99}}))
+
+        triggered = d.update_tickers({"ADA/ETH": {"ask": ro.best_price, "bid": ro.best_price * (1 - 0.021)}})
+        self.assertEqual([ro], triggered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro.backtest import TickerStore, read_tickers_csv
+from tkgpro.backtest.ticker_store import convert_tickers_csv
+
+import unittest
+import tempfile
+import os
+
+import numpy as np
+
+
+class TickerStoreTestSuite(unittest.TestCase):
+
+    def test_from_csv(self):
+        store = TickerStore.from_csv("test_data/tickers.csv")
+
+        self.assertEqual(29, len(store))
+        self.assertEqual(3, store.snapshots_count)
+        self.assertEqual(10, len(store.symbols))
+        self.assertEqual("ETH/USDT", store.symbols[0])
+
+        self.assertEqual([0, 10, 20], store.snapshot_start.tolist())
+        self.assertEqual(1527000539980, store.snapshot_timestamp[0])
+
+        self.assertEqual(list(read_tickers_csv("test_data/tickers.csv")), list(store.snapshots()))
+        self.assertEqual(list(read_tickers_csv("test_data/tickers.csv")), list(store.snapshots(chunk_size=3)))
+
+    def test_save_open(self):
+        with tempfile.TemporaryDirectory() as path:
+            store = convert_tickers_csv("test_data/tickers.csv", path)
+            mmap_store = TickerStore.open(path)
+
+            self.assertIsInstance(mmap_store.ask, np.memmap)
+            self.assertEqual(store.symbols, mmap_store.symbols)
+            self.assertEqual(list(store.snapshots()), list(mmap_store.snapshots()))
+
+            # store saved without the index
+            for name, dtype in TickerStore.INDEX_COLUMNS:
+                os.remove(os.path.join(path, name + ".npy"))
+
+            store_no_index = TickerStore.open(path)
+            self.assertEqual(store.snapshot_start.tolist(), store_no_index.snapshot_start.tolist())
+            self.assertEqual(store.symbol_rows.tolist(), store_no_index.symbol_rows.tolist())
+
+    def test_slice_time(self):
+        store = TickerStore.from_csv("test_data/tickers.csv")
+        snapshots = list(store.snapshots())
+
+        sliced = store.slice_time(snapshots[1][0])
+        self.assertEqual(snapshots[1:], list(sliced.snapshots()))
+        self.assertTrue(np.shares_memory(sliced.ask, store.ask))
+
+        sliced = store.slice_time(snapshots[1][0], snapshots[2][0])
+        self.assertEqual([snapshots[1]], list(sliced.snapshots()))
+        self.assertEqual([1], sliced.symbol_rows_of("ETH/BTC").tolist())
+
+        self.assertEqual(0, len(store.slice_time(snapshots[2][0] + 1)))
+
+    def test_symbol(self):
+        store = TickerStore.from_csv("test_data/tickers.csv")
+
+        self.assertEqual([1, 11, 21], store.symbol_rows_of("ETH/BTC").tolist())
+        self.assertEqual(0, len(store.symbol_rows_of("XXX/YYY")))
+
+        columns = store.symbol_columns("ETH/BTC")
+        self.assertEqual([0.082923, 0.082923, 0.082921], columns["bid"].tolist())
+        self.assertEqual([1527000539980, 1527000541515, 1527000542996], columns["timestamp"].tolist())
+
+        market_data = list(store.market_data("ETH/BTC"))
+        self.assertEqual(3, len(market_data))
+
+        timestamp, data = market_data[0]
+        self.assertEqual(1527000539980, timestamp)
+        self.assertEqual([{"ask": 0.082975, "bid": 0.082923, "askVolume": 6.33, "bidVolume": 10.011,
+                           "timestamp": 1527000539980}], data)
+
+
+if __name__ == '__main__':
+    unittest.main()
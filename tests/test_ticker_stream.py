@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from .context import tkgpro
+from tkgpro import MakerStopLossOrder
+from tkgpro.backtest import read_tickers_csv
+from tkgpro.execution import TopOfBook, TickerStream, FakeTickerFeed
+
+import unittest
+import asyncio
+
+
+class TickerStreamTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_top_of_book(self):
+        book = TopOfBook(capacity=1)
+        book.update({"symbol": "ETH/BTC", "bid": 0.03, "ask": 0.031, "timestamp": 1000})
+        book.update({"symbol": "BTC/USDT", "bid": 1, "ask": 1.1})
+        book.update({"symbol": "ETH/BTC", "bid": 0.0305, "ask": None})  # ask is not changed
+
+        self.assertEqual(["ETH/BTC", "BTC/USDT"], book.symbols)
+        self.assertEqual({"bid": 0.0305, "ask": 0.031, "bidVolume": None, "askVolume": None, "timestamp": 1000},
+                         book.ticker("ETH/BTC"))
+        self.assertEqual([book.ticker("BTC/USDT")], book.market_data("BTC/USDT"))
+        self.assertEqual(2, book.versions[0])
+        self.assertIsNone(book.market_data("ADA/ETH"))
+
+    def test_drop_to_latest(self):
+        stream = TickerStream()
+        stream.push({"symbol": "ETH/BTC", "bid": 0.03, "ask": 0.031})
+        stream.push({"symbol": "ETH/BTC", "bid": 0.029})
+        stream.push({"symbol": "ETH/BTC", "bid": 0.028, "ask": None})
+        stream.push({"symbol": "BTC/USDT", "bid": 1, "ask": 1.1})
+
+        self.assertEqual(2, stream.pending)
+        self.assertEqual(["ETH/BTC", "BTC/USDT"], stream.drain())
+        self.assertEqual(0.028, stream.book.ticker("ETH/BTC")["bid"])
+        self.assertEqual(0.031, stream.book.ticker("ETH/BTC")["ask"])
+        self.assertEqual({"received": 4, "dropped": 2, "applied": 2, "pending": 0}, stream.get_stats())
+
+    def test_fake_feed(self):
+        snapshots = [(1, {"A/B": {"bid": 1, "ask": 2}, "C/D": {"bid": 3, "ask": 4}}),
+                     (2, {"A/B": {"bid": 1, "ask": 2}, "C/D": {"bid": 3.5, "ask": 4}})]
+
+        updates = list(FakeTickerFeed(snapshots))
+        self.assertEqual(["A/B", "C/D", "C/D"], [u["symbol"] for u in updates])
+        self.assertEqual(2, updates[2]["timestamp"])
+
+        self.assertEqual(len(list(FakeTickerFeed(read_tickers_csv("test_data/tickers.csv")))),
+                         sum(len(b) for b in FakeTickerFeed(read_tickers_csv("test_data/tickers.csv")).updates()))
+
+    def test_slow_consumer(self):
+        snapshots = [(i, {"ETH/BTC": {"bid": 0.03 - i * 0.0001, "ask": 0.031},
+                          "BTC/USDT": {"bid": 1 + i, "ask": 2 + i}}) for i in range(100)]
+
+        order = MakerStopLossOrder.create_from_start_amount("ETH/BTC", "ETH", 1, "BTC", 0.03,
+                                                            threshold_check_after_updates=0)
+        order.update_from_exchange({"status": "open", "filled": 0})
+
+        stream = TickerStream()
+        max_pending = list()
+
+        async def consumer():
+            updates = 0
+            while True:
+                max_pending.append(stream.pending)
+                symbols = await stream.get_updates()
+                if not symbols:
+                    return updates
+
+                updates += 1
+                if "ETH/BTC" in symbols and order.state == "maker":
+                    order.update_from_exchange({"status": "open", "filled": 0}, stream.book.market_data("ETH/BTC"))
+
+                await asyncio.sleep(0.001)  # slow consumer
+
+        async def run():
+            producer = asyncio.ensure_future(stream.consume(FakeTickerFeed(snapshots)))
+            updates = await consumer()
+            await producer
+            return updates
+
+        updates = self.loop.run_until_complete(run())
+
+        self.assertLess(updates, 100)
+        self.assertLessEqual(max(max_pending), 2)
+        self.assertEqual(200, stream.received)
+        self.assertGreater(stream.dropped, 0)
+        self.assertEqual(stream.received, stream.dropped + stream.applied)
+
+        self.assertEqual(101, stream.book.ticker("BTC/USDT")["ask"])  # latest price
+        self.assertEqual("taker", order.state)  # bid fell below the taker trigger
+
+    def test_without_current_loop(self):
+        # the stream is created outside of any event loop and bound to the loop which runs its coroutines
+        asyncio.set_event_loop(None)
+        stream = TickerStream()
+        snapshots = [(i, {"ETH/BTC": {"bid": 0.03, "ask": 0.031 + i * 0.001}}) for i in range(3)]
+
+        async def run():
+            producer = asyncio.create_task(stream.consume(FakeTickerFeed(snapshots)))
+            symbols = list()
+            while True:
+                updated = await stream.get_updates()
+                if not updated:
+                    break
+                symbols.extend(updated)
+            await producer
+            return symbols
+
+        self.assertIn("ETH/BTC", asyncio.run(run()))
+        self.assertAlmostEqual(0.033, stream.book.ticker("ETH/BTC")["ask"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,5 @@
-from .threshold_order import ThresholdRecoveryOrder
-from .threshold_order import MakerStopLossOrder
\ No newline at end of file
+from tkgpro.lazy_import import lazy_import
+
+lazy_import(__name__, {
+    "tkgpro.threshold_order": ["ThresholdRecoveryOrder", "MakerStopLossOrder"],
+})
@@ -0,0 +1,7 @@
+from tkgpro.lazy_import import lazy_import
+
+lazy_import(__name__, {
+    "tkgpro.backtest.replay": ["Replay", "SimpleFillModel", "read_tickers_csv"],
+    "tkgpro.backtest.ticker_store": ["TickerStore"],
+    "tkgpro.backtest.sweep": ["Sweep", "MakerStopLossFactory", "ThresholdRecoveryFactory", "parameter_grid"],
+})
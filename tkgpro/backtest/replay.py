@@ -0,0 +1,281 @@
+import csv
+
+from ztom import core
+from ztom import ActionOrder
+
+
+def read_tickers_csv(file_name: str):
+    """
+    Streams the tickers csv file (fetch_id,timestamp,symbol,ask,bid,askVolume,bidVolume) grouped into snapshots by
+    fetch_id. Rows of the same fetch_id should be consecutive.
+
+    :param file_name: path to csv file
+    :return: generator of (timestamp, tickers) where timestamp is the max timestamp of the snapshot's rows and
+    tickers is dict {symbol: {"ask": ask, "bid": bid, "askVolume": ask_volume, "bidVolume": bid_volume,
+    "timestamp": timestamp}}
+    """
+    with open(file_name, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        fields = {name: i for i, name in enumerate(header)}
+        i_fetch_id, i_timestamp, i_symbol = fields["fetch_id"], fields["timestamp"], fields["symbol"]
+        i_ask, i_bid = fields["ask"], fields["bid"]
+        i_ask_volume, i_bid_volume = fields.get("askVolume"), fields.get("bidVolume")
+
+        fetch_id = None
+        snapshot_timestamp = 0
+        tickers = dict()
+
+        for row in reader:
+            if row[i_fetch_id] != fetch_id:
+                if tickers:
+                    yield snapshot_timestamp, tickers
+                fetch_id = row[i_fetch_id]
+                snapshot_timestamp = 0
+                tickers = dict()
+
+            timestamp = int(row[i_timestamp])
+            if timestamp > snapshot_timestamp:
+                snapshot_timestamp = timestamp
+
+            tickers[row[i_symbol]] = {
+                "ask": float(row[i_ask]) if row[i_ask] else None,
+                "bid": float(row[i_bid]) if row[i_bid] else None,
+                "askVolume": float(row[i_ask_volume]) if i_ask_volume is not None and row[i_ask_volume] else None,
+                "bidVolume": float(row[i_bid_volume]) if i_bid_volume is not None and row[i_bid_volume] else None,
+                "timestamp": timestamp}
+
+        if tickers:
+            yield snapshot_timestamp, tickers
+
+
+class SimpleFillModel(object):
+    """
+    Simulated exchange for the trade orders of the replayed action orders.
+
+    - limit order is filled at its price when the opposite top of book price crosses it (bid >= price for sell, ask
+    <= price for buy orders) for the amount up to the top of book volume (whole remained amount if the ticker has no
+    volume)
+    - limit order on the best price of its side (ask >= price for sell, bid <= price for buy orders) is filled for
+    maker_fill_ratio of its amount on every update
+    - cancel request cancels the order with its current filled amount
+    """
+
+    def __init__(self, maker_fill_ratio: float = 0.0, use_volume: bool = True):
+        """
+        :param maker_fill_ratio: part of the order's amount filled on every update for the orders on the best price
+        :param use_volume: limit the taker fills by the askVolume/bidVolume of the ticker
+        """
+        self.maker_fill_ratio = maker_fill_ratio
+        self.use_volume = use_volume
+
+        self._orders = dict()  # id(trade_order) -> [filled, cost]
+
+    def _fill(self, trade_order, ticker):
+        filled, cost = self._orders.setdefault(id(trade_order), [0.0, 0.0])
+        remained = trade_order.amount - filled
+
+        if remained <= 0 or ticker is None:
+            return
+
+        price = trade_order.price
+        fill_amount = 0.0
+
+        if trade_order.side == "sell":
+            book_price, volume, own_book_price = ticker.get("bid"), ticker.get("bidVolume"), ticker.get("ask")
+            crossed = book_price is not None and book_price >= price
+            on_best_price = own_book_price is not None and own_book_price >= price
+        else:
+            book_price, volume, own_book_price = ticker.get("ask"), ticker.get("askVolume"), ticker.get("bid")
+            crossed = book_price is not None and 0 < book_price <= price
+            on_best_price = own_book_price is not None and own_book_price <= price
+
+        if crossed:
+            fill_amount = min(remained, volume) if self.use_volume and volume else remained
+        elif on_best_price and self.maker_fill_ratio > 0:
+            fill_amount = min(remained, trade_order.amount * self.maker_fill_ratio)
+
+        if fill_amount > 0:
+            self._orders[id(trade_order)] = [filled + fill_amount, cost + fill_amount * price]
+
+    def _resp(self, trade_order, status=None):
+        filled, cost = self._orders.get(id(trade_order), (0.0, 0.0))
+
+        if status is None:
+            status = "closed" if filled >= trade_order.amount else "open"
+
+        if status != "open":
+            self._orders.pop(id(trade_order), None)
+
+        return {"status": status, "filled": filled, "cost": cost}
+
+    def create_order(self, trade_order, ticker=None):
+        self._fill(trade_order, ticker)
+        return self._resp(trade_order)
+
+    def fetch_order(self, trade_order, ticker=None):
+        self._fill(trade_order, ticker)
+        return self._resp(trade_order)
+
+    def cancel_order(self, trade_order, ticker=None):
+        return self._resp(trade_order, "canceled")
+
+
+class Replay(object):
+    """
+    Replays the tickers snapshots through the action orders (ThresholdRecoveryOrder, MakerStopLossOrder) the same way
+    as the ActionOrderManager does: every snapshot is one update cycle of every open order. The orders' commands are
+    executed on the fill model and the order gets the ticker of its symbol as market data.
+
+    Usage:
+        replay = Replay(SimpleFillModel())
+        replay.add_order(order)
+        replay.run(read_tickers_csv("test_data/tickers.csv"))
+        replay.report()
+    """
+
+    def __init__(self, fill_model: SimpleFillModel = None):
+        self.fill_model = fill_model if fill_model is not None else SimpleFillModel()
+
+        self.orders = list()
+        self.stats = dict()  # order.id -> dict of order stats
+
+        self.tickers = dict()  # latest tickers
+        self.timestamp = None  # timestamp of the current snapshot
+        self.snapshots = 0
+
+        self._open_orders = list()
+
+    def add_order(self, order: ActionOrder, target_price: float = None):
+        """
+        :param order: action order
+        :param target_price: price to calculate the slippage against. Default is the order's best_price (for
+        ThresholdRecoveryOrder) or price.
+        """
+        if target_price is None:
+            target_price = getattr(order, "best_price", None) or order.price
+
+        self.orders.append(order)
+        self._open_orders.append(order)
+        self.stats[order.id] = {"target_price": target_price,
+                                "start_timestamp": None,
+                                "close_timestamp": None,
+                                "updates": 0,
+                                "trade_orders": 1,
+                                "transitions": list()}
+
+    def _proceed_order(self, order: ActionOrder):
+        stats = self.stats[order.id]
+        if stats["start_timestamp"] is None:
+            stats["start_timestamp"] = self.timestamp
+
+        trade_order = order.active_trade_order
+        ticker = self.tickers.get(order.symbol)
+        command = order.order_command if order.order_command is not None else ""
+
+        if trade_order is None:
+            return
+
+        if command.startswith("new"):
+            resp = self.fill_model.create_order(trade_order, ticker)
+        elif command.startswith("cancel"):
+            resp = self.fill_model.cancel_order(trade_order, ticker)
+        else:
+            resp = self.fill_model.fetch_order(trade_order, ticker)
+
+        state = order.state
+        order.update_from_exchange(resp, [ticker] if ticker is not None else None)
+        stats["updates"] += 1
+
+        if order.state != state:
+            stats["transitions"].append((self.timestamp, state, order.state))
+
+        if order.active_trade_order is not None and order.active_trade_order is not trade_order:
+            stats["trade_orders"] += 1
+
+        if order.status == "closed":
+            stats["close_timestamp"] = self.timestamp
+
+    def proceed(self, timestamp, tickers: dict):
+        """
+        runs one update cycle of all open orders for the tickers snapshot
+
+        :param timestamp: snapshot timestamp
+        :param tickers: dict of tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        """
+        self.timestamp = timestamp
+        self.tickers.update(tickers)
+        self.snapshots += 1
+
+        for order in self._open_orders:
+            self._proceed_order(order)
+
+        if any(o.status == "closed" for o in self._open_orders):
+            self._open_orders = [o for o in self._open_orders if o.status != "closed"]
+
+    def run(self, snapshots, stop_when_closed: bool = True):
+        """
+        :param snapshots: iterable of (timestamp, tickers) as from read_tickers_csv
+        :param stop_when_closed: stop the replay when all orders are closed
+        :return: report()
+        """
+        for timestamp, tickers in snapshots:
+            self.proceed(timestamp, tickers)
+
+            if stop_when_closed and not self._open_orders:
+                break
+
+        return self.report()
+
+    @staticmethod
+    def _filled_price(order: ActionOrder):
+        if not order.filled_start_amount or not order.filled_dest_amount:
+            return 0.0
+
+        if order.side == "buy":
+            return order.filled_start_amount / order.filled_dest_amount
+
+        return order.filled_dest_amount / order.filled_start_amount
+
+    def report(self):
+        """
+        :return: list of dicts with the replay results of every order: status, state, filled, filled_price,
+        target_price, slippage (relative difference of filled price and target price, negative if filled price is
+        worse), time_to_fill (in timestamp units, None for not closed orders), number of updates and trade orders,
+        list of state transitions (timestamp, from_state, to_state) and tags
+        """
+        report = list()
+
+        for order in self.orders:
+            stats = self.stats[order.id]
+            filled_price = self._filled_price(order)
+
+            slippage = None
+            if filled_price > 0 and stats["target_price"]:
+                slippage = core.relative_target_price_difference(order.side, stats["target_price"], filled_price)
+
+            time_to_fill = None
+            if stats["close_timestamp"] is not None and stats["start_timestamp"] is not None:
+                time_to_fill = stats["close_timestamp"] - stats["start_timestamp"]
+
+            report.append({"id": order.id,
+                           "symbol": order.symbol,
+                           "side": order.side,
+                           "status": order.status,
+                           "state": order.state,
+                           "filled": order.filled,
+                           "filled_start_amount": order.filled_start_amount,
+                           "filled_dest_amount": order.filled_dest_amount,
+                           "filled_price": filled_price,
+                           "target_price": stats["target_price"],
+                           "slippage": slippage,
+                           "time_to_fill": time_to_fill,
+                           "updates": stats["updates"],
+                           "trade_orders": stats["trade_orders"],
+                           "transitions": list(stats["transitions"]),
+                           "tags": list(order.tags)})
+
+        return report
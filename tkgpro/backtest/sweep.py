@@ -0,0 +1,220 @@
+import csv
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from tkgpro.threshold_order.maker_stop_loss import MakerStopLossOrder
+from tkgpro.threshold_order.threshold_order import ThresholdRecoveryOrder
+from tkgpro.backtest.replay import Replay, SimpleFillModel
+from tkgpro.backtest.ticker_store import TickerStore
+
+
+def parameter_grid(**parameters):
+    """
+    :param parameters: parameter name -> list of values
+    :return: list of dicts with all the combinations of the parameters values
+
+    parameter_grid(maker_price_threshold=[-0.005, -0.01], force_taker_updates=[100, 500]) ->
+        [{"maker_price_threshold": -0.005, "force_taker_updates": 100}, ...]
+    """
+    names = sorted(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+
+def _target_amount(symbol: str, start_currency: str, start_amount: float, ticker: dict):
+    """
+    target amount of dest currency for the start amount traded on the maker price of the ticker
+    """
+    if symbol.split("/")[0] == start_currency:
+        return start_amount * ticker["ask"]  # sell order: maker price is ask
+
+    return start_amount / ticker["bid"]  # buy order: maker price is bid
+
+
+class MakerStopLossFactory(object):
+    """
+    Creates MakerStopLossOrder via create_from_start_amount for the sweep parameters. If target_amount is not set it's
+    taken for the maker price of the first ticker of the order's symbol in the shard.
+    """
+
+    def __init__(self, symbol: str, start_currency: str, start_amount: float, dest_currency: str,
+                 target_amount: float = None):
+        self.symbol = symbol
+        self.start_currency = start_currency
+        self.start_amount = start_amount
+        self.dest_currency = dest_currency
+        self.target_amount = target_amount
+
+    def __call__(self, parameters: dict, ticker: dict = None):
+        target_amount = self.target_amount
+        if target_amount is None:
+            target_amount = _target_amount(self.symbol, self.start_currency, self.start_amount, ticker)
+
+        return MakerStopLossOrder.create_from_start_amount(self.symbol, self.start_currency, self.start_amount,
+                                                           self.dest_currency, target_amount, **parameters)
+
+
+class ThresholdRecoveryFactory(MakerStopLossFactory):
+    """
+    Creates ThresholdRecoveryOrder for the sweep parameters (taker_price_threshold, max_best_amount_order_updates,
+    max_order_updates, cancel_threshold).
+    """
+
+    def __call__(self, parameters: dict, ticker: dict = None):
+        target_amount = self.target_amount
+        if target_amount is None:
+            target_amount = _target_amount(self.symbol, self.start_currency, self.start_amount, ticker)
+
+        return ThresholdRecoveryOrder(self.symbol, self.start_currency, self.start_amount, self.dest_currency,
+                                      target_amount, **parameters)
+
+
+_stores = dict()  # path -> TickerStore opened by the worker process
+
+
+def _get_store(path: str):
+    store = _stores.get(path)
+    if store is None:
+        store = TickerStore.open(path, mmap=True)
+        _stores[path] = store
+    return store
+
+
+def run_task(order_factory, parameters_list: list, shard: str, maker_fill_ratio: float = 0.0):
+    """
+    replays one shard of ticker data for the list of parameters sets. Every parameters set gets its own order, all the
+    orders are replayed in a single pass over the shard.
+
+    :return: list of report rows of tkgpro.backtest.Replay extended with the "shard" and the parameters
+    """
+    store = _get_store(shard)
+    snapshots = store.snapshots()
+
+    replay = Replay(SimpleFillModel(maker_fill_ratio=maker_fill_ratio))
+    orders_parameters = dict()
+
+    # skip the snapshots till the first ticker of the order's symbol
+    for timestamp, tickers in snapshots:
+        ticker = tickers.get(order_factory.symbol)
+        if ticker is None:
+            continue
+
+        for parameters in parameters_list:
+            order = order_factory(parameters, ticker)
+            replay.add_order(order)
+            orders_parameters[order.id] = parameters
+
+        replay.proceed(timestamp, tickers)
+        break
+
+    replay.run(snapshots)
+
+    rows = list()
+    for row in replay.report():
+        row["shard"] = shard
+        row.update(orders_parameters[row["id"]])
+        rows.append(row)
+
+    return rows
+
+
+class Sweep(object):
+    """
+    Runs the grid of order parameters over ticker history files in a ProcessPoolExecutor.
+
+    Ticker csv files are parsed once in the main process into the TickerStore saved to the work directory, the
+    workers memory-map the stores. Tasks are (chunk of parameters sets x ticker file shard).
+
+    Usage:
+        sweep = Sweep(MakerStopLossFactory("BTC/USDT", "BTC", 1, "USDT"),
+                      parameter_grid(maker_price_threshold=[-0.005, -0.01], taker_price_threshold=[-0.01, -0.02]),
+                      ["tickers_day1.csv", "tickers_day2.csv"])
+        results = sweep.run()
+    """
+
+    def __init__(self, order_factory, parameters_list: list, ticker_files: list, work_dir: str = None,
+                 max_workers: int = None, parameters_per_task: int = 50, maker_fill_ratio: float = 0.0):
+        """
+        :param order_factory: picklable callable (parameters, ticker) -> order, e.g. MakerStopLossFactory
+        :param parameters_list: list of order parameters dicts, e.g. from parameter_grid()
+        :param ticker_files: tickers csv files or directories of saved TickerStore
+        :param work_dir: directory for the converted ticker stores. Temporary directory if not set.
+        :param max_workers: number of worker processes
+        :param parameters_per_task: number of parameters sets replayed by one task
+        :param maker_fill_ratio: maker_fill_ratio of the SimpleFillModel
+        """
+        self.order_factory = order_factory
+        self.parameters_list = parameters_list
+        self.ticker_files = ticker_files
+        self.work_dir = work_dir
+        self.max_workers = max_workers
+        self.parameters_per_task = parameters_per_task
+        self.maker_fill_ratio = maker_fill_ratio
+
+        self.results = list()
+
+    def prepare_shards(self, work_dir: str):
+        """
+        converts the tickers csv files to the TickerStore directories
+
+        :return: list of TickerStore directories
+        """
+        shards = list()
+        for i, file_name in enumerate(self.ticker_files):
+            if os.path.isdir(file_name):
+                shards.append(file_name)
+                continue
+
+            path = os.path.join(work_dir, "{}_{}".format(i, os.path.splitext(os.path.basename(file_name))[0]))
+            TickerStore.from_csv(file_name).save(path)
+            shards.append(path)
+
+        return shards
+
+    def tasks(self, shards: list):
+        """
+        :return: list of (parameters list, shard) tasks
+        """
+        chunks = [self.parameters_list[i:i + self.parameters_per_task]
+                  for i in range(0, len(self.parameters_list), self.parameters_per_task)]
+
+        return [(chunk, shard) for shard in shards for chunk in chunks]
+
+    def _run(self, work_dir: str):
+        shards = self.prepare_shards(work_dir)
+        self.results = list()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(run_task, self.order_factory, parameters, shard, self.maker_fill_ratio)
+                       for parameters, shard in self.tasks(shards)]
+
+            for future in futures:
+                self.results.extend(future.result())
+
+        return self.results
+
+    def run(self):
+        """
+        :return: list of result rows: report of tkgpro.backtest.Replay for every order extended with the "shard" and
+        the order's parameters
+        """
+        if self.work_dir is not None:
+            return self._run(self.work_dir)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            return self._run(work_dir)
+
+    def save_csv(self, file_name: str, columns: list = None):
+        """
+        saves the results table to csv. Default columns are the parameters and the numeric results.
+        """
+        if columns is None:
+            parameters = sorted({name for p in self.parameters_list for name in p})
+            columns = ["shard"] + parameters + ["status", "state", "filled", "filled_price", "target_price",
+                                                "slippage", "time_to_fill", "updates", "trade_orders"]
+
+        with open(file_name, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.results)
@@ -0,0 +1,306 @@
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+
+class TickerStore(object):
+    """
+    Ticker history stored as columnar numpy arrays (one row per ticker of the tickers csv). Saved as a directory of
+    .npy files which can be opened memory-mapped, so several processes share the parsed data through the OS page cache
+    instead of parsing the csv in every process.
+
+    Besides the columns the store keeps the snapshots index (first row and timestamp of every fetch_id) for the time
+    range slicing and the symbols index (rows sorted by symbol) for the symbol selection.
+
+    Convert the csv: python3 -m tkgpro.backtest.ticker_store tickers.csv tickers_store_dir
+    """
+
+    COLUMNS = (("fetch_id", np.int64),
+               ("timestamp", np.int64),
+               ("symbol_id", np.int32),
+               ("ask", np.float64),
+               ("bid", np.float64),
+               ("ask_volume", np.float64),
+               ("bid_volume", np.float64))
+
+    INDEX_COLUMNS = (("snapshot_start", np.int64),  # first row of the snapshot
+                     ("snapshot_timestamp", np.int64),  # max timestamp of the snapshot's rows
+                     ("symbol_rows", np.int64),  # rows sorted by symbol_id
+                     ("symbol_offsets", np.int64))  # start of the symbol's rows in symbol_rows
+
+    SYMBOLS_FILE = "symbols.json"
+
+    def __init__(self, symbols: list, columns: dict, index: dict = None):
+        """
+        :param symbols: list of symbols, symbol_id is the index in the list
+        :param columns: dict of arrays for the COLUMNS names
+        :param index: dict of arrays for the INDEX_COLUMNS names. Built from the columns if not set.
+        """
+        self.symbols = symbols
+        self.columns = columns
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+
+        for name, dtype in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+        self.index = index if index is not None else self._build_index()
+
+        for name, dtype in self.INDEX_COLUMNS:
+            setattr(self, name, self.index[name])
+
+    def _build_index(self):
+        size = len(self.fetch_id)
+
+        snapshot_start = np.concatenate(([0], np.flatnonzero(np.diff(self.fetch_id)) + 1)).astype(np.int64) \
+            if size > 0 else np.zeros(0, dtype=np.int64)
+
+        snapshot_timestamp = np.maximum.reduceat(self.timestamp, snapshot_start).astype(np.int64) \
+            if size > 0 else np.zeros(0, dtype=np.int64)
+
+        symbol_rows = np.argsort(self.symbol_id, kind="stable").astype(np.int64)
+        symbol_offsets = np.searchsorted(self.symbol_id[symbol_rows], np.arange(len(self.symbols) + 1)) \
+            .astype(np.int64)
+
+        return {"snapshot_start": snapshot_start,
+                "snapshot_timestamp": snapshot_timestamp,
+                "symbol_rows": symbol_rows,
+                "symbol_offsets": symbol_offsets}
+
+    def __len__(self):
+        return len(self.fetch_id)
+
+    @property
+    def snapshots_count(self):
+        return len(self.snapshot_start)
+
+    @classmethod
+    def from_csv(cls, file_name: str):
+        """
+        parses the tickers csv file (fetch_id,timestamp,symbol,ask,bid,askVolume,bidVolume). Rows of the same
+        fetch_id should be consecutive.
+        """
+        symbols = list()
+        symbol_ids = dict()
+
+        fetch_ids, timestamps, row_symbol_ids = list(), list(), list()
+        asks, bids, ask_volumes, bid_volumes = list(), list(), list(), list()
+
+        with open(file_name, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            fields = {name: i for i, name in enumerate(header or [])}
+
+            i_fetch_id, i_timestamp, i_symbol = fields["fetch_id"], fields["timestamp"], fields["symbol"]
+            i_ask, i_bid = fields["ask"], fields["bid"]
+            i_ask_volume, i_bid_volume = fields.get("askVolume"), fields.get("bidVolume")
+
+            for row in reader:
+                symbol = row[i_symbol]
+                symbol_id = symbol_ids.get(symbol)
+                if symbol_id is None:
+                    symbol_id = len(symbols)
+                    symbols.append(symbol)
+                    symbol_ids[symbol] = symbol_id
+
+                fetch_ids.append(row[i_fetch_id])
+                timestamps.append(row[i_timestamp])
+                row_symbol_ids.append(symbol_id)
+                asks.append(row[i_ask] or "nan")
+                bids.append(row[i_bid] or "nan")
+                ask_volumes.append(row[i_ask_volume] or "nan" if i_ask_volume is not None else "nan")
+                bid_volumes.append(row[i_bid_volume] or "nan" if i_bid_volume is not None else "nan")
+
+        # numpy converts the lists of strings in C
+        columns = {"fetch_id": np.array(fetch_ids).astype(np.int64),
+                   "timestamp": np.array(timestamps).astype(np.int64),
+                   "symbol_id": np.array(row_symbol_ids, dtype=np.int32),
+                   "ask": np.array(asks).astype(np.float64),
+                   "bid": np.array(bids).astype(np.float64),
+                   "ask_volume": np.array(ask_volumes).astype(np.float64),
+                   "bid_volume": np.array(bid_volumes).astype(np.float64)}
+
+        if not fetch_ids:
+            columns = {name: np.zeros(0, dtype=dtype) for name, dtype in cls.COLUMNS}
+
+        return cls(symbols, columns)
+
+    def save(self, path: str):
+        """
+        saves the store to the directory
+        """
+        os.makedirs(path, exist_ok=True)
+
+        for name, dtype in self.COLUMNS:
+            np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(self.columns[name], dtype=dtype))
+
+        for name, dtype in self.INDEX_COLUMNS:
+            np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(self.index[name], dtype=dtype))
+
+        with open(os.path.join(path, self.SYMBOLS_FILE), "w") as f:
+            json.dump(self.symbols, f)
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True):
+        """
+        opens the store saved to the directory
+
+        :param path: directory of the store
+        :param mmap: memory-map the arrays (read only) instead of reading them into memory
+        """
+        with open(os.path.join(path, cls.SYMBOLS_FILE)) as f:
+            symbols = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+                   for name, dtype in cls.COLUMNS}
+
+        index = None
+        if all(os.path.exists(os.path.join(path, name + ".npy")) for name, dtype in cls.INDEX_COLUMNS):
+            index = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+                     for name, dtype in cls.INDEX_COLUMNS}
+
+        return cls(symbols, columns, index)
+
+    def slice_snapshots(self, start: int, end: int):
+        """
+        :return: store of the snapshots from start to end (exclusive). Columns are views of this store's arrays.
+        """
+        snapshots_count = self.snapshots_count
+        start, end = max(0, min(start, snapshots_count)), max(0, min(end, snapshots_count))
+        end = max(start, end)
+
+        row_start = int(self.snapshot_start[start]) if start < snapshots_count else len(self)
+        row_end = int(self.snapshot_start[end]) if end < snapshots_count else len(self)
+
+        columns = {name: self.columns[name][row_start:row_end] for name, dtype in self.COLUMNS}
+
+        index = {"snapshot_start": self.snapshot_start[start:end] - row_start,
+                 "snapshot_timestamp": self.snapshot_timestamp[start:end]}
+
+        if row_start == 0 and row_end == len(self):
+            index["symbol_rows"], index["symbol_offsets"] = self.symbol_rows, self.symbol_offsets
+        else:
+            rows = self.symbol_rows[(self.symbol_rows >= row_start) & (self.symbol_rows < row_end)] - row_start
+            index["symbol_rows"] = rows
+            index["symbol_offsets"] = np.searchsorted(columns["symbol_id"][rows],
+                                                      np.arange(len(self.symbols) + 1)).astype(np.int64)
+
+        return self.__class__(self.symbols, columns, index)
+
+    def slice_time(self, start_timestamp=None, end_timestamp=None):
+        """
+        :param start_timestamp: first snapshot timestamp (inclusive)
+        :param end_timestamp: last snapshot timestamp (exclusive)
+        :return: store of the snapshots within the time range. Snapshot timestamps should be non decreasing. Columns
+        are views of this store's arrays.
+        """
+        start = 0 if start_timestamp is None else int(np.searchsorted(self.snapshot_timestamp, start_timestamp,
+                                                                      side="left"))
+        end = self.snapshots_count if end_timestamp is None else int(np.searchsorted(self.snapshot_timestamp,
+                                                                                     end_timestamp, side="left"))
+        return self.slice_snapshots(start, end)
+
+    def symbol_rows_of(self, symbol: str):
+        """
+        :return: rows of the symbol in the time order (view of the symbols index)
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return np.zeros(0, dtype=np.int64)
+
+        return self.symbol_rows[self.symbol_offsets[symbol_id]:self.symbol_offsets[symbol_id + 1]]
+
+    def symbol_columns(self, symbol: str):
+        """
+        :return: dict of columns of the symbol's rows (only the symbol's rows are copied)
+        """
+        rows = self.symbol_rows_of(symbol)
+        return {name: self.columns[name][rows] for name, dtype in self.COLUMNS}
+
+    def ticker(self, row: int):
+        """
+        :return: ticker dict of the row
+        """
+        ask, bid = float(self.ask[row]), float(self.bid[row])
+        ask_volume, bid_volume = float(self.ask_volume[row]), float(self.bid_volume[row])
+
+        return {"ask": ask if ask == ask else None,
+                "bid": bid if bid == bid else None,
+                "askVolume": ask_volume if ask_volume == ask_volume else None,
+                "bidVolume": bid_volume if bid_volume == bid_volume else None,
+                "timestamp": int(self.timestamp[row])}
+
+    def market_data(self, symbol: str):
+        """
+        :return: generator of (timestamp, market_data) for the symbol's tickers, where market_data is [ticker] as
+        used by update_from_exchange of the threshold orders
+        """
+        for row in self.symbol_rows_of(symbol).tolist():
+            ticker = self.ticker(row)
+            yield ticker["timestamp"], [ticker]
+
+    def snapshots(self, chunk_size: int = 65536):
+        """
+        :return: generator of tickers snapshots (timestamp, tickers) grouped by fetch_id in the same format as
+        tkgpro.backtest.read_tickers_csv
+        """
+        symbols = self.symbols
+        size = len(self)
+        if size == 0:
+            return
+
+        starts = self.snapshot_start.tolist()
+        ends = starts[1:] + [size]
+
+        chunk_start, chunk_end = 0, 0
+        chunk = None
+
+        for start, end in zip(starts, ends):
+            # convert the columns to python lists by chunks of rows
+            if end > chunk_end:
+                chunk_start, chunk_end = start, max(end, start + chunk_size)
+                chunk = [self.columns[name][chunk_start:chunk_end].tolist()
+                         for name in ("timestamp", "symbol_id", "ask", "bid", "ask_volume", "bid_volume")]
+
+            timestamps, symbol_ids, asks, bids, ask_volumes, bid_volumes = chunk
+            tickers = dict()
+            snapshot_timestamp = 0
+
+            for i in range(start - chunk_start, end - chunk_start):
+                timestamp = timestamps[i]
+                if timestamp > snapshot_timestamp:
+                    snapshot_timestamp = timestamp
+
+                ask, bid, ask_volume, bid_volume = asks[i], bids[i], ask_volumes[i], bid_volumes[i]
+                tickers[symbols[symbol_ids[i]]] = {
+                    "ask": ask if ask == ask else None,
+                    "bid": bid if bid == bid else None,
+                    "askVolume": ask_volume if ask_volume == ask_volume else None,
+                    "bidVolume": bid_volume if bid_volume == bid_volume else None,
+                    "timestamp": timestamp}
+
+            yield snapshot_timestamp, tickers
+
+
+def convert_tickers_csv(file_name: str, path: str):
+    """
+    converts the tickers csv file to the TickerStore directory
+
+    :return: TickerStore
+    """
+    store = TickerStore.from_csv(file_name)
+    store.save(path)
+    return store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m tkgpro.backtest.ticker_store <tickers.csv> <store directory>")
+        sys.exit(1)
+
+    store = convert_tickers_csv(sys.argv[1], sys.argv[2])
+    print("Converted {} tickers, {} snapshots, {} symbols".format(len(store), store.snapshots_count,
+                                                                  len(store.symbols)))
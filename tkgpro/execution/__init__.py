@@ -0,0 +1,10 @@
+from tkgpro.lazy_import import lazy_import
+
+lazy_import(__name__, {
+    "tkgpro.execution.async_driver": ["AsyncOrderDriver"],
+    "tkgpro.execution.fake_exchange": ["FakeAsyncExchange", "FakeExchange", "DelayedExchange"],
+    "tkgpro.execution.ticker_coalescer": ["TickerCoalescer"],
+    "tkgpro.execution.check_scheduler": ["CheckScheduler"],
+    "tkgpro.execution.ticker_stream": ["TopOfBook", "TickerStream", "FakeTickerFeed"],
+    "tkgpro.execution.order_executor": ["ThreadPoolOrderExecutor"],
+})
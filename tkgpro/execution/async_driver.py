@@ -0,0 +1,248 @@
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING
+
+from tkgpro.threshold_order.order_command import OrderCommand, parse_order_command
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class _RequestBatcher(object):
+    """
+    Collects the requests made during the batch window (or one event loop iteration) and executes them by a single
+    batch call. Requests for the same key share one future.
+    """
+
+    def __init__(self, batch_call, batch_window: float = 0.0):
+        """
+        :param batch_call: coroutine function (list of keys) -> dict {key: result}
+        :param batch_window: time in seconds to collect the requests before the batch call
+        """
+        self.batch_call = batch_call
+        self.batch_window = batch_window
+
+        self.requests = 0  # number of requested keys
+        self.batches = 0  # number of batch calls
+
+        self._pending = dict()  # key -> future of the next batch
+        self._flush_scheduled = False
+
+    def get(self, key):
+        """
+        :return: future of the key's result
+        """
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+
+        future = self._pending.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._pending[key] = future
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_later(self.batch_window, lambda: loop.create_task(self._flush()))
+
+        return future
+
+    async def _flush(self):
+        pending, self._pending = self._pending, dict()
+        self._flush_scheduled = False
+
+        if not pending:
+            return
+
+        self.batches += 1
+        try:
+            results = await self.batch_call(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class AsyncOrderDriver(object):
+    """
+    Runs the action orders (ThresholdRecoveryOrder, MakerStopLossOrder) concurrently on the asyncio event loop. Every
+    order is proceeded by its own coroutine which executes the order's commands on the exchange and updates the order
+    from the response, so a slow response blocks only its own order.
+
+    Requests are coalesced:
+    - tickers requested by the orders' commands during the batch window are fetched by one fetch_tickers call for
+    the union of symbols, fetched tickers are reused for ticker_ttl seconds
+    - if the exchange implements fetch_orders(trade_orders), the status requests of the batch window are sent as
+    one batch call
+
+    The exchange is an object with coroutine methods fetch_tickers(symbols), create_order(trade_order),
+    fetch_order(trade_order), cancel_order(trade_order) and optional fetch_orders(trade_orders), returning the ccxt
+    like responses for update_from_exchange (see tkgpro.execution.FakeAsyncExchange).
+
+    Failed request of the order is repeated on the order's next update (as in ThreadPoolOrderExecutor), the order
+    which requests failed more than max_retries times in a row is moved to failed_orders.
+
+    Usage:
+        driver = AsyncOrderDriver(exchange)
+        driver.add_order(order)
+        asyncio.run(driver.run())
+    """
+
+    def __init__(self, exchange, poll_interval: float = 0.0, ticker_ttl: float = 0.0, batch_window: float = 0.0,
+                 max_concurrent_requests: int = 100, max_retries: int = 5, max_errors: int = 1000,
+                 on_order_removed=None):
+        """
+        :param exchange: async exchange
+        :param poll_interval: delay between the order's updates in seconds
+        :param ticker_ttl: time in seconds to reuse the fetched ticker
+        :param batch_window: time in seconds to collect the tickers and status requests for one batch call. If 0 the
+        requests made during one event loop iteration are batched.
+        :param max_concurrent_requests: max number of concurrent create/fetch/cancel requests
+        :param max_retries: number of the consecutive failed requests of the order after which the order is moved to
+        the failed_orders
+        :param max_errors: number of the latest errors kept in errors
+        :param on_order_removed: callable(order) called for the order moved to the failed_orders (removed without being
+        closed), e.g. order_instrumentation.remove_order
+        """
+        self.exchange = exchange
+        self.poll_interval = poll_interval
+        self.ticker_ttl = ticker_ttl
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_retries = max_retries
+        self.on_order_removed = on_order_removed
+
+        self.orders = list()
+        self.closed_orders = list()
+        self.failed_orders = list()  # orders which requests failed more than max_retries times in a row
+        self.errors = deque(maxlen=max_errors)  # (order.id, exception) of the latest failed requests
+
+        self._tickers_cache = dict()  # symbol -> (time, ticker)
+        self._tickers = _RequestBatcher(self._fetch_tickers, batch_window)
+        self._statuses = _RequestBatcher(self._fetch_orders, batch_window) \
+            if callable(getattr(exchange, "fetch_orders", None)) else None
+        self._semaphore = None
+
+    def add_order(self, order: "ActionOrder"):
+        self.orders.append(order)
+
+    async def _fetch_tickers(self, symbols: list):
+        tickers = await self.exchange.fetch_tickers(symbols)
+
+        now = asyncio.get_running_loop().time()
+        for symbol, ticker in tickers.items():
+            self._tickers_cache[symbol] = (now, ticker)
+
+        return tickers
+
+    def _get_semaphore(self):
+        # created on the first request in the running loop, so the request coroutines can be used without run()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._semaphore
+
+    async def _fetch_orders(self, trade_orders: list):
+        async with self._get_semaphore():
+            resps = await self.exchange.fetch_orders(trade_orders)
+
+        return dict(zip(trade_orders, resps))
+
+    async def get_ticker(self, symbol: str):
+        """
+        :return: ticker of the symbol, coalesced with the other orders' requests
+        """
+        cached = self._tickers_cache.get(symbol)
+        if cached is not None and asyncio.get_running_loop().time() - cached[0] <= self.ticker_ttl:
+            return cached[1]
+
+        return await self._tickers.get(symbol)
+
+    async def _execute_command(self, kind: str, trade_order):
+        if kind == OrderCommand.NEW:
+            async with self._get_semaphore():
+                return await self.exchange.create_order(trade_order)
+
+        if kind == OrderCommand.CANCEL:
+            async with self._get_semaphore():
+                return await self.exchange.cancel_order(trade_order)
+
+        if self._statuses is not None:
+            return await self._statuses.get(trade_order)
+
+        async with self._get_semaphore():
+            return await self.exchange.fetch_order(trade_order)
+
+    async def proceed_order(self, order: "ActionOrder"):
+        """
+        one update of the order: executes the order's command and updates the order from the exchange response
+        """
+        trade_order = order.active_trade_order
+        if trade_order is None:
+            return
+
+        kind, symbol = parse_order_command(order.order_command)
+
+        if symbol is not None:
+            resp, ticker = await asyncio.gather(self._execute_command(kind, trade_order), self.get_ticker(symbol))
+        else:
+            resp, ticker = await self._execute_command(kind, trade_order), None
+
+        order.update_from_exchange(resp, [ticker] if ticker is not None else None)
+
+    async def run_order(self, order: "ActionOrder"):
+        """
+        proceeds the order till it's closed or its requests failed more than max_retries times in a row
+        """
+        failures = 0
+        while order.status != "closed" and order.active_trade_order is not None:
+            try:
+                await self.proceed_order(order)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                self.errors.append((order.id, e))
+                failures += 1
+
+                if failures > self.max_retries:
+                    self.failed_orders.append(order)
+                    if self.on_order_removed is not None:
+                        self.on_order_removed(order)
+                    return
+            else:
+                failures = 0
+
+            await asyncio.sleep(self.poll_interval)
+
+        self.closed_orders.append(order)
+
+    async def run(self):
+        """
+        runs all added orders till they are closed or failed. If run is cancelled (or fails) the orders' tasks are
+        cancelled and awaited.
+        """
+        orders, self.orders = self.orders, list()
+        tasks = [asyncio.create_task(self.run_order(order)) for order in orders]
+
+        try:
+            await asyncio.gather(*tasks)
+
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def get_stats(self):
+        """
+        :return: dict of requests counters
+        """
+        return {"errors": len(self.errors),
+                "tickers_requests": self._tickers.requests,
+                "tickers_fetches": self._tickers.batches,
+                "status_requests": self._statuses.requests if self._statuses is not None else 0,
+                "status_fetches": self._statuses.batches if self._statuses is not None else 0}
@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class CheckScheduler(object):
+    """
+    Priority queue of the orders' pending updates ordered by the due time. The due time of the order is set from its
+    next_check_delay (suggested by the threshold orders from the distance to the trigger price and the volatility),
+    so the orders far from the trigger are updated rarely and the orders near the trigger - often.
+
+    Usage within the manager's loop:
+        scheduler.schedule(order)
+        ...
+        for order in scheduler.pop_due():
+            # update the order
+            scheduler.schedule(order)
+    """
+
+    def __init__(self, default_delay: float = 1.0, clock=time.time):
+        """
+        :param default_delay: delay for the orders without next_check_delay
+        :param clock: function returning the current time in seconds
+        """
+        self.default_delay = default_delay
+        self.clock = clock
+
+        self.scheduled = 0  # number of schedule() calls
+        self.popped = 0  # number of orders returned by pop_due()
+
+        self._heap = list()  # [due_time, seq, order]
+        self._entries = dict()  # order.id -> heap entry
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, order: "ActionOrder"):
+        return order.id in self._entries
+
+    def schedule(self, order: "ActionOrder", delay: float = None, now: float = None):
+        """
+        schedules the order's next update. Previous schedule of the order is replaced.
+
+        :param order: order with optional next_check_delay attribute
+        :param delay: delay in seconds. Order's next_check_delay if not set.
+        :param now: current time. clock() if not set.
+        :return: due time
+        """
+        if delay is None:
+            delay = getattr(order, "next_check_delay", None)
+            if delay is None:
+                delay = self.default_delay
+
+        if now is None:
+            now = self.clock()
+
+        self.remove(order)
+
+        entry = [now + delay, next(self._seq), order]
+        self._entries[order.id] = entry
+        heapq.heappush(self._heap, entry)
+        self.scheduled += 1
+
+        return entry[0]
+
+    def remove(self, order: "ActionOrder"):
+        """
+        removes the order from the schedule
+        """
+        entry = self._entries.pop(order.id, None)
+        if entry is not None:
+            entry[2] = None  # removed entries are skipped when popped
+
+    def _discard_removed(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+
+    def next_due_time(self):
+        """
+        :return: due time of the first pending order or None if there are no orders
+        """
+        self._discard_removed()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float = None):
+        """
+        :param now: current time. clock() if not set.
+        :return: list of orders due at the time, in the order of the due time. Orders are removed from the schedule.
+        """
+        if now is None:
+            now = self.clock()
+
+        due = list()
+        while True:
+            self._discard_removed()
+            if not self._heap or self._heap[0][0] > now:
+                break
+
+            due_time, seq, order = heapq.heappop(self._heap)
+            del self._entries[order.id]
+            due.append(order)
+
+        self.popped += len(due)
+        return due
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+from tkgpro.backtest.replay import SimpleFillModel
+
+
+class FakeAsyncExchange(object):
+    """
+    In-process asyncio exchange for testing the async drivers. Trade orders are filled by the
+    tkgpro.backtest.SimpleFillModel on the current tickers, every call awaits the configured latency.
+    """
+
+    def __init__(self, tickers: dict = None, fill_model: SimpleFillModel = None, latency: float = 0.0):
+        """
+        :param tickers: current tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :param fill_model: fill model for the trade orders. SimpleFillModel(maker_fill_ratio=0.1) by default.
+        :param latency: delay of every call in seconds or callable (method name, symbol) -> delay
+        """
+        self.tickers = tickers if tickers is not None else dict()
+        self.fill_model = fill_model if fill_model is not None else SimpleFillModel(maker_fill_ratio=0.1)
+        self.latency = latency
+
+        self.calls = dict()  # method name -> number of calls
+
+    async def _call(self, method: str, symbol: str = None):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        latency = self.latency(method, symbol) if callable(self.latency) else self.latency
+        await asyncio.sleep(latency)
+
+    async def fetch_tickers(self, symbols: list = None):
+        await self._call("fetch_tickers")
+
+        if symbols is None:
+            return dict(self.tickers)
+
+        return {symbol: self.tickers[symbol] for symbol in symbols if symbol in self.tickers}
+
+    async def create_order(self, trade_order):
+        await self._call("create_order", trade_order.symbol)
+        return self.fill_model.create_order(trade_order, self.tickers.get(trade_order.symbol))
+
+    async def fetch_order(self, trade_order):
+        await self._call("fetch_order", trade_order.symbol)
+        return self.fill_model.fetch_order(trade_order, self.tickers.get(trade_order.symbol))
+
+    async def fetch_orders(self, trade_orders: list):
+        """
+        batch status request for several trade orders
+        """
+        await self._call("fetch_orders")
+        return [self.fill_model.fetch_order(o, self.tickers.get(o.symbol)) for o in trade_orders]
+
+    async def cancel_order(self, trade_order):
+        await self._call("cancel_order", trade_order.symbol)
+        return self.fill_model.cancel_order(trade_order, self.tickers.get(trade_order.symbol))
+
+
+class FakeExchange(object):
+    """
+    In-process thread-safe exchange with the ztom's ccxtExchangeWrapper order methods for testing the
+    ThreadPoolOrderExecutor. Trade orders are filled by the tkgpro.backtest.SimpleFillModel on the current tickers,
+    every call sleeps for the configured latency.
+    """
+
+    def __init__(self, tickers: dict = None, fill_model: SimpleFillModel = None, latency: float = 0.0):
+        """
+        :param tickers: current tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :param fill_model: fill model for the trade orders. SimpleFillModel(maker_fill_ratio=0.1) by default.
+        :param latency: delay of every call in seconds or callable (method name, symbol) -> delay
+        """
+        self.tickers = tickers if tickers is not None else dict()
+        self.fill_model = fill_model if fill_model is not None else SimpleFillModel(maker_fill_ratio=0.1)
+        self.latency = latency
+
+        self.calls = dict()  # method name -> number of calls
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, symbol: str = None):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        latency = self.latency(method, symbol) if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def place_limit_order(self, trade_order):
+        self._call("place_limit_order", trade_order.symbol)
+        with self._lock:
+            return self.fill_model.create_order(trade_order, self.tickers.get(trade_order.symbol))
+
+    def get_order_update(self, trade_order):
+        self._call("get_order_update", trade_order.symbol)
+        with self._lock:
+            return self.fill_model.fetch_order(trade_order, self.tickers.get(trade_order.symbol))
+
+    def cancel_order(self, trade_order):
+        self._call("cancel_order", trade_order.symbol)
+        with self._lock:
+            return self.fill_model.cancel_order(trade_order, self.tickers.get(trade_order.symbol))
+
+
+class DelayedExchange(object):
+    """
+    Proxy of the exchange (ztom's ccxtExchangeWrapper in the offline mode) which delays the order requests by the
+    artificial latency. Other attributes are passed to the exchange.
+    """
+
+    DELAYED_METHODS = ("place_limit_order", "get_order_update", "cancel_order")
+
+    def __init__(self, exchange, latency):
+        """
+        :param exchange: exchange
+        :param latency: delay of the order requests in seconds or callable (method name, symbol) -> delay
+        """
+        self.exchange = exchange
+        self.latency = latency
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+        if name not in self.DELAYED_METHODS:
+            return attribute
+
+        def delayed(trade_order, *args, **kwargs):
+            latency = self.latency(name, trade_order.symbol) if callable(self.latency) else self.latency
+            if latency:
+                time.sleep(latency)
+            return attribute(trade_order, *args, **kwargs)
+
+        return delayed
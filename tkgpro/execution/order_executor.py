@@ -0,0 +1,313 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import TYPE_CHECKING
+
+from tkgpro.threshold_order.order_command import OrderCommand, parse_order_command
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class _RateLimiter(object):
+    """
+    Spaces the starts of the requests by 1 / rate_limit seconds. Used by the executor's thread before submitting the
+    request, so the pool's threads never wait for the rate limit.
+    """
+
+    def __init__(self, rate_limit: float = None, clock=time.monotonic):
+        """
+        :param rate_limit: max number of requests per second, not limited if None
+        """
+        self.interval = 1.0 / rate_limit if rate_limit else 0.0
+        self.clock = clock
+
+        self._next_time = 0.0
+
+    def delay(self):
+        """
+        :return: time in seconds till the next request can be started, 0 if now
+        """
+        if not self.interval:
+            return 0.0
+
+        return max(0.0, self._next_time - self.clock())
+
+    def acquire(self):
+        """
+        takes the slot of the request started now
+        """
+        if self.interval:
+            self._next_time = max(self.clock(), self._next_time) + self.interval
+
+
+class _ExchangeChannel(object):
+    """
+    Exchange with its concurrency and rate limits, queue of the orders waiting for the request and requests counters.
+    The queue, in_flight and rate_limiter are used only by the executor's thread, call() is executed by the worker
+    threads.
+    """
+
+    def __init__(self, exchange, max_concurrent_requests: int, rate_limit: float, offline_order_updates: int):
+        self.exchange = exchange
+        self.max_concurrent_requests = max_concurrent_requests
+        self.offline_order_updates = offline_order_updates
+
+        self.queue = deque()  # orders waiting for the request
+        self.in_flight = 0  # number of the submitted requests
+
+        self.requests = 0
+        self.errors = 0
+        self.max_concurrent = 0  # max number of the concurrent calls observed
+
+        self.rate_limiter = _RateLimiter(rate_limit)
+
+        self._concurrent = 0
+        self._lock = threading.Lock()
+
+    def can_submit(self):
+        return self.in_flight < self.max_concurrent_requests and self.rate_limiter.delay() == 0
+
+    def call(self, method: str, trade_order):
+        with self._lock:
+            self.requests += 1
+            self._concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self._concurrent)
+
+        try:
+            return getattr(self.exchange, method)(trade_order)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._concurrent -= 1
+
+
+class ThreadPoolOrderExecutor(object):
+    """
+    Executes the exchange requests of the action orders' (ThresholdRecoveryOrder, MakerStopLossOrder) commands on the
+    bounded thread pool, while the orders are updated only by the calling thread (as by the ActionOrderManager). Every
+    order has at most one request in flight, so the responses are applied to the order in the order of its requests. A
+    slow response delays only its own order: the orders with the completed requests are updated on every cycle, the
+    others wait for the next ones. Failed request is repeated on the next cycle, the order which requests fail more
+    than max_retries times in a row is moved to failed_orders.
+
+    Requests to each exchange are limited by the number of concurrent requests and the rate limit (requests per
+    second). The orders over the exchange's limits wait in the exchange's queue without taking the pool's threads, so
+    the sum of the exchanges' max_concurrent_requests should not exceed max_workers. The exchange should be safe for
+    the concurrent calls up to its max_concurrent_requests (set 1 for the exchange which is not).
+
+    The exchange is an object with the methods of ztom's ccxtExchangeWrapper: place_limit_order(trade_order),
+    get_order_update(trade_order) and cancel_order(trade_order), returning the ccxt like responses for
+    update_from_exchange (see tkgpro.execution.FakeExchange). For the exchange in the offline mode the offline order
+    data is added on the order creation as by the ActionOrderManager.
+
+    Usage:
+        executor = ThreadPoolOrderExecutor(max_workers=16)
+        executor.add_exchange("binance", exchange, max_concurrent_requests=4, rate_limit=10)
+        executor.add_order(order, "binance")
+
+        while executor.open_orders:
+            executor.proceed_orders(tickers, timeout=0.1)
+    """
+
+    METHODS = {OrderCommand.NEW: "place_limit_order",
+               OrderCommand.CANCEL: "cancel_order",
+               OrderCommand.HOLD: "get_order_update"}
+    """
+    exchange methods for the order commands kinds, get_order_update for the others
+    """
+
+    def __init__(self, max_workers: int = 8, max_retries: int = 5, max_errors: int = 1000, on_order_removed=None):
+        """
+        :param max_workers: number of the threads in the pool shared by all exchanges
+        :param max_retries: number of the consecutive failed requests of the order after which the order is moved to
+        the failed_orders
+        :param max_errors: number of the latest errors kept in errors
+        :param on_order_removed: callable(order) called for the order moved to the failed_orders (removed without being
+        closed), e.g. order_instrumentation.remove_order
+        """
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.on_order_removed = on_order_removed
+
+        self.exchanges = dict()  # exchange id -> _ExchangeChannel
+        self.open_orders = list()
+        self.closed_orders = list()
+        self.failed_orders = list()  # orders which requests failed more than max_retries times in a row
+        self.tickers = dict()  # latest tickers {symbol: ticker}, the order gets the ticker of its symbol
+        self.errors = deque(maxlen=max_errors)  # (order.id, exception) of the latest failed requests
+
+        self._failures = dict()  # order.id -> number of the consecutive failed requests
+        self._order_channels = dict()  # order.id -> _ExchangeChannel
+        self._queued = set()  # order.id of the orders in the exchanges' queues
+        self._in_flight = dict()  # order.id -> (future, trade order)
+        self._pool = None
+
+    def add_exchange(self, exchange_id: str, exchange, max_concurrent_requests: int = 4, rate_limit: float = None,
+                     offline_order_updates: int = 10):
+        """
+        :param exchange_id: id to add the orders to
+        :param exchange: exchange (ztom's ccxtExchangeWrapper)
+        :param max_concurrent_requests: max number of the concurrent requests to the exchange
+        :param rate_limit: max number of the requests per second to the exchange, not limited if None
+        :param offline_order_updates: number of updates to fill the order from the offline data (for the exchange in
+        the offline mode)
+        """
+        self.exchanges[exchange_id] = _ExchangeChannel(exchange, max_concurrent_requests, rate_limit,
+                                                       offline_order_updates)
+
+    def add_order(self, order: "ActionOrder", exchange_id: str = None):
+        """
+        :param exchange_id: exchange of the order. The only added exchange if not set.
+        """
+        if exchange_id is None:
+            if len(self.exchanges) != 1:
+                raise ValueError("exchange_id is required for {} exchanges".format(len(self.exchanges)))
+            exchange_id = next(iter(self.exchanges))
+
+        if exchange_id not in self.exchanges:
+            raise ValueError("Unknown exchange {}".format(exchange_id))
+
+        self._order_channels[order.id] = self.exchanges[exchange_id]
+        self.open_orders.append(order)
+
+    def _submit(self, order: "ActionOrder", channel: _ExchangeChannel):
+        trade_order = order.active_trade_order
+
+        kind, symbol = parse_order_command(order.order_command)
+        method = self.METHODS.get(kind, "get_order_update")
+
+        if kind == OrderCommand.NEW and getattr(channel.exchange, "offline", False):
+            channel.exchange.add_offline_order_data(trade_order, channel.offline_order_updates)
+
+        channel.rate_limiter.acquire()
+        future = self._pool.submit(channel.call, method, trade_order)
+        self._in_flight[order.id] = (future, trade_order)
+        channel.in_flight += 1
+
+    def proceed_orders(self, tickers: dict = None, timeout: float = None):
+        """
+        one update cycle: sends the requests of the open orders which have no request in flight (within the exchanges'
+        limits), waits till any of the requests is completed or the rate limit allows the next request (up to
+        timeout) and updates the orders from all completed ones
+
+        :param tickers: new tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :param timeout: max time in seconds to wait for the first completed request, no limit if None
+        :return: list of the updated orders
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        if tickers:
+            self.tickers.update(tickers)
+
+        for order in self.open_orders:
+            if order.id not in self._in_flight and order.id not in self._queued and \
+                    order.active_trade_order is not None:
+                self._order_channels[order.id].queue.append(order)
+                self._queued.add(order.id)
+
+        rate_delay = None  # time till the next request of the queued orders held by the rate limit
+        for channel in self.exchanges.values():
+            while channel.queue and channel.can_submit():
+                order = channel.queue.popleft()
+                self._queued.discard(order.id)
+                self._submit(order, channel)
+
+            if channel.queue and channel.in_flight < channel.max_concurrent_requests:
+                delay = channel.rate_limiter.delay()
+                rate_delay = delay if rate_delay is None else min(rate_delay, delay)
+
+        wait_timeout = timeout
+        if rate_delay is not None:
+            wait_timeout = rate_delay if timeout is None else min(timeout, rate_delay)
+
+        if self._in_flight:
+            wait([future for future, trade_order in self._in_flight.values()], wait_timeout, FIRST_COMPLETED)
+        elif wait_timeout:
+            time.sleep(wait_timeout)  # only the requests held by the rate limit are pending
+
+        updated = list()
+        for order in self.open_orders:
+            in_flight = self._in_flight.get(order.id)
+            if in_flight is None or not in_flight[0].done():
+                continue
+
+            del self._in_flight[order.id]
+            self._order_channels[order.id].in_flight -= 1
+            future, trade_order = in_flight
+
+            error = future.exception()
+            if error is not None:
+                self.errors.append((order.id, error))
+                self._failures[order.id] = self._failures.get(order.id, 0) + 1
+                continue  # the request is repeated on the next cycle
+
+            self._failures.pop(order.id, None)
+
+            ticker = self.tickers.get(order.symbol)
+            order.update_from_exchange(future.result(), [ticker] if ticker is not None else None)
+            updated.append(order)
+
+        closed = [o for o in self.open_orders if (o.status == "closed" or o.active_trade_order is None) and
+                  o.id not in self._in_flight and o.id not in self._queued]
+        failed = [o for o in self.open_orders if self._failures.get(o.id, 0) > self.max_retries]
+
+        if closed or failed:
+            self.closed_orders.extend(closed)
+            self.failed_orders.extend(failed)
+            self.open_orders = [o for o in self.open_orders if o not in closed and o not in failed]
+
+            for order in closed + failed:
+                self._failures.pop(order.id, None)
+                self._order_channels.pop(order.id, None)
+
+            if self.on_order_removed is not None:
+                for order in failed:
+                    self.on_order_removed(order)
+
+        return updated
+
+    def run(self, tickers: dict = None, timeout: float = None, max_cycles: int = None):
+        """
+        proceeds the orders till they are closed
+
+        :param tickers: tickers for the orders
+        :param timeout: timeout of the cycle
+        :param max_cycles: max number of the update cycles
+        :return: number of the update cycles
+        """
+        cycles = 0
+        while self.open_orders and (max_cycles is None or cycles < max_cycles):
+            self.proceed_orders(tickers if cycles == 0 else None, timeout)
+            cycles += 1
+
+        return cycles
+
+    def get_stats(self):
+        """
+        :return: dict {exchange id: dict of requests counters}
+        """
+        return {exchange_id: {"requests": channel.requests,
+                              "errors": channel.errors,
+                              "max_concurrent_requests": channel.max_concurrent}
+                for exchange_id, channel in self.exchanges.items()}
+
+    def close(self, wait_requests: bool = True):
+        """
+        shuts down the thread pool
+
+        :param wait_requests: wait for the requests in flight
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait_requests)
+            self._pool = None
+            self._in_flight = dict()
+            self._queued = set()
+            for channel in self.exchanges.values():
+                channel.queue.clear()
+                channel.in_flight = 0
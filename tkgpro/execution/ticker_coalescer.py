@@ -0,0 +1,150 @@
+from typing import TYPE_CHECKING
+
+from tkgpro.threshold_order.order_command import parse_order_command
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class TickerCoalescer(object):
+    """
+    Coalesces the tickers requests of the orders' commands ("hold tickers ETH/BTC") made during one update cycle: the
+    requests are collected by add_request, fetch() makes one fetch_tickers call per exchange for the union of the
+    requested symbols and market_data(order) returns the fetched ticker of the order's symbol for update_from_exchange.
+
+    Usage within the update cycle:
+        coalescer.new_cycle()
+        for order in orders:
+            coalescer.add_request(order, exchange)
+        coalescer.fetch()
+        for order in orders:
+            order.update_from_exchange(resp, coalescer.market_data(order))
+
+    The exchange is ztom's ccxtExchangeWrapper: tickers are fetched by its get_tickers(), so the offline mode of the
+    wrapper works for the backtests. Other objects with fetch_tickers(symbols) method returning dict {symbol: ticker}
+    (ccxt exchange) are also supported.
+    """
+
+    def __init__(self):
+        self.requests = 0  # number of collected tickers requests
+        self.fetches = 0  # number of fetch_tickers calls
+        self.symbols_fetched = 0  # number of symbols requested by the fetch_tickers calls
+        self.cycles = 0
+
+        self._exchanges = dict()  # id(exchange) -> (exchange, set of symbols)
+        self._order_symbols = dict()  # order.id -> (id(exchange), symbol)
+        self._tickers = dict()  # id(exchange) -> {symbol: ticker}
+
+    def new_cycle(self):
+        """
+        clears the requests and tickers of the previous cycle
+        """
+        self._exchanges.clear()
+        self._order_symbols.clear()
+        self._tickers.clear()
+        self.cycles += 1
+
+    def add_request(self, order: "ActionOrder", exchange):
+        """
+        collects the tickers request of the order's command
+
+        :param order: action order
+        :param exchange: exchange of the order
+        :return: symbol of the requested ticker or None if the order's command does not request the tickers
+        """
+        kind, symbol = parse_order_command(order.order_command)
+        if symbol is None:
+            return None
+
+        self.requests += 1
+
+        exchange_id = id(exchange)
+        requested = self._exchanges.get(exchange_id)
+        if requested is None:
+            requested = (exchange, set())
+            self._exchanges[exchange_id] = requested
+
+        requested[1].add(symbol)
+        self._order_symbols[order.id] = (exchange_id, symbol)
+
+        return symbol
+
+    def fetch(self):
+        """
+        fetches the tickers of the requested symbols by one fetch_tickers call per exchange
+
+        :return: dict {symbol: ticker} of the fetched tickers of all exchanges
+        """
+        fetched = dict()
+
+        for exchange_id, (exchange, symbols) in self._exchanges.items():
+            if exchange_id in self._tickers:
+                continue
+
+            symbols = sorted(symbols)
+            tickers = self._fetch_tickers(exchange, symbols)
+
+            self.fetches += 1
+            self.symbols_fetched += len(symbols)
+
+            self._tickers[exchange_id] = tickers
+            fetched.update(tickers)
+
+        return fetched
+
+    @staticmethod
+    def _fetch_tickers(exchange, symbols: list):
+        """
+        :return: dict {symbol: ticker} of the requested symbols
+        """
+        if hasattr(exchange, "get_tickers"):
+            tickers = exchange.get_tickers()
+            return {symbol: tickers[symbol] for symbol in symbols if symbol in tickers}
+
+        return exchange.fetch_tickers(symbols)
+
+    def market_data(self, order: "ActionOrder"):
+        """
+        :return: market data for the order's update_from_exchange ([ticker]) or None if the order has not requested
+        the tickers in the current cycle
+        """
+        requested = self._order_symbols.get(order.id)
+        if requested is None:
+            return None
+
+        exchange_id, symbol = requested
+        ticker = self._tickers.get(exchange_id, {}).get(symbol)
+
+        return [ticker] if ticker is not None else None
+
+    def proceed(self, orders: list, exchange):
+        """
+        one coalesced tickers fetch for the orders of the exchange
+
+        :return: list of market data of the orders (in the same order)
+        """
+        self.new_cycle()
+
+        for order in orders:
+            self.add_request(order, exchange)
+
+        self.fetch()
+
+        return [self.market_data(order) for order in orders]
+
+    @property
+    def requests_saved(self):
+        """
+        number of the tickers requests which have not resulted in a separate fetch_tickers call
+        """
+        return self.requests - self.fetches
+
+    def get_stats(self):
+        """
+        :return: dict of requests counters
+        """
+        return {"cycles": self.cycles,
+                "tickers_requests": self.requests,
+                "tickers_fetches": self.fetches,
+                "symbols_fetched": self.symbols_fetched,
+                "requests_saved": self.requests_saved}
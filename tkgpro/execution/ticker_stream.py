@@ -0,0 +1,282 @@
+import asyncio
+
+import numpy as np
+
+
+class TopOfBook(object):
+    """
+    Latest best bid/ask of the symbols in one numpy array (row per symbol: bid, ask, bidVolume, askVolume, timestamp;
+    NaN if not received). Tickers are returned in the ccxt like dict format of the orders' market data.
+    """
+
+    FIELDS = ("bid", "ask", "bidVolume", "askVolume", "timestamp")
+
+    def __init__(self, capacity: int = 64):
+        """
+        :param capacity: initial number of symbols. The array is grown automatically.
+        """
+        self.symbols = list()  # symbol id -> symbol
+        self._symbol_ids = dict()  # symbol -> symbol id
+
+        self.prices = np.full((max(capacity, 1), len(self.FIELDS)), np.nan)
+        self.versions = np.zeros(max(capacity, 1), dtype=np.int64)  # number of updates of the symbol
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str):
+        return symbol in self._symbol_ids
+
+    def symbol_id(self, symbol: str):
+        """
+        :return: id (row) of the symbol, the row is added for the new symbol
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+
+        symbol_id = len(self.symbols)
+        if symbol_id >= len(self.prices):
+            prices = np.full((len(self.prices) * 2, len(self.FIELDS)), np.nan)
+            prices[:symbol_id] = self.prices
+            versions = np.zeros(len(prices), dtype=np.int64)
+            versions[:symbol_id] = self.versions
+            self.prices, self.versions = prices, versions
+
+        self.symbols.append(symbol)
+        self._symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def update(self, update: dict):
+        """
+        updates the symbol's prices from the incremental update. Fields not present in the update (or None) keep their
+        previous values.
+
+        :param update: dict {"symbol": symbol, "bid": bid, "ask": ask, "bidVolume": .., "askVolume": ..,
+        "timestamp": ..}
+        """
+        symbol_id = self.symbol_id(update["symbol"])
+        row = self.prices[symbol_id]
+
+        for i, field in enumerate(self.FIELDS):
+            value = update.get(field)
+            if value is not None:
+                row[i] = value
+
+        self.versions[symbol_id] += 1
+
+    def ticker(self, symbol: str):
+        """
+        :return: ticker dict {"bid", "ask", "bidVolume", "askVolume", "timestamp"} or None if no updates for the symbol
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return None
+
+        ticker = dict()
+        for field, value in zip(self.FIELDS, self.prices[symbol_id].tolist()):
+            ticker[field] = value if value == value else None
+
+        if ticker["timestamp"] is not None:
+            ticker["timestamp"] = int(ticker["timestamp"])
+
+        return ticker
+
+    def market_data(self, symbol: str):
+        """
+        :return: market data [ticker] for the orders' update_from_exchange or None if no updates for the symbol
+        """
+        ticker = self.ticker(symbol)
+        return [ticker] if ticker is not None else None
+
+    def tickers(self):
+        """
+        :return: dict {symbol: ticker} of all symbols
+        """
+        return {symbol: self.ticker(symbol) for symbol in self.symbols}
+
+
+class TickerStream(object):
+    """
+    Ingests the stream of incremental best bid/ask updates into the TopOfBook with drop-to-latest semantics: the
+    updates of the symbol received since the last drain() are merged into one pending update, so a slow consumer
+    gets only the latest prices and the pending updates never exceed the number of symbols. The producer is never
+    blocked by the consumer.
+
+    Usage:
+        stream = TickerStream()
+        asyncio.create_task(stream.consume(FakeTickerFeed(snapshots)))  # or any async iterable of updates
+        while True:
+            for symbol in await stream.get_updates():
+                order.update_from_exchange(resp, stream.book.market_data(symbol))
+    """
+
+    def __init__(self, book: TopOfBook = None):
+        self.book = book if book is not None else TopOfBook()
+
+        self.received = 0  # number of received updates
+        self.dropped = 0  # number of updates merged into the next update of the symbol before being applied
+        self.applied = 0  # number of pending updates applied to the book
+
+        self.finished = False  # source is exhausted
+
+        self._pending = dict()  # symbol -> merged update
+        self._event = None
+
+    def _get_event(self):
+        # created by the coroutines in the running loop, asyncio.Event has no loop argument since python 3.10
+        if self._event is None:
+            self._event = asyncio.Event()
+        return self._event
+
+    @property
+    def pending(self):
+        """
+        number of symbols with pending updates
+        """
+        return len(self._pending)
+
+    def push(self, update: dict):
+        """
+        adds the incremental update of the symbol
+        """
+        self.received += 1
+
+        symbol = update["symbol"]
+        pending = self._pending.get(symbol)
+        if pending is None:
+            self._pending[symbol] = dict(update)
+        else:
+            self.dropped += 1
+            pending.update((field, value) for field, value in update.items() if value is not None)
+
+        if self._event is not None:
+            self._event.set()
+
+    def drain(self):
+        """
+        applies the pending updates to the book
+
+        :return: list of updated symbols
+        """
+        pending, self._pending = self._pending, dict()
+
+        for update in pending.values():
+            self.book.update(update)
+
+        self.applied += len(pending)
+
+        if self._event is not None:
+            self._event.clear()
+
+        return list(pending)
+
+    async def consume(self, source):
+        """
+        pushes the updates from the async iterable source till it's exhausted
+        """
+        event = self._get_event()
+
+        try:
+            async for update in source:
+                self.push(update)
+        finally:
+            self.finished = True
+            event.set()
+
+    async def get_updates(self):
+        """
+        waits for the updates and applies them to the book
+
+        :return: list of updated symbols. Empty list if the source is finished and there are no pending updates.
+        """
+        event = self._get_event()
+
+        while not self._pending and not self.finished:
+            await event.wait()
+            if not self._pending:
+                event.clear()
+
+        return self.drain()
+
+    def get_stats(self):
+        """
+        :return: dict of updates counters
+        """
+        return {"received": self.received,
+                "dropped": self.dropped,
+                "applied": self.applied,
+                "pending": self.pending}
+
+
+class FakeTickerFeed(object):
+    """
+    Local streaming source of the incremental best bid/ask updates replayed from the tickers snapshots (as from
+    tkgpro.backtest.read_tickers_csv or TickerStore.snapshots). Only the symbols with changed prices are emitted.
+    """
+
+    def __init__(self, snapshots, interval: float = 0.0):
+        """
+        :param snapshots: iterable of (timestamp, tickers)
+        :param interval: delay in seconds between the snapshots for the async iteration
+        """
+        self.snapshots = snapshots
+        self.interval = interval
+
+    def updates(self):
+        """
+        :return: generator of the updates batches (list of updates per snapshot)
+        """
+        last = dict()
+
+        for timestamp, tickers in self.snapshots:
+            batch = list()
+
+            for symbol, ticker in tickers.items():
+                bid, ask = ticker.get("bid"), ticker.get("ask")
+                if last.get(symbol) == (bid, ask):
+                    continue
+
+                last[symbol] = (bid, ask)
+                batch.append({"symbol": symbol,
+                              "bid": bid,
+                              "ask": ask,
+                              "bidVolume": ticker.get("bidVolume"),
+                              "askVolume": ticker.get("askVolume"),
+                              "timestamp": ticker.get("timestamp", timestamp)})
+
+            yield batch
+
+    def __iter__(self):
+        for batch in self.updates():
+            for update in batch:
+                yield update
+
+    def __aiter__(self):
+        return _AsyncFeedIterator(self.updates(), self.interval)
+
+
+class _AsyncFeedIterator(object):
+
+    def __init__(self, batches, interval: float):
+        self._batches = batches
+        self._interval = interval
+        self._batch = list()
+        self._started = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._batch:
+            if self._started:
+                await asyncio.sleep(self._interval)
+
+            batch = next(self._batches, None)
+            if batch is None:
+                raise StopAsyncIteration
+
+            self._started = True
+            self._batch = list(reversed(batch))
+
+        return self._batch.pop()
@@ -0,0 +1,44 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Package module which imports its public attributes from the submodules on the first access, so importing the
+    package does not import the submodules' dependencies (ztom, ccxt, numpy) till the attributes are used.
+    """
+
+    def __getattr__(self, name: str):
+        module_name = self.__dict__.get("_lazy_attributes", dict()).get(name)
+        if module_name is None:
+            raise AttributeError("module '{}' has no attribute '{}'".format(self.__name__, name))
+
+        value = getattr(importlib.import_module(module_name), name)
+        setattr(self, name, value)  # next access does not go through __getattr__
+        return value
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get("_lazy_attributes", ())))
+
+
+def lazy_import(module_name: str, attributes: dict):
+    """
+    Makes the module's attributes imported from the submodules on the first access. Works on python 3.6 (no module
+    level __getattr__) by changing the class of the module object.
+
+    Usage in the package's __init__.py:
+        lazy_import(__name__, {"tkgpro.threshold_order.maker_stop_loss": ["MakerStopLossOrder"]})
+
+    :param module_name: name of the module (__name__ of the package)
+    :param attributes: dict {module name: list of the attributes names to import from the module}
+    """
+    module = sys.modules[module_name]
+
+    lazy_attributes = module.__dict__.setdefault("_lazy_attributes", dict())
+    for attributes_module, names in attributes.items():
+        for name in names:
+            lazy_attributes[name] = attributes_module
+
+    module.__all__ = list(lazy_attributes)
+    module.__class__ = LazyModule
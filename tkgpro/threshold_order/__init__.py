@@ -1,3 +1,17 @@
-from tkgpro.threshold_order.threshold_order import ThresholdRecoveryOrder
-from tkgpro.threshold_order.maker_stop_loss import MakerStopLossOrder
+from tkgpro.lazy_import import lazy_import
 
+lazy_import(__name__, {
+    "tkgpro.threshold_order.threshold_order": ["ThresholdRecoveryOrder"],
+    "tkgpro.threshold_order.maker_stop_loss": ["MakerStopLossOrder"],
+    "tkgpro.threshold_order.maker_stop_loss_batch": ["MakerStopLossBatch"],
+    "tkgpro.threshold_order.ticker_dispatcher": ["TickerDispatcher"],
+    "tkgpro.threshold_order.order_command": ["OrderCommand", "OrderCommands", "parse_order_command"],
+    "tkgpro.threshold_order.compact": ["TagFlags", "compact_order"],
+    "tkgpro.threshold_order.check_cadence": ["CheckCadence"],
+    "tkgpro.threshold_order.price_trigger_book": ["PriceTriggerBook"],
+    "tkgpro.threshold_order.fill_ledger": ["FillLedger"],
+    "tkgpro.threshold_order.market_index": ["MarketIndex", "MarketRecord"],
+    "tkgpro.threshold_order.order_store": ["OrderStore", "snapshot_order", "restore_order"],
+    "tkgpro.threshold_order.instrumentation": ["Instrumentation", "order_instrumentation"],
+    "tkgpro.threshold_order.event_journal": ["EventJournal", "EventJournalReader"],
+})
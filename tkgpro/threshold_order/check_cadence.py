@@ -0,0 +1,78 @@
+import math
+import time
+
+
+class CheckCadence(object):
+    """
+    Suggested delay till the next price check of the threshold order, derived from the headroom (relative distance
+    from the current price to the trigger price) and the recent volatility of the price.
+
+    Volatility is the exponentially smoothed relative price change per sqrt(second), so the expected time for the
+    price to pass the headroom is (headroom / volatility) ** 2 seconds. The suggested delay is this time divided by
+    safety_factor and limited by min_delay and max_delay. Until the volatility is known (less than two prices with
+    different timestamps) or if the price is at or beyond the trigger the delay is min_delay.
+    """
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 60.0, safety_factor: float = 4.0,
+                 smoothing: float = 0.2):
+        """
+        :param min_delay: min delay in seconds
+        :param max_delay: max delay in seconds
+        :param safety_factor: number of checks expected till the price reaches the trigger
+        :param smoothing: weight of the last price change in the volatility (0..1]
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.safety_factor = safety_factor
+        self.smoothing = smoothing
+
+        self.delay = min_delay  # suggested delay till the next check in seconds
+        self.headroom = None  # last headroom
+        self.volatility = None  # relative price change per sqrt(second)
+
+        self._last_price = None
+        self._last_timestamp = None
+
+    def update(self, price: float, headroom: float, timestamp: float = None):
+        """
+        :param price: current price
+        :param headroom: relative distance to the trigger price (see price_levels.trigger_headroom)
+        :param timestamp: time of the price in seconds. Current time if not set.
+        :return: suggested delay till the next check in seconds
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        if price and price > 0:
+            if self._last_price is not None and timestamp > self._last_timestamp:
+                change = abs(price / self._last_price - 1) / math.sqrt(timestamp - self._last_timestamp)
+
+                self.volatility = change if self.volatility is None \
+                    else self.volatility + self.smoothing * (change - self.volatility)
+
+            if self._last_timestamp is None or timestamp > self._last_timestamp:
+                self._last_price, self._last_timestamp = price, timestamp
+
+        self.headroom = headroom
+        self.delay = self.suggest_delay(headroom)
+
+        return self.delay
+
+    def suggest_delay(self, headroom: float):
+        """
+        :return: suggested delay for the headroom with the current volatility
+        """
+        if headroom is None or headroom <= 0 or not self.volatility:
+            return self.min_delay
+
+        time_to_trigger = (headroom / self.volatility) ** 2
+
+        return min(self.max_delay, max(self.min_delay, time_to_trigger / self.safety_factor))
+
+
+def ticker_timestamp(ticker: dict):
+    """
+    :return: timestamp of the ticker in seconds or None if the ticker has no timestamp (in ms as in ccxt)
+    """
+    timestamp = ticker.get("timestamp") if ticker is not None else None
+    return timestamp / 1000.0 if timestamp else None
@@ -0,0 +1,137 @@
+from collections import deque
+
+
+class _NoSupplementary(dict):
+    """
+    empty read-only dict, pickled and copied as the module's singleton
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Supplementary of the trade order in the compact history is dropped")
+
+    __setitem__ = __delitem__ = update = setdefault = pop = popitem = clear = _read_only
+
+    def __reduce__(self):
+        return "_NO_SUPPLEMENTARY"
+
+
+_NO_SUPPLEMENTARY = _NoSupplementary()
+"""
+shared replacement of the supplementary dicts of the closed trade orders in the compact history
+"""
+
+
+class TagFlags(object):
+    """
+    Set of order tags stored as integer bit flags. Tag names are registered once per process, so the order keeps only
+    one int instead of a list of strings. Supports the list operations used for the orders' tags: append, "in",
+    iteration and len. Tags are unique and iterated in the order of registration.
+    """
+
+    __slots__ = ("flags",)
+
+    _names = list()  # bit -> tag name
+    _bits = dict()  # tag name -> bit
+
+    def __init__(self, tags=None):
+        self.flags = 0
+
+        if tags is not None:
+            self.extend(tags)
+
+    @classmethod
+    def _bit(cls, tag: str):
+        bit = cls._bits.get(tag)
+        if bit is None:
+            bit = len(cls._names)
+            cls._names.append(tag)
+            cls._bits[tag] = bit
+        return bit
+
+    def append(self, tag: str):
+        self.flags |= 1 << self._bit(tag)
+
+    def extend(self, tags):
+        for tag in tags:
+            self.append(tag)
+
+    def remove(self, tag: str):
+        if tag not in self:
+            raise ValueError("{} not in tags".format(tag))
+
+        self.flags &= ~(1 << self._bits[tag])
+
+    def __contains__(self, tag):
+        bit = self._bits.get(tag)
+        return bit is not None and bool(self.flags & (1 << bit))
+
+    def __iter__(self):
+        flags, bit = self.flags, 0
+        while flags:
+            if flags & 1:
+                yield self._names[bit]
+            flags >>= 1
+            bit += 1
+
+    def __len__(self):
+        return bin(self.flags).count("1")
+
+    def __eq__(self, other):
+        if isinstance(other, TagFlags):
+            return self.flags == other.flags
+        if isinstance(other, (list, tuple, set)):
+            return set(self) == set(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        # as for the other mutable keys: tags should not be changed while in the set or used as the dict key
+        return hash(self.flags)
+
+    def __getstate__(self):
+        return list(self)
+
+    def __setstate__(self, state):
+        self.flags = 0
+        self.extend(state)
+
+    def __repr__(self):
+        return "TagFlags({})".format(list(self))
+
+
+class TradeOrdersHistory(deque):
+    """
+    Bounded history of the closed trade orders which drops the supplementary dicts (parent order's state at the
+    trade order's creation) of the added trade orders: they are replaced with the shared read-only empty dict.
+    """
+
+    def __init__(self, trade_orders=(), maxlen: int = None):
+        super().__init__(maxlen=maxlen)
+        for trade_order in trade_orders:
+            self.append(trade_order)
+
+    def append(self, trade_order):
+        if getattr(trade_order, "supplementary", None) is not None:
+            trade_order.supplementary = _NO_SUPPLEMENTARY
+
+        super().append(trade_order)
+
+
+def compact_order(order, history_size: int = 10):
+    """
+    Switches the threshold order (ThresholdRecoveryOrder or MakerStopLossOrder) to the compact representation:
+    tags are kept as TagFlags and only the last history_size closed trade orders are kept in orders_history without
+    their supplementary dicts (TradeOrdersHistory). Filled amounts of the dropped trade orders are still accounted in
+    the order's fill totals. Supplementary of the active trade order is kept.
+
+    :param order: order to convert
+    :param history_size: max number of trade orders in orders_history
+    :return: the same order
+    """
+    order.tags = TagFlags(order.tags)
+    order.orders_history = TradeOrdersHistory(order.orders_history, maxlen=history_size)
+
+    return order
@@ -0,0 +1,342 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+from tkgpro.threshold_order.order_command import parse_order_command
+
+RECORD = struct.Struct("<dIBBBBdd")
+"""
+fixed size event record: timestamp, order code, event, a, b, flags, amount, price
+"""
+
+TRANSITION = 1  # a: from state code (0 for the order's first state), b: to state code
+COMMAND = 2  # a: command kind code, b: 1 if the tickers are requested
+FILL = 3  # amount: filled amount delta (base currency), price: active trade order's price
+
+EVENT_NAMES = {TRANSITION: "transition", COMMAND: "command", FILL: "fill"}
+
+_NAME_LINE = "{}\t{}\t{}\t{}\n"  # kind, code, name, extra value
+
+
+class EventJournal(object):
+    """
+    Append-only binary journal of the threshold orders' events: state transitions, emitted commands and fill deltas.
+
+    Events are packed into the fixed size records (RECORD, 32 bytes) in the memory buffer. Full buffer (or the buffer
+    older than flush_interval) is handed to the writer thread, so the file I/O is off the hot path. Strings (order ids,
+    symbols, states, command kinds) are written once to the names file (<path>.names) and referenced in the records by
+    the integer codes.
+
+    Error of the writer thread stops the writing: the rest of the batches are dropped and the error is raised by the
+    next hand off of the buffer, flush() and close().
+
+    Usage:
+        journal = EventJournal("events.bin")
+        ...
+        order.update_from_exchange(resp, market_data)
+        journal.update(order)  # journals the changes of the order since the previous update
+        ...
+        journal.close()
+
+        events = EventJournalReader("events.bin")
+    """
+
+    def __init__(self, path: str, buffer_records: int = 4096, flush_interval: float = 1.0, background: bool = True,
+                 clock=time.time):
+        """
+        :param path: journal file, appended if exists
+        :param buffer_records: number of the records in the buffer before handing it to the writer
+        :param flush_interval: max age in seconds of the buffered records (checked on the next event)
+        :param background: write in the writer thread, otherwise the buffer is written by the caller's thread
+        :param clock: timestamps of the events
+        """
+        self.path = path
+        self.names_path = path + ".names"
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.clock = clock
+
+        self.events = 0  # number of journaled events
+        self.batches = 0  # number of the written batches
+
+        self._buffer = bytearray()
+        self._buffer_count = 0
+        self._buffer_time = None  # time of the first buffered record
+        self._names = list()  # names lines not written yet
+
+        self._codes = dict()  # (kind, name) -> code
+        self._counts = dict()  # kind -> next code
+        self._load_names()
+
+        self._orders = dict()  # order.id -> (order code, state, command, filled)
+
+        self._file = open(path, "ab")
+        self._truncate_torn_record()
+        self._names_file = open(self.names_path, "a", newline="\n")
+
+        self._error = None  # error of the writer thread
+        self._queue = None
+        self._writer = None
+        if background:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_batches, name="EventJournal", daemon=True)
+            self._writer.start()
+
+    def _load_names(self):
+        if not os.path.exists(self.names_path):
+            return
+
+        size = 0
+        for kind, code, name, extra in _read_names(self.names_path):
+            self._codes[(kind, name)] = code
+            self._counts[kind] = max(self._counts.get(kind, 1), code + 1)
+            size += len(_NAME_LINE.format(kind, code, name, extra).encode())
+
+        if size != os.path.getsize(self.names_path):
+            with open(self.names_path, "r+b") as f:
+                f.truncate(size)  # drop the torn line
+
+    def _truncate_torn_record(self):
+        size = self._file.seek(0, os.SEEK_END)
+        if size % RECORD.size:
+            self._file.truncate(size - size % RECORD.size)
+
+    def code(self, kind: str, name: str, extra: str = None):
+        """
+        :param kind: kind of the name: "order", "state", "command"
+        :param name: name
+        :param extra: additional value of the name written to the names file (symbol of the order)
+        :return: integer code of the name, starting from 1 (0 is reserved for no name)
+        """
+        code = self._codes.get((kind, name))
+        if code is None:
+            code = self._counts.get(kind, 1)
+            self._counts[kind] = code + 1
+            self._codes[(kind, name)] = code
+            self._names.append(_NAME_LINE.format(kind, code, name, extra if extra is not None else ""))
+
+        return code
+
+    def add_event(self, order_code: int, event: int, a: int = 0, b: int = 0, amount: float = 0.0,
+                  price: float = 0.0, timestamp: float = None):
+        now = self.clock() if timestamp is None else timestamp
+
+        self._buffer += RECORD.pack(now, order_code, event, a, b, 0, amount, price)
+        self._buffer_count += 1
+        self.events += 1
+
+        if self._buffer_time is None:
+            self._buffer_time = now
+
+        if self._buffer_count >= self.buffer_records or now - self._buffer_time >= self.flush_interval:
+            self._hand_off()
+
+    def update(self, order):
+        """
+        journals the changes of the order since the previous update: state transition, new command and filled amount
+        delta. The first update of the order journals its state and command.
+        """
+        known = self._orders.get(order.id)
+        if known is None:
+            order_code = self.code("order", order.id, order.symbol)
+            state, command, filled = None, None, 0.0
+        else:
+            order_code, state, command, filled = known
+
+        now = self.clock()
+
+        if order.state != state:
+            self.add_event(order_code, TRANSITION, self.code("state", state) if state is not None else 0,
+                           self.code("state", order.state), timestamp=now)
+
+        if order.order_command is not command:
+            kind, symbol = parse_order_command(order.order_command)
+            self.add_event(order_code, COMMAND, self.code("command", kind), int(symbol is not None), timestamp=now)
+
+        order_filled = order.filled or 0.0
+        if order_filled != filled:
+            price = order.active_trade_order.price if order.active_trade_order is not None else 0.0
+            self.add_event(order_code, FILL, amount=order_filled - filled, price=price or 0.0, timestamp=now)
+
+        if order.status == "closed":
+            self._orders.pop(order.id, None)
+        else:
+            self._orders[order.id] = (order_code, order.state, order.order_command, order_filled)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _hand_off(self):
+        self._raise_error()
+
+        if not self._buffer_count and not self._names:
+            return
+
+        batch = ("".join(self._names), bytes(self._buffer))
+        self._buffer = bytearray()
+        self._buffer_count = 0
+        self._buffer_time = None
+        self._names = list()
+
+        if self._queue is not None:
+            self._queue.put(batch)
+        else:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        names, records = batch
+
+        if names:  # names are written before the records referencing them
+            self._names_file.write(names)
+            self._names_file.flush()
+
+        self._file.write(records)
+        self._file.flush()
+        self.batches += 1
+
+    def _write_batches(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is None:
+                    self._write_batch(batch)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        writes the buffered events and waits till they are written
+        """
+        self._hand_off()
+        if self._queue is not None:
+            self._queue.join()
+
+        self._raise_error()
+
+    def close(self):
+        """
+        flushes the journal, stops the writer thread and closes the files. The files are closed even if the writing
+        has failed, the error is raised after that.
+        """
+        try:
+            self.flush()
+
+        finally:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer = None
+                self._queue = None
+
+            self._file.close()
+            self._names_file.close()
+
+
+def _read_names(names_path: str):
+    """
+    :return: generator of (kind, code, name, extra value) of the names file
+    """
+    with open(names_path, newline="\n") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return  # torn line
+
+            kind, code, name, extra = line[:-1].split("\t", 3)
+            yield kind, int(code), name, extra
+
+
+class EventJournalReader(object):
+    """
+    Reads the event journal as the numpy structured array (memory mapped) for the vectorized analytics. Torn record
+    at the end of the file is ignored.
+
+    Usage:
+        reader = EventJournalReader("events.bin")
+        fills = reader.select(event=FILL)
+        fills["amount"].sum()
+    """
+
+    def __init__(self, path: str):
+        import numpy as np  # imported on use, the journal writer does not need numpy
+
+        self.path = path
+        self.dtype = np.dtype([("timestamp", "<f8"), ("order", "<u4"), ("event", "u1"), ("a", "u1"), ("b", "u1"),
+                               ("flags", "u1"), ("amount", "<f8"), ("price", "<f8")])
+
+        size = os.path.getsize(path)
+        count = size // RECORD.size
+        self.events = np.memmap(path, dtype=self.dtype, mode="r", shape=(count,)) if count \
+            else np.zeros(0, dtype=self.dtype)
+
+        self.names = dict()  # kind -> {code: name}
+        self.symbols = dict()  # order code -> symbol
+        names_path = path + ".names"
+        if os.path.exists(names_path):
+            for kind, code, name, extra in _read_names(names_path):
+                self.names.setdefault(kind, dict())[code] = name
+                if kind == "order":
+                    self.symbols[code] = extra
+
+        self._order_codes = {order_id: code for code, order_id in self.names.get("order", dict()).items()}
+
+    def __len__(self):
+        return len(self.events)
+
+    def order_code(self, order_id: str):
+        return self._order_codes.get(order_id)
+
+    def name(self, kind: str, code: int):
+        return self.names.get(kind, dict()).get(int(code))
+
+    def select(self, event: int = None, order_id: str = None):
+        """
+        :return: structured array of the events of the type and/or of the order
+        """
+        mask = None
+        if event is not None:
+            mask = self.events["event"] == event
+
+        if order_id is not None:
+            order_code = self.order_code(order_id)
+            order_mask = self.events["order"] == (order_code or 0)
+            mask = order_mask if mask is None else mask & order_mask
+
+        return self.events[mask] if mask is not None else self.events
+
+    def counts(self):
+        """
+        :return: dict {event name: number of events}
+        """
+        import numpy as np
+
+        counts = np.bincount(self.events["event"], minlength=max(EVENT_NAMES) + 1)
+        return {name: int(counts[event]) for event, name in EVENT_NAMES.items()}
+
+    def transitions(self, order_id: str = None):
+        """
+        :return: list of (timestamp, order id, from state, to state). From state is None for the order's first state.
+        """
+        result = list()
+        for record in self.select(TRANSITION, order_id).tolist():
+            timestamp, order, event, a, b = record[:5]
+            result.append((timestamp, self.name("order", order), self.name("state", a), self.name("state", b)))
+
+        return result
+
+    def filled(self):
+        """
+        :return: dict {order id: total filled amount}
+        """
+        import numpy as np
+
+        fills = self.select(FILL)
+        totals = np.bincount(fills["order"], weights=fills["amount"])
+        return {self.name("order", code): total for code, total in enumerate(totals.tolist())
+                if self.name("order", code) is not None and total}
@@ -0,0 +1,133 @@
+class FillLedger(object):
+    """
+    Running totals of the action order's fills: previous trade orders' totals plus the fill of the active trade order.
+    update() is O(1) and does the work only if the trade order's fill changed since the previous update. The fill of the
+    previous trade order is added to the totals when update() gets the next trade order.
+
+    If the amount precision of the market is set, the base currency amounts are accumulated as integer number of lots
+    (10 ** -precision), so the filled amount is exact and the close check of the start amount does not depend on the
+    float rounding: the filled lots are compared with the start amount in lots for sell orders, buy orders (start
+    amount in quote currency) are filled when the rest of the start amount at the fills' price is zero lots.
+    """
+
+    def __init__(self, side: str, amount_precision: int = None):
+        """
+        :param side: "buy" or "sell"
+        :param amount_precision: number of decimals of the base currency amount (markets[symbol]["precision"]["amount"]
+        in ccxt) or None to accumulate floats
+        """
+        self.side = side
+        self.amount_precision = amount_precision
+        self._lot = 10 ** amount_precision if amount_precision is not None else None
+
+        self.updates = 0  # number of update() calls
+        self.changes = 0  # number of updates with changed fill
+
+        self.last_delta = 0.0  # change of the filled amount by the last changed update
+
+        self._prev_filled = 0  # previous trade orders totals (lots if amount precision is set)
+        self._prev_filled_start_amount = 0.0
+        self._prev_filled_dest_amount = 0.0
+
+        self._trade_order = None  # active trade order
+        self._filled = 0  # active trade order's fill (lots if amount precision is set)
+        self._filled_start_amount = 0.0
+        self._filled_dest_amount = 0.0
+
+    def _to_lots(self, amount: float):
+        return int(round(amount * self._lot)) if self._lot is not None else amount
+
+    def _from_lots(self, lots):
+        return lots / self._lot if self._lot is not None else lots
+
+    def update(self, trade_order):
+        """
+        reads the fill of the active trade order
+
+        :return: True if the fill was changed
+        """
+        self.updates += 1
+
+        filled = self._to_lots(trade_order.filled or 0.0)
+        filled_start_amount = trade_order.filled_start_amount or 0.0
+        filled_dest_amount = trade_order.filled_dest_amount or 0.0
+
+        if trade_order is self._trade_order and filled == self._filled \
+                and filled_start_amount == self._filled_start_amount \
+                and filled_dest_amount == self._filled_dest_amount:
+            return False
+
+        if trade_order is not self._trade_order:
+            # new trade order: move the previous trade order's fill to the closed trade orders totals
+            self._prev_filled += self._filled
+            self._prev_filled_start_amount += self._filled_start_amount
+            self._prev_filled_dest_amount += self._filled_dest_amount
+
+            self._trade_order = trade_order
+            self.last_delta = self._from_lots(filled)
+        else:
+            self.last_delta = self._from_lots(filled - self._filled)
+
+        self._filled = filled
+        self._filled_start_amount = filled_start_amount
+        self._filled_dest_amount = filled_dest_amount
+        self.changes += 1
+
+        return True
+
+    def previous_totals(self, trade_order):
+        """
+        :return: tuple of (filled, filled_start_amount, filled_dest_amount) totals of the trade orders except the
+        trade_order
+        """
+        if trade_order is not None and trade_order is self._trade_order:
+            return (self._from_lots(self._prev_filled), self._prev_filled_start_amount,
+                    self._prev_filled_dest_amount)
+
+        return self.filled, self.filled_start_amount, self.filled_dest_amount
+
+    @property
+    def filled(self):
+        return self._from_lots(self._prev_filled + self._filled)
+
+    @property
+    def filled_start_amount(self):
+        return self._prev_filled_start_amount + self._filled_start_amount
+
+    @property
+    def filled_dest_amount(self):
+        return self._prev_filled_dest_amount + self._filled_dest_amount
+
+    @property
+    def filled_price(self):
+        """
+        volume weighted price of all fills in quote currency or 0 if not filled
+        """
+        filled_start_amount, filled_dest_amount = self.filled_start_amount, self.filled_dest_amount
+        if not filled_start_amount or not filled_dest_amount:
+            return 0.0
+
+        if self.side == "buy":
+            return filled_start_amount / filled_dest_amount
+
+        return filled_dest_amount / filled_start_amount
+
+    def is_start_amount_filled(self, start_amount: float, tolerance: float = 0.00001):
+        """
+        :param start_amount: action order's start amount
+        :param tolerance: relative tolerance of the float comparison
+        :return: True if the filled start amount reached the start amount. Compared in lots if the amount precision is
+        set, the tolerance is used only for the float accounting.
+        """
+        if self._lot is None:
+            return self.filled_start_amount >= start_amount * (1 - tolerance)
+
+        if self.side == "sell":
+            return self._prev_filled + self._filled >= self._to_lots(start_amount)
+
+        # start amount in quote currency: filled if its rest at the fills' price rounds to zero lots
+        filled_price = self.filled_price
+        if not filled_price:
+            return start_amount <= 0
+
+        return self._to_lots((start_amount - self.filled_start_amount) / filled_price) < 1
@@ -0,0 +1,272 @@
+import bisect
+import functools
+import time
+
+from tkgpro.threshold_order.maker_stop_loss import MakerStopLossOrder
+from tkgpro.threshold_order.threshold_order import ThresholdRecoveryOrder
+from tkgpro.threshold_order.order_command import parse_order_command
+
+
+class Instrumentation(object):
+    """
+    Hot path instrumentation of the threshold orders' state machines:
+    - timings (count, total, max) of update_from_exchange, _on_open_order and _on_closed_order of every order class
+    - histograms of the time the orders dwell in every state (maker, taker, best_amount, market_price), from the
+    order's creation till it's closed (close_order, whatever closes the order) or removed from the manager
+    (remove_order, e.g. as on_order_removed callback of the executors for the failed orders)
+    - counts of the emitted commands (by kind, "hold tickers" for the commands requesting the tickers) and the added
+    tags
+
+    enable() wraps the methods of the order classes, disable() restores the original methods, so the disabled
+    instrumentation costs nothing. Only one instrumentation can be enabled at a time.
+
+    Usage:
+        from tkgpro.threshold_order import order_instrumentation
+        order_instrumentation.enable()
+        ...
+        order_instrumentation.snapshot()
+    """
+
+    METHODS = ("update_from_exchange", "_on_open_order", "_on_closed_order")
+
+    active = None  # enabled instrumentation
+
+    DWELL_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 600.0, 3600.0)
+    """
+    upper bounds (seconds) of the dwell time histogram buckets, the last bucket is for the longer times
+    """
+
+    def __init__(self, classes=(MakerStopLossOrder, ThresholdRecoveryOrder), clock=time.perf_counter):
+        """
+        :param classes: order classes to instrument
+        :param clock: monotonic clock in seconds
+        """
+        self.classes = classes
+        self.clock = clock
+
+        self.enabled = False
+
+        self._originals = list()  # (cls, name, original method)
+        self.reset()
+
+    def reset(self):
+        """
+        clears the collected data
+        """
+        self.timings = dict()  # "Class.method" -> [count, total, max]
+        self.dwell = dict()  # state -> [count, total, buckets counts]
+        self.commands = dict()  # command kind -> count
+        self.tags = dict()  # tag -> count
+
+        self._states = dict()  # order.id -> (state, time of entering the state)
+
+    def enable(self):
+        """
+        wraps the order classes' methods with the instrumentation
+        """
+        if self.enabled:
+            return
+
+        if Instrumentation.active is not None:
+            raise RuntimeError("Other instrumentation is enabled, disable it first")
+
+        for cls in self.classes:
+            original = cls.__dict__.get("__init__")
+            if original is not None:
+                self._originals.append((cls, "__init__", original))
+                setattr(cls, "__init__", self._wrap_init(original))
+
+            # inherited close_order is wrapped in the class and removed from it on disable()
+            self._originals.append((cls, "close_order", cls.__dict__.get("close_order")))
+            setattr(cls, "close_order", self._wrap_close(getattr(cls, "close_order")))
+
+            for name in self.METHODS:
+                original = cls.__dict__.get(name)
+                if original is None:
+                    continue
+
+                key = "{}.{}".format(cls.__name__, name)
+                wrapper = self._wrap_update(original, key) if name == "update_from_exchange" \
+                    else self._wrap_timing(original, key)
+
+                self._originals.append((cls, name, original))
+                setattr(cls, name, wrapper)
+
+        self.enabled = True
+        Instrumentation.active = self
+
+    def disable(self):
+        """
+        restores the original methods of the order classes. Collected data is kept.
+        """
+        for cls, name, original in reversed(self._originals):
+            if original is not None:
+                setattr(cls, name, original)
+            else:
+                delattr(cls, name)
+
+        self._originals = list()
+        self.enabled = False
+
+        if Instrumentation.active is self:
+            Instrumentation.active = None
+
+    @classmethod
+    def order_removed(cls, order):
+        """
+        called by the managers when the order is removed without being closed (cancelled, abandoned or failed orders)
+        """
+        if cls.active is not None:
+            cls.active.remove_order(order)
+
+    def remove_order(self, order):
+        """
+        finishes the dwell time of the order's current state and stops tracking the order
+        """
+        self._finish(order, self.clock())
+
+    def _finish(self, order, now: float):
+        tracked = self._states.pop(order.id, None)
+        if tracked is None:
+            return
+
+        state, entered = tracked
+        if order.state != state:
+            self._add_dwell(state, now - entered)
+            state, entered = order.state, now
+
+        self._add_dwell(state, now - entered)
+
+    def _add_timing(self, key: str, duration: float):
+        timing = self.timings.get(key)
+        if timing is None:
+            self.timings[key] = [1, duration, duration]
+            return
+
+        timing[0] += 1
+        timing[1] += duration
+        if duration > timing[2]:
+            timing[2] = duration
+
+    def _wrap_timing(self, method, key: str):
+        clock = self.clock
+
+        @functools.wraps(method)
+        def wrapper(order, *args, **kwargs):
+            start = clock()
+            try:
+                return method(order, *args, **kwargs)
+            finally:
+                self._add_timing(key, clock() - start)
+
+        return wrapper
+
+    def _wrap_init(self, method):
+        clock = self.clock
+
+        @functools.wraps(method)
+        def wrapper(order, *args, **kwargs):
+            method(order, *args, **kwargs)
+
+            # subclasses' constructors call the wrapped constructors of the base classes
+            if order.id not in self._states:
+                self._states[order.id] = (order.state, clock())
+
+        return wrapper
+
+    def _wrap_close(self, method):
+        clock = self.clock
+
+        @functools.wraps(method)
+        def wrapper(order, *args, **kwargs):
+            closed = order.status == "closed"
+            try:
+                return method(order, *args, **kwargs)
+            finally:
+                if not closed and order.status == "closed":
+                    self._finish(order, clock())
+
+        return wrapper
+
+    def _wrap_update(self, method, key: str):
+        clock = self.clock
+
+        @functools.wraps(method)
+        def wrapper(order, *args, **kwargs):
+            tags_count = len(order.tags)
+            tags = set(order.tags) if tags_count else set()
+
+            start = clock()
+            if order.id not in self._states and order.status != "closed":
+                # order was created before the instrumentation was enabled
+                self._states[order.id] = (order.state, start)
+
+            try:
+                return method(order, *args, **kwargs)
+            finally:
+                end = clock()
+                self._add_timing(key, end - start)
+                self._on_update(order, end, tags_count, tags)
+
+        return wrapper
+
+    def _on_update(self, order, now: float, tags_count: int, tags: set):
+        kind, symbol = parse_order_command(order.order_command)
+        kind = kind if symbol is None else kind + " tickers"
+        self.commands[kind] = self.commands.get(kind, 0) + 1
+
+        if len(order.tags) != tags_count:
+            for tag in set(order.tags) - tags:
+                self.tags[tag] = self.tags.get(tag, 0) + 1
+
+        if order.id not in self._states:
+            return  # closed order: dwell is finished by close_order
+
+        if order.status == "closed":  # closed without close_order
+            self._finish(order, now)
+            return
+
+        state, entered = self._states[order.id]
+        if order.state != state:
+            self._add_dwell(state, now - entered)
+            self._states[order.id] = (order.state, now)
+
+    def _add_dwell(self, state: str, duration: float):
+        dwell = self.dwell.get(state)
+        if dwell is None:
+            dwell = [0, 0.0, [0] * (len(self.DWELL_BUCKETS) + 1)]
+            self.dwell[state] = dwell
+
+        dwell[0] += 1
+        dwell[1] += duration
+        dwell[2][bisect.bisect_left(self.DWELL_BUCKETS, duration)] += 1
+
+    def snapshot(self):
+        """
+        :return: dict of the collected data:
+        {"enabled": bool,
+         "timings": {"Class.method": {"count", "total", "mean", "max"}},
+         "dwell": {state: {"count", "total", "mean", "histogram": {"<=bound": count, ..., ">last_bound": count}}},
+         "commands": {command kind: count},
+         "tags": {tag: count},
+         "tracked_orders": number of orders with the not finished dwell}
+        """
+        timings = {key: {"count": count, "total": total, "mean": total / count, "max": max_duration}
+                   for key, (count, total, max_duration) in self.timings.items()}
+
+        bucket_names = ["<={}".format(bound) for bound in self.DWELL_BUCKETS] + \
+                       [">{}".format(self.DWELL_BUCKETS[-1])]
+
+        dwell = {state: {"count": count, "total": total, "mean": total / count if count else 0.0,
+                         "histogram": dict(zip(bucket_names, buckets))}
+                 for state, (count, total, buckets) in self.dwell.items()}
+
+        return {"enabled": self.enabled,
+                "timings": timings,
+                "dwell": dwell,
+                "commands": dict(self.commands),
+                "tags": dict(self.tags),
+                "tracked_orders": len(self._states)}
+
+
+order_instrumentation = Instrumentation()
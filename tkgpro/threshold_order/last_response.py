@@ -0,0 +1,30 @@
+class LastResponse(object):
+    """
+    Fields of the last exchange response of the trade order, used by the threshold orders to detect the responses
+    which do not change anything (the same trade order with the same status and fill).
+    """
+
+    FIELDS = ("status", "filled", "remaining", "cost")
+
+    __slots__ = ("trade_order", "values")
+
+    def __init__(self):
+        self.trade_order = None
+        self.values = None
+
+    def remember(self, trade_order, resp: dict):
+        self.trade_order = trade_order
+        self.values = tuple(resp.get(field) for field in self.FIELDS) if resp is not None else None
+
+    def matches(self, trade_order, resp: dict):
+        """
+        :return: True if the response of the trade order has the same fields as the last one
+        """
+        if trade_order is not self.trade_order or resp is None or self.values is None:
+            return False
+
+        for field, value in zip(self.FIELDS, self.values):
+            if resp.get(field) != value:
+                return False
+
+        return True
@@ -1,6 +1,11 @@
 from ztom.trade_orders import TradeOrder
 from ztom.action_order import ActionOrder
 from ztom import core
+from tkgpro.threshold_order import price_levels
+from tkgpro.threshold_order.order_command import OrderCommands
+from tkgpro.threshold_order.check_cadence import CheckCadence, ticker_timestamp
+from tkgpro.threshold_order.last_response import LastResponse
+from tkgpro.threshold_order.market_index import MarketIndex, MarketRecord
 
 
 class MakerStopLossOrder(ActionOrder):
@@ -18,7 +23,13 @@ class MakerStopLossOrder(ActionOrder):
                  force_taker_updates: int = 500,
                  taker_price_threshold: float = -0.01,
                  taker_order_max_updates: int = 10,
-                 threshold_check_after_updates: int = 5):
+                 threshold_check_after_updates: int = 5,
+                 threshold_check_interval: int = 1,
+                 threshold_check_proximity: float = 0.0,
+                 taker_depth_pricing: bool = False,
+                 taker_depth_slippage: float = 0.0,
+                 markets: MarketIndex = None,
+                 market: MarketRecord = None):
         """
 
         :param symbol: pair symbol for order
@@ -35,6 +46,18 @@ class MakerStopLossOrder(ActionOrder):
         negative for changing price in a "bad" way
         :param threshold_check_after_updates: number of order's updates to start requesting ticker and check price
         threshold
+        :param threshold_check_interval: after threshold_check_after_updates check the price thresholds every
+        threshold_check_interval updates of the maker trade order
+        :param threshold_check_proximity: check the price thresholds on every update while the last checked price is
+        within this relative distance from the trigger price. 0 to disable.
+        :param taker_depth_pricing: price the taker orders by walking the order book depth from the market data (or
+        the bidVolume/askVolume of the ticker) to fill the remained amount in one trade order
+        :param taker_depth_slippage: relative worsening of the deepest known price when the known depth is less than
+        the remained amount (for the depth pricing)
+        :param markets: MarketIndex to take the minimum order amount of the symbol as the lowest cancel threshold and
+        to round the trade orders' prices to the symbol's price precision
+        :param market: MarketRecord of the symbol already resolved from the markets with the cancel_threshold derived
+        from it (by create_from_start_amounts). Resolved from the markets if not set.
         """
 
         self.maker_price_threshold = maker_price_threshold
@@ -44,12 +67,63 @@ class MakerStopLossOrder(ActionOrder):
         self.taker_price_threshold = taker_price_threshold
         self.taker_order_max_updates = taker_order_max_updates
         self.threshold_check_after_updates = threshold_check_after_updates
+        self.threshold_check_interval = threshold_check_interval
+        self.threshold_check_proximity = threshold_check_proximity
+        self.taker_depth_pricing = taker_depth_pricing
+        self.taker_depth_slippage = taker_depth_slippage
 
         self._total_maker_updates = 0
         """
         total updates in marker state
         """
 
+        self._commands = OrderCommands.get(symbol)
+        """
+        preallocated order commands for the symbol
+        """
+
+        self.maker_trigger_price = None
+        """
+        absolute maker price at which the maker_price_threshold is reached for the active trade order
+        """
+
+        self.taker_trigger_price = None
+        """
+        absolute taker price at which the taker_price_threshold is reached for the active trade order
+        """
+
+        self._near_trigger = False
+        """
+        last checked price was within threshold_check_proximity from the trigger price
+        """
+
+        self.cadence = CheckCadence()
+        """
+        suggested delay till the next price check from the distance to the trigger prices and the price volatility
+        """
+
+        self.trigger_book = None
+        """
+        PriceTriggerBook with the order's trigger prices, updated on every change of the trigger prices
+        """
+
+        self.short_circuited_updates = 0
+        """
+        number of updates which returned the previous command without evaluation because nothing has changed
+        """
+
+        self._last_response = LastResponse()
+        self._last_checked_prices = None  # (bid, ask) of the last price thresholds check without trigger
+
+        self.markets = markets
+
+        if market is None and markets is not None:
+            market = markets.get(symbol)
+            if market is not None:
+                cancel_threshold = market.cancel_threshold(cancel_threshold)
+
+        self._market = market  # MarketRecord of the symbol
+
         super().__init__(symbol, amount, price, side, cancel_threshold, taker_order_max_updates)
 
     @classmethod
@@ -60,7 +134,12 @@ class MakerStopLossOrder(ActionOrder):
                                  force_taker_updates: int = 500,
                                  taker_price_threshold: float = -0.01,
                                  taker_order_max_updates: int = 10,
-                                 threshold_check_after_updates: int = 5):
+                                 threshold_check_after_updates: int = 5,
+                                 threshold_check_interval: int = 1,
+                                 threshold_check_proximity: float = 0.0,
+                                 taker_depth_pricing: bool = False,
+                                 taker_depth_slippage: float = 0.0,
+                                 markets: MarketIndex = None):
 
         """
         :param symbol: pair symbol for order
@@ -78,11 +157,25 @@ class MakerStopLossOrder(ActionOrder):
         :param force_taker_updates: total number of updates to force the taker state
         :param threshold_check_after_updates: number of order's updates to start requesting ticker and check price
         threshold
+        :param threshold_check_interval: after threshold_check_after_updates check the price thresholds every
+        threshold_check_interval updates of the maker trade order
+        :param threshold_check_proximity: check the price thresholds on every update while the last checked price is
+        within this relative distance from the trigger price. 0 to disable.
+        :param taker_depth_pricing: price the taker orders by walking the order book depth from the market data (or
+        the bidVolume/askVolume of the ticker) to fill the remained amount in one trade order
+        :param taker_depth_slippage: relative worsening of the deepest known price when the known depth is less than
+        the remained amount (for the depth pricing)
+        :param markets: MarketIndex to take the minimum order amount of the symbol as the lowest cancel threshold and
+        to round the trade orders' prices to the symbol's price precision
         """
 
-        side = core.get_trade_direction_to_currency(symbol, dest_currency)
-
-        price = core.ticker_price_for_dest_amount(side, start_amount, target_amount)
+        if markets is not None:
+            side = markets.side(symbol, dest_currency)
+            price = markets.round_price(symbol, core.ticker_price_for_dest_amount(side, start_amount, target_amount))
+            cancel_threshold = markets.cancel_threshold(symbol, cancel_threshold)
+        else:
+            side = core.get_trade_direction_to_currency(symbol, dest_currency)
+            price = core.ticker_price_for_dest_amount(side, start_amount, target_amount)
 
         order = super().create_from_start_amount(symbol, start_currency, start_amount, dest_currency, price,
                                                  cancel_threshold)  # type: MakerStopLossOrder
@@ -93,23 +186,281 @@ class MakerStopLossOrder(ActionOrder):
         order.taker_price_threshold = taker_price_threshold
         order.taker_order_max_updates = taker_order_max_updates
         order.threshold_check_after_updates = threshold_check_after_updates
+        order.threshold_check_interval = threshold_check_interval
+        order.threshold_check_proximity = threshold_check_proximity
+        order.taker_depth_pricing = taker_depth_pricing
+        order.taker_depth_slippage = taker_depth_slippage
 
         order.force_taker_updates = force_taker_updates
 
+        order.markets = markets
+        order._market = markets.get(symbol) if markets is not None else None
+
+        order.update_trigger_prices()
+
         return order
 
+    @classmethod
+    def create_from_start_amounts(cls, symbols, start_currencies, start_amounts, dest_currencies, target_amounts,
+                                  cancel_threshold: float = 0.000001,
+                                  maker_price_threshold: float = -0.005,
+                                  maker_order_max_updates: int = 50,
+                                  force_taker_updates: int = 500,
+                                  taker_price_threshold: float = -0.01,
+                                  taker_order_max_updates: int = 10,
+                                  threshold_check_after_updates: int = 5,
+                                  threshold_check_interval: int = 1,
+                                  threshold_check_proximity: float = 0.0,
+                                  taker_depth_pricing: bool = False,
+                                  taker_depth_slippage: float = 0.0,
+                                  markets: MarketIndex = None):
+        """
+        Bulk version of create_from_start_amount for the columns of the recovery targets with the shared parameters.
+        The trade directions are resolved once per (symbol, dest currency), the market records and the cancel
+        thresholds once per symbol, prices (rounded by the symbols' price ticks) and amounts are calculated for all
+        orders at once and every order is constructed with its parameters in one call.
+
+        :param symbols: pair symbols of the orders
+        :param start_currencies: start currencies
+        :param start_amounts: amounts of the start currencies
+        :param dest_currencies: destination currencies
+        :param target_amounts: target amounts of the destination currencies
+        :return: list of MakerStopLossOrder in the order of the columns
+
+        Other parameters are the same as in create_from_start_amount and are applied to all orders. The directions
+        are resolved and the prices are rounded by the markets index if it's set.
+        """
+        import numpy as np  # imported on use, so the order module does not import numpy for the single orders
+
+        count = len(symbols)
+        if not (len(start_currencies) == len(start_amounts) == len(dest_currencies) == len(target_amounts) == count):
+            raise ValueError("Columns should have the same length")
+
+        directions = dict()  # (symbol, dest currency) -> side
+        symbol_ids = dict()  # symbol -> index in the unique symbols
+        sides = list()
+        rows_symbol_ids = list()
+        for symbol, dest_currency in zip(symbols, dest_currencies):
+            side = directions.get((symbol, dest_currency))
+            if side is None:
+                side = markets.side(symbol, dest_currency) if markets is not None \
+                    else core.get_trade_direction_to_currency(symbol, dest_currency)
+                if not side:
+                    raise ValueError("{} is not traded on {}".format(dest_currency, symbol))
+                directions[(symbol, dest_currency)] = side
+            sides.append(side)
+            rows_symbol_ids.append(symbol_ids.setdefault(symbol, len(symbol_ids)))
+
+        start_amounts = np.asarray(start_amounts, dtype=np.float64)
+        target_amounts = np.asarray(target_amounts, dtype=np.float64)
+        is_buy = np.array([side == "buy" for side in sides], dtype=np.bool_)
+
+        for name, column in (("start_amount", start_amounts), ("target_amount", target_amounts)):
+            invalid = np.flatnonzero(~(np.isfinite(column) & (column > 0)))
+            if len(invalid):
+                row = int(invalid[0])
+                raise ValueError("{} of the row {} ({}) should be positive: {}".format(name, row, symbols[row],
+                                                                                      column[row]))
+
+        prices = np.where(is_buy, start_amounts / target_amounts, target_amounts / start_amounts)
+
+        # market records and cancel thresholds by symbol
+        records = [markets.get(symbol) if markets is not None else None for symbol in symbol_ids]
+        cancel_thresholds = [record.cancel_threshold(cancel_threshold) if record is not None else cancel_threshold
+                             for record in records]
+
+        # MarketRecord.round_price for all orders: nearest tick rounded to the price precision (as np.round does)
+        ticks = np.array([record.price_tick if record is not None and record.price_tick is not None else np.nan
+                          for record in records], dtype=np.float64)
+        if not np.isnan(ticks).all():
+            scales = np.array([10.0 ** record.price_precision if record is not None and record.price_tick is not None
+                               else np.nan for record in records], dtype=np.float64)
+
+            rows_symbol_ids = np.array(rows_symbol_ids, dtype=np.int64)
+            tick, scale = ticks[rows_symbol_ids], scales[rows_symbol_ids]
+            rounded = np.rint(np.rint(prices / tick) * tick * scale) / scale
+            prices = np.where(np.isnan(tick), prices, rounded)
+
+        amounts = np.where(is_buy, start_amounts / prices, start_amounts)
+
+        orders = list()
+        for symbol, amount, price, side in zip(symbols, amounts.tolist(), prices.tolist(), sides):
+            symbol_id = symbol_ids[symbol]
+            orders.append(cls(symbol, amount, price, side, cancel_thresholds[symbol_id],
+                              maker_price_threshold=maker_price_threshold,
+                              maker_order_max_updates=maker_order_max_updates,
+                              force_taker_updates=force_taker_updates,
+                              taker_price_threshold=taker_price_threshold,
+                              taker_order_max_updates=taker_order_max_updates,
+                              threshold_check_after_updates=threshold_check_after_updates,
+                              threshold_check_interval=threshold_check_interval,
+                              threshold_check_proximity=threshold_check_proximity,
+                              taker_depth_pricing=taker_depth_pricing,
+                              taker_depth_slippage=taker_depth_slippage,
+                              markets=markets,
+                              market=records[symbol_id]))
+
+        return orders
+
+    def update_trigger_prices(self):
+        """
+        recalculates maker_trigger_price and taker_trigger_price from the active trade order's price and the price
+        thresholds. Called on every trade order creation, should be called if the thresholds were changed after that.
+        """
+        price = self.active_trade_order.price if self.active_trade_order is not None else None
+        self._set_trigger_prices(price)
+
+    def _set_trigger_prices(self, price):
+        self.maker_trigger_price = price_levels.trigger_price(self.side, price, self.maker_price_threshold)
+        self.taker_trigger_price = price_levels.trigger_price(self.side, price, self.taker_price_threshold)
+        self._near_trigger = False
+        self._last_checked_prices = None
+
+        if self.trigger_book is not None:
+            self.trigger_book.update_order(self)
+
+    def is_threshold_check_due(self, updates: int):
+        """
+        schedule of the price thresholds checks in the maker state. The tickers are requested on the update before
+        the check.
+
+        :param updates: number of updates of the active trade order
+        :return: True if the price thresholds should be checked on this update
+        """
+        if updates <= self.threshold_check_after_updates:
+            return False
+
+        if self.threshold_check_interval <= 1 or self._near_trigger:
+            return True
+
+        return (updates - self.threshold_check_after_updates - 1) % self.threshold_check_interval == 0
+
+    def _is_update_unchanged(self, resp, market_data):
+        """
+        :return: True if the update would not change anything except the update counters: the same response of the
+        open maker trade order, no updates limits are reached, the prices are the same as on the last thresholds check
+        and the command stays the same
+        """
+        trade_order = self.active_trade_order
+
+        if self.state != "maker" or trade_order is None or trade_order.status != "open" \
+                or (self.order_command is not self._commands.hold
+                    and self.order_command is not self._commands.hold_tickers):
+            return False
+
+        if not self._last_response.matches(trade_order, resp):
+            return False
+
+        updates = trade_order.update_requests_count + 1
+        if updates >= self.maker_order_max_updates or self._total_maker_updates + 1 >= self.force_taker_updates:
+            return False
+
+        if market_data is not None and self.is_threshold_check_due(updates):
+            ticker = market_data[0]
+            if ticker is None or (ticker.get("bid"), ticker.get("ask")) != self._last_checked_prices:
+                return False
+
+        if self.is_threshold_check_due(updates + 1):
+            return self.order_command is self._commands.hold_tickers
+
+        return self.order_command is self._commands.hold
+
+    def update_from_exchange(self, resp, market_data=None):
+        """
+        updates the order from the exchange response of the active trade order. If nothing has changed since the
+        previous update only the update counters (and the check cadence on the due price thresholds check) are updated
+        and the previous command is returned.
+        """
+        if self._is_update_unchanged(resp, market_data):
+            trade_order = self.active_trade_order
+            trade_order.update_requests_count += 1
+            self._total_maker_updates += 1
+            self.short_circuited_updates += 1
+
+            # same prices on the due check: only the cadence gets the ticker's timestamp
+            if market_data is not None and self.is_threshold_check_due(trade_order.update_requests_count):
+                self._update_cadence(*price_levels.ticker_prices(self.side, market_data[0]), market_data[0])
+
+            return self.order_command
+
+        trade_order = self.active_trade_order
+        super().update_from_exchange(resp, market_data)
+        self._last_response.remember(trade_order, resp)
+
+        return self.order_command
+
+    @property
+    def next_check_delay(self):
+        """
+        suggested delay in seconds till the next update of the order. Min delay of the cadence if not in maker state.
+        """
+        if self.state != "maker":
+            return self.cadence.min_delay
+
+        return self.cadence.delay
+
+    def _update_cadence(self, current_taker_price, current_maker_price, ticker):
+        headrooms = [h for h in (
+            price_levels.trigger_headroom(self.side, self.taker_trigger_price, current_taker_price),
+            price_levels.trigger_headroom(self.side, self.maker_trigger_price, current_maker_price)) if h is not None]
+
+        self.cadence.update(current_taker_price, min(headrooms) if headrooms else None, ticker_timestamp(ticker))
+
+    def _on_threshold_check(self, ticker, current_taker_price, current_maker_price):
+        """
+        updates the check cadence, the prices of the last check and the proximity flag on the scheduled price
+        thresholds check. Proximity flag is kept if the ticker has no prices.
+        """
+        self._update_cadence(current_taker_price, current_maker_price, ticker)
+        self._last_checked_prices = (ticker.get("bid"), ticker.get("ask")) if ticker is not None else None
+
+        if self.threshold_check_proximity > 0 and (current_taker_price > 0 or current_maker_price > 0):
+            self._near_trigger = \
+                price_levels.is_price_near_trigger(self.taker_trigger_price, current_taker_price,
+                                                   self.threshold_check_proximity) \
+                or price_levels.is_price_near_trigger(self.maker_trigger_price, current_maker_price,
+                                                      self.threshold_check_proximity)
+
+    def _force_taker(self):
+        self.tags.append("#force_taker_max_maker_updates")
+        self.state = "taker"
+        return self._commands.cancel_tickers
+
+    def _on_taker_price_triggered(self):
+        self.state = "taker"
+
+        if "#below_threshold_taker" not in self.tags:
+            self.tags.append("#below_threshold_taker_price")
+        return self._commands.cancel_tickers
+
+    def _on_maker_price_triggered(self):
+        self.state = "maker"
+
+        if "#below_threshold_maker" not in self.tags:
+            self.tags.append("#below_threshold_maker")
+        return self._commands.cancel_tickers
+
+    def _create_next_trade_order_for_remained_amount(self, price):
+        if self._market is not None:
+            price = self._market.round_price(price)
+
+        trade_order = super()._create_next_trade_order_for_remained_amount(price)
+        self._set_trigger_prices(trade_order.price)
+
+        return trade_order
+
     def _init(self):
         super()._init()
 
         self.status = "open"
         self.state = "maker"
-        self.order_command = "new"
+        self.order_command = self._commands.new
         self.active_trade_order.supplementary.update({"parent_action_order": {"state": self.state}})
 
     def _on_open_order(self, active_trade_order: TradeOrder, market_data=None):
 
         # let's start requesting the tickers
-        order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+        order_command = self._commands.hold_tickers
 
         # maker state
         if self.state == "maker":
@@ -120,60 +471,39 @@ class MakerStopLossOrder(ActionOrder):
             if self._total_maker_updates >= self.force_taker_updates \
                     and self.amount - self.filled > self.cancel_threshold:
 
-                self.tags.append("#force_taker_max_maker_updates")
-                self.state = "taker"
-                return "cancel tickers {symbol}".format(symbol=self.symbol)
+                return self._force_taker()
 
             # check if need to re-open maker order because of reaching single  maker order updates limit
             if active_trade_order.update_requests_count >= self.maker_order_max_updates \
                     and active_trade_order.amount - active_trade_order.filled > self.cancel_threshold:
-                return "cancel tickers {symbol}".format(symbol=self.symbol)
-
-            order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+                return self._commands.cancel_tickers
 
-            current_taker_price, current_maker_price = 0, 0
+            updates = active_trade_order.update_requests_count
 
-            # let's check if taker price below the thresholds
-            # current_taker_price, current_taker_price = 0, 0
-
-            # if there is no market data - just return default command
-            if market_data is not None:
+            # check the price thresholds only on the scheduled updates
+            if market_data is not None and self.is_threshold_check_due(updates):
                 try:
-                    ticker_info = core.get_symbol_order_price_from_tickers(self.start_currency,
-                                                                           self.dest_currency,
-                                                                           {self.symbol: market_data[0]})
-                    current_taker_price = ticker_info["price"]
-                    current_maker_price = ticker_info["maker_price"]
+                    current_taker_price, current_maker_price = price_levels.ticker_prices(self.side, market_data[0])
 
                 except Exception as e:
-                    order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+                    order_command = self._commands.hold_tickers
                     return order_command
 
-            # check taker price for both states
-            if current_taker_price > 0:
-                relative_price_diff = core.relative_target_price_difference(self.side, self.active_trade_order.price,
-                                                                            current_taker_price)
+                self._on_threshold_check(market_data[0], current_taker_price, current_maker_price)
 
-                if relative_price_diff is not None and relative_price_diff <= self.taker_price_threshold:
-                    order_command = "cancel tickers {symbol}".format(symbol=self.symbol)
-                    self.state = "taker"
+                # check taker price for both states
+                if price_levels.is_price_triggered(self.side, self.taker_trigger_price, current_taker_price):
+                    return self._on_taker_price_triggered()
 
-                    if "#below_threshold_taker" not in self.tags:
-                        self.tags.append("#below_threshold_taker_price")
-                    return order_command
+                # check maker price
+                if price_levels.is_price_triggered(self.side, self.maker_trigger_price, current_maker_price):
+                    return self._on_maker_price_triggered()
 
-            # check maker price
-            if current_maker_price > 0:
-                relative_price_diff = core.relative_target_price_difference(self.side, self.active_trade_order.price,
-                                                                            current_maker_price)
+            # request the tickers only for the update with scheduled price thresholds check
+            if not self.is_threshold_check_due(updates + 1):
+                return self._commands.hold
 
-                if relative_price_diff is not None and relative_price_diff <= self.maker_price_threshold:
-                    order_command = "cancel tickers {symbol}".format(symbol=self.active_trade_order.symbol)
-                    self.state = "maker"
-
-                    if "#below_threshold_maker" not in self.tags:
-                        self.tags.append("#below_threshold_maker")
-                    return order_command
+            return self._commands.hold_tickers
 
         if self.state == "taker":
 
@@ -182,16 +512,16 @@ class MakerStopLossOrder(ActionOrder):
                     and active_trade_order.amount - active_trade_order.filled > self.cancel_threshold:
 
                 self.stare = "taker"
-                return "cancel tickers {symbol}".format(symbol=self.symbol)
+                return self._commands.cancel_tickers
 
         return order_command
 
     def _on_closed_order(self, active_trade_order: TradeOrder, market_data=None):
 
-        self.order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+        self.order_command = self._commands.hold_tickers
 
         if self.filled_start_amount >= self.start_amount * 0.999:  # close order if filled amount is OK
-            self.order_command = ""
+            self.order_command = self._commands.none
             self._close_active_order()
             self.close_order()  # we just need to close ActionOrder, the trade order was closed above
             return self.order_command
@@ -209,13 +539,18 @@ class MakerStopLossOrder(ActionOrder):
         if self.state == "maker":
             self._close_active_order()
             self.active_trade_order = self._create_next_trade_order_for_remained_amount(current_maker_price)
-            self.order_command = "new tickers {symbol}".format(symbol=self.symbol)
+            self.order_command = self._commands.new_tickers
             return self.order_command
 
         if self.state == "taker":
+            if self.taker_depth_pricing:
+                current_taker_price = price_levels.depth_price(
+                    self.side, self.amount - self.filled, price_levels.taker_depth_levels(self.side, market_data),
+                    self.taker_depth_slippage) or current_taker_price
+
             self._close_active_order()
             self.active_trade_order = self._create_next_trade_order_for_remained_amount(current_taker_price)
-            self.order_command = "new tickers {symbol}".format(symbol=self.symbol)
+            self.order_command = self._commands.new_tickers
             return self.order_command
 
         return self.order_command
@@ -0,0 +1,449 @@
+import time
+
+import numpy as np
+
+from tkgpro.threshold_order.maker_stop_loss import MakerStopLossOrder
+from tkgpro.threshold_order.check_cadence import ticker_timestamp
+
+
+def _to_nan(value):
+    return np.nan if value is None else value
+
+
+def _to_none(value):
+    return None if np.isnan(value) else float(value)
+
+
+class MakerStopLossBatch(object):
+    """
+    Holds the thresholds, prices, sides and update counters of many MakerStopLossOrder in numpy arrays and evaluates
+    the open order rules (force taker, max maker/taker updates, maker and taker price thresholds with the
+    threshold_check_* schedule) for all of them in one vectorized pass per tickers snapshot.
+
+    Workflow:
+    - add open orders with add_order()
+    - call evaluate(tickers) on every tickers snapshot: every pass counts as one update of each order's active trade
+    order (same as MakerStopLossOrder._on_open_order being called from update_from_exchange)
+    - orders which got the "cancel" command are updated (state, tags, order_command) and are suspended in the batch
+    until their next trade order is created and refresh(order) is called
+    - remove closed orders with remove_order()
+
+    The check cadence, the prices of the last check and the proximity flag of the orders are also kept in the arrays
+    and are written back to the orders by sync_orders() and for the cancelled orders. State and tags of the cancelled
+    orders are set by the same MakerStopLossOrder helpers as on the order's own update.
+
+    Python work per pass is proportional to the number of distinct symbols and the number of orders which got the
+    "cancel" command, the rest is done by numpy.
+    """
+
+    STATE_MAKER = 0
+    STATE_TAKER = 1
+
+    COMMAND_NONE = 0
+    COMMAND_HOLD = 1
+    COMMAND_CANCEL = 2
+    COMMAND_HOLD_WITHOUT_TICKERS = 3
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: initial size of the arrays. Arrays are grown automatically.
+        """
+        self.orders = list()  # slot -> MakerStopLossOrder
+        self._slots = dict()  # order.id -> slot
+
+        self.symbols = list()  # symbol id -> symbol
+        self._symbol_ids = dict()  # symbol -> symbol id
+
+        self.commands = np.zeros(0, dtype=np.int8)
+        """
+        commands of the last evaluate() pass for every slot (COMMAND_NONE for suspended slots)
+        """
+
+        self._capacity = 0
+        self._allocate(max(capacity, 1))
+
+    def __len__(self):
+        return len(self.orders)
+
+    def _allocate(self, capacity: int):
+        size = len(self.orders)
+
+        def grow(array, dtype):
+            new_array = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                new_array[:size] = array[:size]
+            return new_array
+
+        self._symbol_id = grow(getattr(self, "_symbol_id", None), np.int32)
+        self._is_sell = grow(getattr(self, "_is_sell", None), np.bool_)
+        self._active = grow(getattr(self, "_active", None), np.bool_)
+        self._state = grow(getattr(self, "_state", None), np.int8)
+        self._near_trigger = grow(getattr(self, "_near_trigger", None), np.bool_)
+
+        self._maker_trigger_price = grow(getattr(self, "_maker_trigger_price", None), np.float64)
+        self._taker_trigger_price = grow(getattr(self, "_taker_trigger_price", None), np.float64)
+        self._cancel_threshold = grow(getattr(self, "_cancel_threshold", None), np.float64)
+        self._remained = grow(getattr(self, "_remained", None), np.float64)
+        self._trade_order_remained = grow(getattr(self, "_trade_order_remained", None), np.float64)
+        self._threshold_check_proximity = grow(getattr(self, "_threshold_check_proximity", None), np.float64)
+
+        # prices of the last thresholds check (nan if None), _checked is False if there were no prices checked
+        self._checked = grow(getattr(self, "_checked", None), np.bool_)
+        self._checked_bid = grow(getattr(self, "_checked_bid", None), np.float64)
+        self._checked_ask = grow(getattr(self, "_checked_ask", None), np.float64)
+
+        # CheckCadence parameters and state, nan for None
+        self._min_delay = grow(getattr(self, "_min_delay", None), np.float64)
+        self._max_delay = grow(getattr(self, "_max_delay", None), np.float64)
+        self._safety_factor = grow(getattr(self, "_safety_factor", None), np.float64)
+        self._smoothing = grow(getattr(self, "_smoothing", None), np.float64)
+        self._delay = grow(getattr(self, "_delay", None), np.float64)
+        self._headroom = grow(getattr(self, "_headroom", None), np.float64)
+        self._volatility = grow(getattr(self, "_volatility", None), np.float64)
+        self._last_price = grow(getattr(self, "_last_price", None), np.float64)
+        self._last_timestamp = grow(getattr(self, "_last_timestamp", None), np.float64)
+
+        self._maker_order_max_updates = grow(getattr(self, "_maker_order_max_updates", None), np.int64)
+        self._taker_order_max_updates = grow(getattr(self, "_taker_order_max_updates", None), np.int64)
+        self._force_taker_updates = grow(getattr(self, "_force_taker_updates", None), np.int64)
+        self._total_maker_updates = grow(getattr(self, "_total_maker_updates", None), np.int64)
+        self._trade_order_updates = grow(getattr(self, "_trade_order_updates", None), np.int64)
+        self._threshold_check_after_updates = grow(getattr(self, "_threshold_check_after_updates", None), np.int64)
+        self._threshold_check_interval = grow(getattr(self, "_threshold_check_interval", None), np.int64)
+
+        self._capacity = capacity
+
+    def _get_symbol_id(self, symbol: str):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self._symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def add_order(self, order: MakerStopLossOrder):
+        """
+        adds the order to the batch
+
+        :param order: open MakerStopLossOrder with active trade order
+        :return: slot of the order
+        """
+        if order.id in self._slots:
+            return self.refresh(order)
+
+        if len(self.orders) >= self._capacity:
+            self._allocate(self._capacity * 2)
+
+        slot = len(self.orders)
+        self.orders.append(order)
+        self._slots[order.id] = slot
+
+        self._symbol_id[slot] = self._get_symbol_id(order.symbol)
+        self._is_sell[slot] = order.side == "sell"
+
+        return self.refresh(order)
+
+    def refresh(self, order: MakerStopLossOrder):
+        """
+        re-reads the order's parameters, state and active trade order into the batch and resumes the evaluation of
+        the order if it was suspended. Should be called when the order got new trade order or was updated outside the
+        batch.
+
+        :param order: order from the batch
+        :return: slot of the order
+        """
+        slot = self._slots[order.id]
+        trade_order = order.active_trade_order
+
+        self._state[slot] = self.STATE_TAKER if order.state == "taker" else self.STATE_MAKER
+        self._cancel_threshold[slot] = order.cancel_threshold
+        self._maker_order_max_updates[slot] = order.maker_order_max_updates
+        self._taker_order_max_updates[slot] = order.taker_order_max_updates
+        self._force_taker_updates[slot] = order.force_taker_updates
+        self._total_maker_updates[slot] = order._total_maker_updates
+        self._remained[slot] = order.amount - order.filled
+        self._threshold_check_after_updates[slot] = order.threshold_check_after_updates
+        self._threshold_check_interval[slot] = order.threshold_check_interval
+        self._threshold_check_proximity[slot] = order.threshold_check_proximity
+        self._near_trigger[slot] = order._near_trigger
+
+        checked_prices = order._last_checked_prices
+        self._checked[slot] = checked_prices is not None
+        self._checked_bid[slot], self._checked_ask[slot] = \
+            [_to_nan(p) for p in checked_prices] if checked_prices is not None else (np.nan, np.nan)
+
+        cadence = order.cadence
+        self._min_delay[slot] = cadence.min_delay
+        self._max_delay[slot] = cadence.max_delay
+        self._safety_factor[slot] = cadence.safety_factor
+        self._smoothing[slot] = cadence.smoothing
+        self._delay[slot] = cadence.delay
+        self._headroom[slot] = _to_nan(cadence.headroom)
+        self._volatility[slot] = _to_nan(cadence.volatility)
+        self._last_price[slot] = _to_nan(cadence._last_price)
+        self._last_timestamp[slot] = _to_nan(cadence._last_timestamp)
+
+        if trade_order is not None and trade_order.status in ("new", "open"):
+            self._maker_trigger_price[slot] = order.maker_trigger_price or np.nan
+            self._taker_trigger_price[slot] = order.taker_trigger_price or np.nan
+            self._trade_order_remained[slot] = trade_order.amount - trade_order.filled
+            self._trade_order_updates[slot] = trade_order.update_requests_count
+            self._active[slot] = True
+        else:
+            self._active[slot] = False
+
+        return slot
+
+    def remove_order(self, order: MakerStopLossOrder):
+        """
+        removes the order from the batch. The last slot is moved to the place of removed one.
+
+        :param order: order from the batch
+        """
+        slot = self._slots.pop(order.id)
+        last = len(self.orders) - 1
+
+        if slot != last:
+            last_order = self.orders[last]
+            self.orders[slot] = last_order
+            self._slots[last_order.id] = slot
+
+            for array in self._arrays():
+                array[slot] = array[last]
+
+        self.orders.pop()
+
+    def _arrays(self):
+        return (self._symbol_id, self._is_sell, self._active, self._state, self._near_trigger,
+                self._maker_trigger_price, self._taker_trigger_price, self._cancel_threshold, self._remained,
+                self._trade_order_remained, self._threshold_check_proximity, self._maker_order_max_updates,
+                self._taker_order_max_updates, self._force_taker_updates, self._total_maker_updates,
+                self._trade_order_updates, self._threshold_check_after_updates, self._threshold_check_interval,
+                self._checked, self._checked_bid, self._checked_ask, self._min_delay, self._max_delay,
+                self._safety_factor, self._smoothing, self._delay, self._headroom, self._volatility,
+                self._last_price, self._last_timestamp)
+
+    def _symbols_tickers(self, tickers: dict):
+        """
+        :return: arrays by symbol id: has ticker flags, bid and ask prices of the tickers (nan if None) and timestamps
+        of the tickers in seconds (nan if not available)
+        """
+        has_ticker = np.zeros(len(self.symbols), dtype=np.bool_)
+        bids = np.full(len(self.symbols), np.nan, dtype=np.float64)
+        asks = np.full(len(self.symbols), np.nan, dtype=np.float64)
+        timestamps = np.full(len(self.symbols), np.nan, dtype=np.float64)
+
+        if tickers is None:
+            return has_ticker, bids, asks, timestamps
+
+        for symbol_id, symbol in enumerate(self.symbols):
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                continue
+
+            has_ticker[symbol_id] = True
+            bids[symbol_id] = _to_nan(ticker.get("bid"))
+            asks[symbol_id] = _to_nan(ticker.get("ask"))
+            timestamps[symbol_id] = _to_nan(ticker_timestamp(ticker))
+
+        return has_ticker, bids, asks, timestamps
+
+    def _is_threshold_check_due(self, updates, n: int):
+        """
+        vectorized MakerStopLossOrder.is_threshold_check_due
+        """
+        after = self._threshold_check_after_updates[:n]
+        interval = self._threshold_check_interval[:n]
+
+        return (updates > after) & ((interval <= 1) | self._near_trigger[:n]
+                                    | ((updates - after - 1) % np.maximum(interval, 1) == 0))
+
+    def evaluate(self, tickers: dict = None):
+        """
+        runs one update pass for all active orders of the batch
+
+        :param tickers: dict of tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :return: array of commands (COMMAND_*) for every slot, aligned with self.orders
+        """
+        n = len(self.orders)
+        active = self._active[:n]
+        is_sell = self._is_sell[:n]
+        state = self._state[:n]
+
+        maker = active & (state == self.STATE_MAKER)
+        taker = active & (state == self.STATE_TAKER)
+
+        trade_order_updates = self._trade_order_updates[:n]
+        total_maker_updates = self._total_maker_updates[:n]
+        trade_order_updates += active
+        total_maker_updates += maker
+
+        remained_above = self._remained[:n] > self._cancel_threshold[:n]
+        trade_order_remained_above = self._trade_order_remained[:n] > self._cancel_threshold[:n]
+
+        force_taker = maker & (total_maker_updates >= self._force_taker_updates[:n]) & remained_above
+
+        reset_maker = maker & ~force_taker & (trade_order_updates >= self._maker_order_max_updates[:n]) \
+            & trade_order_remained_above
+
+        check_prices = maker & ~force_taker & ~reset_maker
+        if tickers is not None:
+            check_prices &= self._is_threshold_check_due(trade_order_updates, n)
+        else:
+            check_prices[:] = False
+
+        has_tickers, bids, asks, timestamps = self._symbols_tickers(tickers)
+        symbol_id = self._symbol_id[:n]
+        raw_bid, raw_ask = bids[symbol_id], asks[symbol_id]
+
+        # not available price is 0 as in price_levels.ticker_prices
+        bid, ask = np.nan_to_num(raw_bid), np.nan_to_num(raw_ask)
+
+        # taker price is bid for sell and ask for buy orders, maker price vice versa
+        taker_price = np.where(is_sell, bid, ask)
+        maker_price = np.where(is_sell, ask, bid)
+
+        # trigger price is reached when the price falls to it for sell orders and rises to it for buy orders
+        sign = np.where(is_sell, 1.0, -1.0)
+
+        taker_trigger_price = self._taker_trigger_price[:n]
+        maker_trigger_price = self._maker_trigger_price[:n]
+
+        # MakerStopLossOrder._on_threshold_check for the checked orders
+        self._checked[:n][check_prices] = has_tickers[symbol_id][check_prices]
+        self._checked_bid[:n][check_prices] = raw_bid[check_prices]
+        self._checked_ask[:n][check_prices] = raw_ask[check_prices]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._update_cadence(check_prices, n, taker_price, maker_price, timestamps[symbol_id])
+
+            proximity = self._threshold_check_proximity[:n]
+            check_proximity = check_prices & (proximity > 0) & ((taker_price > 0) | (maker_price > 0))
+            if check_proximity.any():
+                near_taker = (taker_price > 0) & (np.abs(taker_price / taker_trigger_price - 1) <= proximity)
+                near_maker = (maker_price > 0) & (np.abs(maker_price / maker_trigger_price - 1) <= proximity)
+                self._near_trigger[:n][check_proximity] = (near_taker | near_maker)[check_proximity]
+
+        below_taker_threshold = check_prices & (taker_price > 0) \
+            & (sign * taker_price <= sign * taker_trigger_price)
+
+        below_maker_threshold = check_prices & ~below_taker_threshold & (maker_price > 0) \
+            & (sign * maker_price <= sign * maker_trigger_price)
+
+        reset_taker = taker & (trade_order_updates >= self._taker_order_max_updates[:n]) & trade_order_remained_above
+
+        cancel = force_taker | reset_maker | below_taker_threshold | below_maker_threshold | reset_taker
+
+        state[force_taker | below_taker_threshold] = self.STATE_TAKER
+
+        commands = np.where(active, self.COMMAND_HOLD, self.COMMAND_NONE).astype(np.int8)
+        # maker orders request the tickers only for the update with scheduled price thresholds check
+        commands[maker & ~self._is_threshold_check_due(trade_order_updates + 1, n)] = \
+            self.COMMAND_HOLD_WITHOUT_TICKERS
+        commands[cancel] = self.COMMAND_CANCEL
+        self.commands = commands
+
+        for slot in np.flatnonzero(cancel):
+            order = self.orders[slot]
+            self._write_back(slot, order)
+
+            if force_taker[slot]:
+                order.order_command = order._force_taker()
+            elif below_taker_threshold[slot]:
+                order.order_command = order._on_taker_price_triggered()
+            elif below_maker_threshold[slot]:
+                order.order_command = order._on_maker_price_triggered()
+            else:
+                order.order_command = order._commands.cancel_tickers
+
+        # wait for the next trade order of cancelled orders
+        active[cancel] = False
+
+        return commands
+
+    def _update_cadence(self, update, n: int, taker_price, maker_price, timestamp):
+        """
+        vectorized MakerStopLossOrder._update_cadence (CheckCadence.update) for the slots of update mask
+        """
+        is_sell = self._is_sell[:n]
+        taker_trigger_price = self._taker_trigger_price[:n]
+        maker_trigger_price = self._maker_trigger_price[:n]
+
+        def headroom(trigger, price):
+            return np.where(price > 0, np.where(is_sell, price / trigger - 1, 1 - price / trigger), np.nan)
+
+        # min of the available headrooms, nan if none
+        headroom = np.fmin(headroom(taker_trigger_price, taker_price), headroom(maker_trigger_price, maker_price))
+
+        # current time for the tickers without the timestamps
+        timestamp = np.where(np.isnan(timestamp), time.time(), timestamp)
+
+        last_price = self._last_price[:n]
+        last_timestamp = self._last_timestamp[:n]
+        volatility = self._volatility[:n]
+        smoothing = self._smoothing[:n]
+
+        has_price = update & (taker_price > 0)
+
+        changed = has_price & ~np.isnan(last_price) & (timestamp > last_timestamp)
+        change = np.abs(taker_price / last_price - 1) / np.sqrt(timestamp - last_timestamp)
+        volatility[:] = np.where(changed, np.where(np.isnan(volatility), change,
+                                                   volatility + smoothing * (change - volatility)), volatility)
+
+        newer = has_price & (np.isnan(last_timestamp) | (timestamp > last_timestamp))
+        last_price[newer] = taker_price[newer]
+        last_timestamp[newer] = timestamp[newer]
+
+        self._headroom[:n][update] = headroom[update]
+
+        # CheckCadence.suggest_delay
+        min_delay = self._min_delay[:n]
+        delay = np.minimum(self._max_delay[:n],
+                           np.maximum(min_delay, (headroom / volatility) ** 2 / self._safety_factor[:n]))
+        no_delay = np.isnan(headroom) | (headroom <= 0) | np.isnan(volatility) | (volatility == 0)
+        self._delay[:n][update] = np.where(no_delay, min_delay, delay)[update]
+
+    def _write_back(self, slot: int, order: MakerStopLossOrder):
+        """
+        writes the update counters, the proximity flag, the prices of the last check and the check cadence of the
+        slot to the order
+        """
+        order._total_maker_updates = int(self._total_maker_updates[slot])
+        order._near_trigger = bool(self._near_trigger[slot])
+        order._last_checked_prices = (_to_none(self._checked_bid[slot]), _to_none(self._checked_ask[slot])) \
+            if self._checked[slot] else None
+
+        cadence = order.cadence
+        cadence.delay = float(self._delay[slot])
+        cadence.headroom = _to_none(self._headroom[slot])
+        cadence.volatility = _to_none(self._volatility[slot])
+        cadence._last_price = _to_none(self._last_price[slot])
+        cadence._last_timestamp = _to_none(self._last_timestamp[slot])
+
+    def get_order_command(self, slot: int):
+        """
+        :return: order command string of the last evaluate() pass for the slot as MakerStopLossOrder would return it
+        """
+        command = self.commands[slot] if slot < len(self.commands) else self.COMMAND_NONE
+
+        if command == self.COMMAND_CANCEL:
+            return self.orders[slot]._commands.cancel_tickers
+
+        if command == self.COMMAND_HOLD:
+            return self.orders[slot]._commands.hold_tickers
+
+        if command == self.COMMAND_HOLD_WITHOUT_TICKERS:
+            return self.orders[slot]._commands.hold
+
+        return None
+
+    def sync_orders(self):
+        """
+        writes the update counters, the proximity flags, the prices of the last checks and the check cadences of the
+        batch back to the orders and their active trade orders
+        """
+        for slot, order in enumerate(self.orders):
+            self._write_back(slot, order)
+
+            if self._active[slot] and order.active_trade_order is not None:
+                order.active_trade_order.update_requests_count = int(self._trade_order_updates[slot])
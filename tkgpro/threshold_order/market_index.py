@@ -0,0 +1,188 @@
+import json
+import os
+from decimal import Decimal
+
+
+def _precision(value):
+    """
+    :param value: ccxt precision: number of decimals (integer value) or the tick size (for the exchanges with the tick
+    size precision mode)
+    :return: tuple of (number of decimals, tick size) or (None, None) if the precision is not set
+    """
+    if value is None:
+        return None, None
+
+    if float(value).is_integer():
+        decimals = int(value)
+        return decimals, 10 ** -decimals
+
+    tick = float(value)
+    return max(0, -Decimal(str(tick)).normalize().as_tuple().exponent), tick
+
+
+class MarketRecord(object):
+    """
+    Per-symbol facts from the ccxt market used by the threshold orders
+    """
+
+    __slots__ = ("symbol_id", "symbol", "base", "quote", "amount_min", "cost_min", "amount_precision", "amount_tick",
+                 "price_precision", "price_tick")
+
+    def __init__(self, symbol_id: int, market: dict):
+        """
+        :param symbol_id: id of the record in the MarketIndex
+        :param market: ccxt market dict (exchange.markets[symbol] or the value of markets.json)
+        """
+        limits = market.get("limits") or dict()
+        precision = market.get("precision") or dict()
+
+        self.symbol_id = symbol_id
+        self.symbol = market["symbol"]
+
+        if market.get("base") and market.get("quote"):
+            self.base, self.quote = market["base"], market["quote"]
+        else:
+            self.base, self.quote = self.symbol.split("/")
+
+        self.amount_min = (limits.get("amount") or dict()).get("min")
+        self.cost_min = (limits.get("cost") or dict()).get("min")
+
+        self.amount_precision, self.amount_tick = _precision(precision.get("amount"))
+        self.price_precision, self.price_tick = _precision(precision.get("price"))
+
+    def side(self, dest_currency: str):
+        """
+        :return: "buy" or "sell" to trade to dest_currency or False if the currency is not traded (as
+        core.get_trade_direction_to_currency)
+        """
+        if dest_currency == self.base:
+            return "buy"
+
+        if dest_currency == self.quote:
+            return "sell"
+
+        return False
+
+    def round_price(self, price: float):
+        """
+        :return: price rounded to the nearest tick or the price itself if the precision is not set
+        """
+        if self.price_tick is None or price is None:
+            return price
+
+        return round(round(price / self.price_tick) * self.price_tick, self.price_precision)
+
+    def cancel_threshold(self, cancel_threshold: float = 0.0):
+        """
+        :return: cancel threshold of the orders not less than the minimum order amount of the market
+        """
+        if self.amount_min is None:
+            return cancel_threshold
+
+        return max(cancel_threshold, self.amount_min)
+
+
+class MarketIndex(object):
+    """
+    Markets metadata indexed by symbol and by integer symbol id. Built once from markets.json (MarketIndex.load, the
+    index is cached for the process) or from the markets loaded by the exchange (MarketIndex(exchange.markets)).
+
+    Threshold orders created with the markets index derive the cancel threshold from the minimum order amount of the
+    market, round the trade orders' prices to the market's price precision and resolve the side by the market's
+    base and quote currencies.
+    """
+
+    _cache = dict()  # absolute file name -> MarketIndex
+
+    def __init__(self, markets: dict = None):
+        """
+        :param markets: dict of ccxt markets {symbol: market}
+        """
+        self.records = list()  # symbol id -> MarketRecord
+        self._symbol_ids = dict()  # symbol -> symbol id
+
+        for market in (markets or dict()).values():
+            self.add_market(market)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, symbol: str):
+        return symbol in self._symbol_ids
+
+    @classmethod
+    def load(cls, file_name: str):
+        """
+        :param file_name: markets json file (exchange.markets dumped to json)
+        :return: cached MarketIndex of the file, the file is read once per process
+        """
+        path = os.path.abspath(file_name)
+
+        index = cls._cache.get(path)
+        if index is None:
+            with open(path) as f:
+                index = cls(json.load(f))
+            cls._cache[path] = index
+
+        return index
+
+    def add_market(self, market: dict):
+        """
+        adds or replaces the market's record
+
+        :return: MarketRecord
+        """
+        symbol_id = self._symbol_ids.get(market["symbol"])
+        if symbol_id is None:
+            symbol_id = len(self.records)
+            self.records.append(None)
+            self._symbol_ids[market["symbol"]] = symbol_id
+
+        record = MarketRecord(symbol_id, market)
+        self.records[symbol_id] = record
+        return record
+
+    def symbol_id(self, symbol: str):
+        """
+        :return: id of the symbol or None if the symbol is not in the index
+        """
+        return self._symbol_ids.get(symbol)
+
+    def get(self, symbol: str):
+        """
+        :return: MarketRecord of the symbol or None
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        return self.records[symbol_id] if symbol_id is not None else None
+
+    def get_by_id(self, symbol_id: int):
+        """
+        :return: MarketRecord of the symbol id
+        """
+        return self.records[symbol_id]
+
+    def side(self, symbol: str, dest_currency: str):
+        """
+        :return: "buy" or "sell" to trade to dest_currency on the symbol or False if the currency is not traded. The
+        symbol is split if it's not in the index.
+        """
+        record = self.get(symbol)
+        if record is not None:
+            return record.side(dest_currency)
+
+        base, quote = symbol.split("/")
+        return "buy" if dest_currency == base else "sell" if dest_currency == quote else False
+
+    def round_price(self, symbol: str, price: float):
+        """
+        :return: price rounded to the symbol's price precision or the price itself if the symbol is not in the index
+        """
+        record = self.get(symbol)
+        return record.round_price(price) if record is not None else price
+
+    def cancel_threshold(self, symbol: str, cancel_threshold: float = 0.0):
+        """
+        :return: cancel threshold not less than the symbol's minimum order amount
+        """
+        record = self.get(symbol)
+        return record.cancel_threshold(cancel_threshold) if record is not None else cancel_threshold
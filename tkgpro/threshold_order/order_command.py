@@ -0,0 +1,92 @@
+class OrderCommand(str):
+    """
+    Order command returned by the threshold orders. The value of the command is the legacy command string
+    ("hold tickers ETH/BTC") understood by ActionOrderManager, while the kind of the command and the symbol for the
+    tickers request are available as attributes without parsing the string.
+    """
+
+    NONE = ""
+    NEW = "new"
+    HOLD = "hold"
+    CANCEL = "cancel"
+
+    def __new__(cls, kind: str, symbol: str = None):
+        """
+        :param kind: one of NONE, NEW, HOLD, CANCEL
+        :param symbol: symbol to request the tickers for or None if tickers are not requested
+        """
+        value = kind if symbol is None else "{kind} tickers {symbol}".format(kind=kind, symbol=symbol)
+
+        command = super().__new__(cls, value)
+        command.kind = kind
+        command.symbol = symbol
+        command.request_tickers = symbol is not None
+
+        return command
+
+    def __reduce__(self):
+        return self.__class__, (self.kind, self.symbol)
+
+
+class OrderCommands(object):
+    """
+    Preallocated commands for the symbol. Instances are shared by all the orders of the same symbol, so setting the
+    command of an order does not allocate or format anything.
+    """
+
+    _cache = dict()  # symbol -> OrderCommands
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+        self.none = OrderCommand(OrderCommand.NONE)
+        self.new = OrderCommand(OrderCommand.NEW)
+        self.hold = OrderCommand(OrderCommand.HOLD)
+        self.cancel = OrderCommand(OrderCommand.CANCEL)
+
+        self.new_tickers = OrderCommand(OrderCommand.NEW, symbol)
+        self.hold_tickers = OrderCommand(OrderCommand.HOLD, symbol)
+        self.cancel_tickers = OrderCommand(OrderCommand.CANCEL, symbol)
+
+    @classmethod
+    def get(cls, symbol: str):
+        """
+        :return: cached OrderCommands for the symbol
+        """
+        commands = cls._cache.get(symbol)
+        if commands is None:
+            commands = cls(symbol)
+            cls._cache[symbol] = commands
+        return commands
+
+    def get_command(self, command):
+        """
+        :param command: OrderCommand or legacy order command string of the same symbol
+        :return: preallocated command equal to the command or the command itself if it's not preallocated (or None)
+        """
+        if command is None:
+            return None
+
+        kind, symbol = parse_order_command(command)
+        if symbol is not None and symbol != self.symbol:
+            return command
+
+        name = (kind or "none") + ("_tickers" if symbol is not None else "")
+        return getattr(self, name, command)
+
+
+def parse_order_command(command):
+    """
+    :param command: OrderCommand or legacy order command string ("hold tickers ETH/BTC", "new", "")
+    :return: tuple of (command kind, symbol to request the tickers for or None)
+    """
+    if isinstance(command, OrderCommand):
+        return command.kind, command.symbol
+
+    if not command:
+        return OrderCommand.NONE, None
+
+    parts = command.split(" ")
+    symbol = parts[2] if len(parts) > 2 and parts[1] == "tickers" else None
+
+    return parts[0], symbol
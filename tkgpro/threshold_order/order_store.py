@@ -0,0 +1,592 @@
+import gc
+import os
+import pickle
+import struct
+import zlib
+from collections import deque
+
+from tkgpro.threshold_order.order_command import OrderCommands
+
+TRANSIENT_ATTRIBUTES = ("trigger_book", "markets", "_market", "_commands")
+"""
+attributes of the orders not stored in the snapshot: shared objects re-attached on restore
+"""
+
+_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+
+_FULL = 0  # journal record of the order's snapshot
+_DELTA = 1  # journal record of the order's changed fields
+
+_PRIMITIVES = (bool, int, float, str, bytes)
+_CONTAINERS = (list, tuple, dict, set, deque)
+
+_DELETED = "__deleted__"  # delta value of the removed field
+
+
+def snapshot_order(order):
+    """
+    :param order: ThresholdRecoveryOrder or MakerStopLossOrder
+    :return: tuple of (order class, order's state dict without the transient attributes), picklable
+    """
+    state = dict(order.__dict__)
+    for name in TRANSIENT_ATTRIBUTES:
+        state.pop(name, None)
+
+    return order.__class__, state
+
+
+def restore_order(snapshot, markets=None):
+    """
+    :param snapshot: tuple of (order class, state) from snapshot_order
+    :param markets: MarketIndex to re-attach to the orders (if the orders were created with the markets index)
+    :return: order in the state of the snapshot without the trigger book
+    """
+    cls, state = snapshot
+
+    order = cls.__new__(cls)
+    order.__dict__.update(state)
+
+    order._commands = OrderCommands.get(order.symbol)
+    order.order_command = order._commands.get_command(order.order_command)  # the orders compare commands by identity
+    order.trigger_book = None
+    order.markets = markets
+    order._market = markets.get(order.symbol) if markets is not None else None
+
+    return order
+
+
+class _Ref(object):
+    """
+    reference to the trade order by internal_id: the trade order which is already in the journaled state is not
+    written again
+    """
+
+    __slots__ = ("internal_id",)
+
+    def __init__(self, internal_id):
+        self.internal_id = internal_id
+
+    def __eq__(self, other):
+        return isinstance(other, _Ref) and other.internal_id == self.internal_id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.internal_id)
+
+
+class _Node(object):
+    """
+    field token of the nested object (trade order, cadence, fill ledger...) which attributes are journaled as separate
+    fields
+    """
+
+    __slots__ = ("cls", "internal_id")
+
+    def __init__(self, cls, internal_id):
+        self.cls = cls
+        self.internal_id = internal_id
+
+    def __eq__(self, other):
+        return isinstance(other, _Node) and other.cls is self.cls and other.internal_id == self.internal_id
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class _Pickled(object):
+    """
+    field token of the other values, compared by the pickled bytes
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, value):
+        self.data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def __eq__(self, other):
+        return isinstance(other, _Pickled) and other.data == self.data
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class _History(object):
+    """
+    field token of the trade orders history: internal ids of the trade orders
+    """
+
+    __slots__ = ("ids",)
+
+    def __init__(self, trade_orders):
+        self.ids = tuple(trade_order.internal_id for trade_order in trade_orders)
+
+    def __eq__(self, other):
+        return isinstance(other, _History) and other.ids == self.ids
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class _Appended(object):
+    """
+    delta value of the trade orders history: trade orders (or references) appended since the journaled state
+    """
+
+    __slots__ = ("trade_orders",)
+
+    def __init__(self, trade_orders):
+        self.trade_orders = trade_orders
+
+    def __getstate__(self):
+        return self.trade_orders
+
+    def __setstate__(self, state):
+        self.trade_orders = state
+
+
+def _attributes(value):
+    """
+    :return: dict of the attributes of the nested object or None if the value is stored as a whole
+    """
+    if value is None or isinstance(value, _PRIMITIVES) or isinstance(value, _CONTAINERS):
+        return None
+
+    attributes = dict(getattr(value, "__dict__", ()))
+    for cls in type(value).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if name != "__dict__" and hasattr(value, name):
+                attributes[name] = getattr(value, name)
+
+    return attributes or None
+
+
+def _token(value):
+    if value is None or isinstance(value, _PRIMITIVES):
+        return value
+
+    internal_id = getattr(value, "internal_id", None)
+    if internal_id is not None:
+        return _Ref(internal_id)  # aliases of the trade order (last response, fill ledger)
+
+    return _Pickled(value)
+
+
+def _changed(old, new):
+    return old is not new and (type(old) is not type(new) or old != new)
+
+
+def order_fields(order):
+    """
+    :return: dict {field: token} of the order's state without the transient attributes. Nested objects' attributes
+    are the separate (attribute, nested attribute) fields, so the delta of the order's update has only the changed
+    values.
+    """
+    fields = dict()
+    for name, value in order.__dict__.items():
+        if name in TRANSIENT_ATTRIBUTES:
+            continue
+
+        if name == "orders_history":
+            fields[name] = _History(value)
+            continue
+
+        attributes = _attributes(value)
+        if attributes is None:
+            fields[name] = _token(value)
+            continue
+
+        fields[name] = _Node(type(value), getattr(value, "internal_id", None))
+        for attribute, attribute_value in attributes.items():
+            fields[(name, attribute)] = _token(attribute_value)
+
+    return fields
+
+
+def _find_trade_order(order, internal_id):
+    """
+    :return: trade order with the internal_id from the order's history or the nested objects' references
+    """
+    for trade_order in order.orders_history:
+        if trade_order.internal_id == internal_id:
+            return trade_order
+
+    for name, value in order.__dict__.items():
+        attributes = _attributes(value) if name not in TRANSIENT_ATTRIBUTES else None
+        for attribute_value in (attributes or {}).values():
+            if getattr(attribute_value, "internal_id", None) == internal_id:
+                return attribute_value
+
+    return None
+
+
+def order_delta(order, journaled: dict, fields: dict):
+    """
+    :param order: order
+    :param journaled: fields of the journaled state of the order
+    :param fields: current fields of the order (order_fields)
+    :return: dict {field: value} of the changed fields. The trade orders of the journaled state are referenced by id.
+    """
+    known = set(journaled["orders_history"].ids) if "orders_history" in journaled else set()
+    active = journaled.get("active_trade_order")
+    if isinstance(active, _Node) and active.internal_id is not None:
+        known.add(active.internal_id)
+
+    def value(v):
+        internal_id = getattr(v, "internal_id", None)
+        return _Ref(internal_id) if internal_id is not None and internal_id in known else v
+
+    state = order.__dict__
+    delta = dict()
+    replaced = set()  # nested objects written as a whole
+
+    for field, token in fields.items():
+        if not isinstance(field, str) or not _changed(journaled.get(field, _DELETED), token):
+            continue
+
+        if field == "orders_history":
+            history, ids = state[field], token.ids
+            journaled_ids = journaled[field].ids if field in journaled else ()
+            journaled_set = set(journaled_ids)
+            kept = len([i for i in ids if i in journaled_set])
+
+            # appended trade orders (history with maxlen drops the oldest ones), otherwise the whole history
+            if kept < len(ids) and (kept == len(journaled_ids) or getattr(history, "maxlen", None)) \
+                    and ids[:kept] == journaled_ids[len(journaled_ids) - kept:]:
+                delta[field] = _Appended([value(t) for t in list(history)[kept:]])
+            else:
+                delta[field] = history
+            continue
+
+        if isinstance(token, _Node) and isinstance(journaled.get(field), _Node) \
+                and token.cls is journaled[field].cls and token.internal_id == journaled[field].internal_id:
+            continue  # the same nested object: changed attributes are written below
+
+        delta[field] = value(state[field])
+        if isinstance(token, _Node):
+            replaced.add(field)
+
+    for field, token in fields.items():
+        if isinstance(field, str) or field[0] in replaced or not _changed(journaled.get(field, _DELETED), token):
+            continue
+
+        delta[field] = value(getattr(state[field[0]], field[1]))
+
+    for field in journaled:
+        if field not in fields and (isinstance(field, str) or field[0] not in replaced):
+            delta[field] = _DELETED
+
+    # the replaced trade order (moved to the history) is referenced: its changes since the journaled state
+    for field in replaced:
+        internal_id = journaled[field].internal_id if isinstance(journaled.get(field), _Node) else None
+        trade_order = _find_trade_order(order, internal_id) if internal_id is not None else None
+        if trade_order is None:
+            continue
+
+        for attribute, attribute_value in _attributes(trade_order).items():
+            if _changed(journaled.get((field, attribute), _DELETED), _token(attribute_value)):
+                delta[(_Ref(internal_id), attribute)] = value(attribute_value)
+
+    return delta
+
+
+def apply_delta(state: dict, delta: dict):
+    """
+    applies the delta of order_delta to the order's state dict of the snapshot
+    """
+    trade_orders = dict()  # internal_id -> trade order of the journaled state
+    for trade_order in list(state.get("orders_history") or ()) + [state.get("active_trade_order")]:
+        if trade_order is not None:
+            trade_orders[trade_order.internal_id] = trade_order
+
+    def value(v):
+        return trade_orders[v.internal_id] if isinstance(v, _Ref) else v
+
+    for field, v in delta.items():
+        if not isinstance(field, str):
+            continue
+
+        if isinstance(v, str) and v == _DELETED:
+            state.pop(field, None)
+        elif isinstance(v, _Appended):
+            for trade_order in v.trade_orders:
+                state[field].append(value(trade_order))  # as the order appends (compact history drops the details)
+        else:
+            state[field] = value(v)
+
+    for field, v in delta.items():
+        if isinstance(field, str):
+            continue
+
+        name, attribute = field
+        target = trade_orders[name.internal_id] if isinstance(name, _Ref) else state[name]
+        if isinstance(v, str) and v == _DELETED:
+            delattr(target, attribute)
+        else:
+            setattr(target, attribute, value(v))
+
+
+def _write_record(f, payload: bytes):
+    f.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+    f.write(payload)
+
+
+def _read_records(f):
+    """
+    :return: generator of (offset of the record's end, payload) of the valid records. Stops on the first torn or
+    corrupted record.
+    """
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+
+        length, crc = _HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+
+        yield f.tell(), payload
+
+
+class OrderStore(object):
+    """
+    Persistent state of the in-flight threshold orders in the directory:
+    - checkpoint.bin: snapshots of all orders at the checkpoint
+    - journal.bin: append-only records of the orders' changes after the checkpoint
+
+    The journal record is written on the order's changes (state, status, command, fills, active trade order, tags),
+    the updates which change only the update counters are not journaled till the next change or checkpoint. The record
+    has only the fields changed since the order's last journaled state (order_delta), so its size does not grow with
+    the order's history: trade orders already journaled are referenced by internal_id. The order which has no
+    journaled state in this store (new order or the store written without restore()) is written as the snapshot.
+    checkpoint() writes all orders and truncates the journal. Every record has the sequence number, so the records
+    older than the checkpoint are skipped if the process stopped between the checkpoint and the journal truncation.
+    Torn record at the end of the journal (process stopped while writing) is dropped.
+
+    Usage:
+        store = OrderStore("orders_state")
+        orders = store.restore()  # in-flight orders from the previous run
+        ...
+        order.update_from_exchange(resp, market_data)
+        store.update(order)
+        ...
+        store.checkpoint(orders)  # periodically
+    """
+
+    CHECKPOINT = "checkpoint.bin"
+    JOURNAL = "journal.bin"
+
+    def __init__(self, path: str, checkpoint_records: int = 10000, sync: bool = False):
+        """
+        :param path: directory of the store, created if not exists
+        :param checkpoint_records: number of the journal records after which is_checkpoint_due is True
+        :param sync: fsync the journal on every record and the checkpoint file (durable against the OS crash, slower)
+        """
+        self.path = path
+        self.checkpoint_records = checkpoint_records
+        self.sync = sync
+
+        os.makedirs(path, exist_ok=True)
+
+        self.seq = 0  # sequence number of the last written record
+        self.records = 0  # journal records after the last checkpoint
+        self._loaded = False  # seq and records are loaded from the existing store
+
+        self._keys = dict()  # order.id -> key of the last journaled state
+        self._fields = dict()  # order.id -> order_fields of the last journaled state
+        self._journal = None
+
+    @property
+    def checkpoint_file(self):
+        return os.path.join(self.path, self.CHECKPOINT)
+
+    @property
+    def journal_file(self):
+        return os.path.join(self.path, self.JOURNAL)
+
+    @property
+    def is_checkpoint_due(self):
+        return self.records >= self.checkpoint_records
+
+    @staticmethod
+    def order_key(order):
+        """
+        :return: tuple of the order's fields which changes are journaled
+        """
+        trade_order = order.active_trade_order
+        trade_order_key = (trade_order.internal_id, trade_order.status, trade_order.filled) \
+            if trade_order is not None else None
+
+        return (order.state, order.status, order.order_command, order.filled, trade_order_key, len(order.tags),
+                len(order.orders_history))
+
+    def _open_journal(self, offset: int = None):
+        if self._journal is None:
+            self._journal = open(self.journal_file, "ab")
+            if offset is not None:
+                self._journal.truncate(offset)  # drop the torn record
+
+        return self._journal
+
+    def _flush(self, f):
+        f.flush()
+        if self.sync:
+            os.fsync(f.fileno())
+
+    def _open_store(self):
+        """
+        continues the sequence numbers and the journal (without the torn record) of the existing store
+
+        :return: dict {order.id: snapshot} of the stored orders
+        """
+        snapshots, self.seq, self.records, journal_offset = self._scan()
+
+        self._close_journal()
+        self._open_journal(journal_offset)
+        self._loaded = True
+
+        return snapshots
+
+    def _load(self):
+        # the store written before restore() continues the existing sequence numbers, otherwise the new records could
+        # be skipped as older than the checkpoint
+        if not self._loaded:
+            self._open_store()
+
+    def record(self, order):
+        """
+        appends the order's changed fields (or the snapshot of the order without the journaled state) to the journal
+        """
+        self._load()
+        self.seq += 1
+
+        fields = order_fields(order)
+        journaled = self._fields.get(order.id)
+        if journaled is None:
+            payload = pickle.dumps((self.seq, _FULL, snapshot_order(order)), pickle.HIGHEST_PROTOCOL)
+        else:
+            payload = pickle.dumps((self.seq, _DELTA, (order.id, order_delta(order, journaled, fields))),
+                                   pickle.HIGHEST_PROTOCOL)
+
+        journal = self._open_journal()
+        _write_record(journal, payload)
+        self._flush(journal)
+
+        self.records += 1
+        self._keys[order.id] = self.order_key(order)
+        self._fields[order.id] = fields
+
+    def update(self, order):
+        """
+        journals the order if it was changed since the last journaled state
+
+        :return: True if the order was journaled
+        """
+        if self._keys.get(order.id) == self.order_key(order):
+            return False
+
+        self.record(order)
+        return True
+
+    def checkpoint(self, orders):
+        """
+        writes the snapshots of the orders as the new checkpoint and truncates the journal
+
+        :param orders: all in-flight orders
+        """
+        self._load()
+        self.seq += 1
+        payload = pickle.dumps((self.seq, [snapshot_order(order) for order in orders]), pickle.HIGHEST_PROTOCOL)
+
+        tmp_file = self.checkpoint_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            _write_record(f, payload)
+            self._flush(f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+        journal = self._open_journal()
+        journal.truncate(0)
+        self._flush(journal)
+
+        self.records = 0
+        self._keys = {order.id: self.order_key(order) for order in orders}
+        self._fields = {order.id: order_fields(order) for order in orders}
+
+    def restore(self, markets=None, include_closed: bool = False):
+        """
+        loads the orders from the checkpoint and replays the journal. The store continues the journal of the restored
+        state.
+
+        :param markets: MarketIndex to re-attach to the orders
+        :param include_closed: return the closed orders too
+        :return: list of the orders in the order of their first appearance
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()  # unpickling creates many objects without garbage, the collections only slow it down
+        try:
+            return self._restore(markets, include_closed)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _scan(self):
+        """
+        reads the checkpoint and the journal records newer than the checkpoint
+
+        :return: tuple of (dict {order.id: snapshot}, last sequence number, number of the journal records, offset of
+        the journal's valid records end)
+        """
+        snapshots = dict()  # order.id -> snapshot
+        checkpoint_seq = 0
+
+        if os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file, "rb") as f:
+                for offset, payload in _read_records(f):
+                    checkpoint_seq, checkpoint_snapshots = pickle.loads(payload)
+                    for snapshot in checkpoint_snapshots:
+                        snapshots[snapshot[1]["id"]] = snapshot
+
+        seq = checkpoint_seq
+        journal_offset = 0
+        records = 0
+
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, "rb") as f:
+                for journal_offset, payload in _read_records(f):
+                    record_seq, kind, record = pickle.loads(payload)
+                    if record_seq <= checkpoint_seq:
+                        continue
+
+                    seq = max(seq, record_seq)
+                    records += 1
+
+                    if kind == _FULL:
+                        snapshots[record[1]["id"]] = record
+                    else:
+                        order_id, delta = record
+                        if order_id in snapshots:
+                            apply_delta(snapshots[order_id][1], delta)
+
+        return snapshots, seq, records, journal_offset
+
+    def _restore(self, markets, include_closed: bool):
+        snapshots = self._open_store()
+
+        orders = [restore_order(snapshot, markets) for snapshot in snapshots.values()]
+        self._keys = {order.id: self.order_key(order) for order in orders}
+        self._fields = {order.id: order_fields(order) for order in orders}
+
+        if not include_closed:
+            orders = [order for order in orders if order.status != "closed"]
+
+        return orders
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        self._close_journal()
@@ -0,0 +1,150 @@
+"""
+Absolute price levels of the relative price thresholds used by the threshold orders.
+
+The relative difference between the order's price and current price (ztom.core.relative_target_price_difference) is
+current/order - 1 for "sell" and 1 - current/order for "buy" orders, so the threshold (negative for the price
+changing in a "bad" way) is reached when:
+- "sell": current price <= order price * (1 + threshold)
+- "buy": current price >= order price * (1 - threshold)
+"""
+
+
+def trigger_price(side: str, order_price: float, threshold: float):
+    """
+    :param side: "buy" or "sell"
+    :param order_price: price of the order
+    :param threshold: relative price threshold
+    :return: absolute price at which the relative price difference reaches the threshold or None
+    """
+    if not order_price:
+        return None
+
+    if side == "sell":
+        return order_price * (1 + threshold)
+
+    if side == "buy":
+        return order_price * (1 - threshold)
+
+    return None
+
+
+def is_price_triggered(side: str, trigger: float, current_price: float):
+    """
+    :param side: "buy" or "sell"
+    :param trigger: trigger price from trigger_price()
+    :param current_price: current price. Not positive price is treated as not available.
+    :return: True if current price reached the trigger price
+    """
+    if trigger is None or not current_price or current_price <= 0:
+        return False
+
+    if side == "sell":
+        return current_price <= trigger
+
+    return current_price >= trigger
+
+
+def trigger_headroom(side: str, trigger: float, current_price: float):
+    """
+    :param side: "buy" or "sell"
+    :param trigger: trigger price from trigger_price()
+    :param current_price: current price
+    :return: relative distance the price should pass to reach the trigger price (not positive if the trigger is
+    reached) or None if not available
+    """
+    if trigger is None or not current_price or current_price <= 0:
+        return None
+
+    if side == "sell":
+        return current_price / trigger - 1
+
+    return 1 - current_price / trigger
+
+
+def is_price_near_trigger(trigger: float, current_price: float, proximity: float):
+    """
+    :param trigger: trigger price from trigger_price()
+    :param current_price: current price. Not positive price is treated as not available.
+    :param proximity: relative distance to the trigger price
+    :return: True if current price is within the relative distance from the trigger price
+    """
+    if not trigger or not current_price or current_price <= 0 or proximity <= 0:
+        return False
+
+    return abs(current_price / trigger - 1) <= proximity
+
+
+def ticker_prices(side: str, ticker: dict):
+    """
+    :param side: "buy" or "sell"
+    :param ticker: ticker dict with "ask" and "bid" prices
+    :return: tuple of (taker price, maker price) for the order's side. Price is 0 if not available.
+    """
+    if ticker is None:
+        return 0.0, 0.0
+
+    bid = ticker.get("bid") or 0.0
+    ask = ticker.get("ask") or 0.0
+
+    if side == "sell":
+        return bid, ask
+
+    return ask, bid
+
+
+def taker_depth_levels(side: str, market_data: list):
+    """
+    :param side: "buy" or "sell"
+    :param market_data: list of the ticker and optional order book dicts. Depth is taken from the "bids"/"asks" lists
+    ([[price, amount], ...] as in ccxt order book) of the first item which has them, otherwise from the ticker's top
+    of book price and volume.
+    :return: list of (price, volume) of the taker side (bids for sell, asks for buy) from the best price. Volume is
+    None if not available.
+    """
+    if not market_data:
+        return list()
+
+    book_side = "bids" if side == "sell" else "asks"
+
+    for item in market_data:
+        if item is not None and item.get(book_side):
+            return [(level[0], level[1]) for level in item[book_side]]
+
+    ticker = market_data[0]
+    if ticker is None:
+        return list()
+
+    price = ticker.get("bid") if side == "sell" else ticker.get("ask")
+    volume = ticker.get("bidVolume") if side == "sell" else ticker.get("askVolume")
+
+    return [(price, volume)] if price else list()
+
+
+def depth_price(side: str, amount: float, levels: list, slippage: float = 0.0):
+    """
+    price of the limit order to fill the amount by the taker side levels in one order
+
+    :param side: "buy" or "sell"
+    :param amount: amount to fill in base currency
+    :param levels: list of (price, volume) from the best price (see taker_depth_levels)
+    :param slippage: relative worsening of the last known level price if the levels' volume is less than the amount
+    :return: price of the deepest level required to fill the amount or None if there are no levels
+    """
+    if not levels:
+        return None
+
+    filled = 0.0
+    price = None
+
+    for price, volume in levels:
+        if volume is None:
+            return price
+
+        filled += volume
+        if filled >= amount:
+            return price
+
+    if side == "sell":
+        return price * (1 - slippage)
+
+    return price * (1 + slippage)
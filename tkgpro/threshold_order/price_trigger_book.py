@@ -0,0 +1,206 @@
+import bisect
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class PriceTriggerBook(object):
+    """
+    Sorted ladders of the threshold orders' trigger prices by symbol, ticker price and direction. Incoming tickers
+    fire the callbacks only for the crossed levels, so the cost of a ticker is O(log(levels) + crossed levels)
+    instead of checking every order of the symbol.
+
+    Levels of the order (see price_levels):
+    - sell: taker trigger is crossed when bid falls to it, maker trigger - when ask falls to it
+    - buy: taker trigger is crossed when ask rises to it, maker trigger - when bid rises to it
+
+    Levels are one-shot: fired level is removed from the book till the order's levels are updated by update_order(),
+    which is called by the order itself on the reprice if the order's trigger_book is set (add_order sets it). Levels
+    which are not the order's current levels anymore (the order left the maker/best_amount state) are dropped without
+    firing.
+
+    Callback is called as callback(order, kind, price) where kind is "taker" or "maker" and price is the ticker price
+    which crossed the level.
+    """
+
+    TAKER = "taker"
+    MAKER = "maker"
+
+    def __init__(self):
+        self._ladders = dict()  # (symbol, price field, rising) -> sorted list of (level, seq)
+        self._entries = dict()  # seq -> (order, kind, level, ladder key)
+        self._order_seqs = dict()  # order.id -> list of seq
+        self._callbacks = dict()  # order.id -> callback
+        self._symbols = dict()  # symbol -> number of levels
+        self._seq = 0
+
+        self.fired = 0  # number of fired levels
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def get_trigger_levels(order: "ActionOrder"):
+        """
+        :return: tuple of (taker trigger price, maker trigger price) of the order or None if the level is not checked
+        in the order's current state
+        """
+        if order.state not in ("maker", "best_amount"):
+            return None, None
+
+        return getattr(order, "taker_trigger_price", None), getattr(order, "maker_trigger_price", None)
+
+    @staticmethod
+    def _ladder_key(symbol: str, side: str, kind: str):
+        if side == "sell":
+            return symbol, "bid" if kind == PriceTriggerBook.TAKER else "ask", False
+
+        return symbol, "ask" if kind == PriceTriggerBook.TAKER else "bid", True
+
+    def add_order(self, order: "ActionOrder", callback=None):
+        """
+        registers the order's trigger levels and sets the order's trigger_book
+
+        :param order: ThresholdRecoveryOrder or MakerStopLossOrder
+        :param callback: callable(order, kind, price) called when the order's level is crossed
+        """
+        self._callbacks[order.id] = callback
+        order.trigger_book = self
+        self.update_order(order)
+
+    def update_order(self, order: "ActionOrder"):
+        """
+        replaces the order's levels with its current trigger prices
+        """
+        if order.id not in self._callbacks:
+            return
+
+        self._remove_levels(order)
+
+        taker_level, maker_level = self.get_trigger_levels(order)
+        for kind, level in ((self.TAKER, taker_level), (self.MAKER, maker_level)):
+            if level is None or level != level:
+                continue
+
+            key = self._ladder_key(order.symbol, order.side, kind)
+            seq = self._seq
+            self._seq += 1
+
+            bisect.insort(self._ladders.setdefault(key, list()), (level, seq))
+            self._entries[seq] = (order, kind, level, key)
+            self._order_seqs.setdefault(order.id, list()).append(seq)
+            self._symbols[order.symbol] = self._symbols.get(order.symbol, 0) + 1
+
+    def remove_order(self, order: "ActionOrder"):
+        """
+        removes the order's levels from the book
+        """
+        self._remove_levels(order)
+        self._callbacks.pop(order.id, None)
+
+        if getattr(order, "trigger_book", None) is self:
+            order.trigger_book = None
+
+    def _remove_levels(self, order: "ActionOrder"):
+        for seq in self._order_seqs.pop(order.id, ()):
+            entry = self._entries.pop(seq, None)
+            if entry is None:
+                continue
+
+            level, key = entry[2], entry[3]
+            ladder = self._ladders[key]
+            i = bisect.bisect_left(ladder, (level, seq))
+            if i < len(ladder) and ladder[i][1] == seq:
+                del ladder[i]
+
+            self._discard_symbol_level(order.symbol)
+
+    def _discard_symbol_level(self, symbol: str):
+        count = self._symbols[symbol] - 1
+        if count > 0:
+            self._symbols[symbol] = count
+        else:
+            del self._symbols[symbol]
+
+    def get_levels(self, order: "ActionOrder"):
+        """
+        :return: dict {kind: level} of the order's registered levels
+        """
+        return {self._entries[seq][1]: self._entries[seq][2] for seq in self._order_seqs.get(order.id, ())}
+
+    def update_ticker(self, symbol: str, ticker: dict):
+        """
+        fires the levels of the symbol crossed by the ticker's bid and ask prices
+
+        :return: list of (order, kind, price) of the fired levels
+        """
+        fired = list()
+
+        if symbol not in self._symbols or ticker is None:
+            return fired
+
+        for field in ("bid", "ask"):
+            price = ticker.get(field)
+            if not price or price <= 0:
+                continue
+
+            # levels at or above the falling price
+            ladder = self._ladders.get((symbol, field, False))
+            if ladder:
+                i = bisect.bisect_left(ladder, (price, -1))
+                if i < len(ladder):
+                    crossed = ladder[i:]
+                    del ladder[i:]
+                    self._fire(crossed, price, fired)
+
+            # levels at or below the rising price
+            ladder = self._ladders.get((symbol, field, True))
+            if ladder:
+                i = bisect.bisect_right(ladder, (price, float("inf")))
+                if i > 0:
+                    crossed = ladder[:i]
+                    del ladder[:i]
+                    self._fire(crossed, price, fired)
+
+        return fired
+
+    def update_tickers(self, tickers: dict):
+        """
+        :param tickers: dict of tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :return: list of (order, kind, price) of the fired levels
+        """
+        fired = list()
+        for symbol, ticker in tickers.items():
+            if symbol in self._symbols:
+                fired.extend(self.update_ticker(symbol, ticker))
+
+        return fired
+
+    def _fire(self, levels: list, price: float, fired: list):
+        for level, seq in levels:
+            entry = self._entries.pop(seq, None)
+            if entry is None:  # removed by the callback of the previous level
+                continue
+
+            order, kind, level, key = entry
+
+            seqs = self._order_seqs[order.id]
+            seqs.remove(seq)
+            if not seqs:
+                del self._order_seqs[order.id]
+
+            self._discard_symbol_level(order.symbol)
+
+            # the order could leave the state with checked levels without updating the book
+            taker_level, maker_level = self.get_trigger_levels(order)
+            if level != (taker_level if kind == self.TAKER else maker_level):
+                continue
+
+            self.fired += 1
+
+            fired.append((order, kind, price))
+
+            callback = self._callbacks.get(order.id)
+            if callback is not None:
+                callback(order, kind, price)
@@ -1,12 +1,11 @@
-import ztom
 from ztom import core
-from ztom import errors
-from ztom import TradeOrder
-from ztom import ActionOrder
 from ztom import RecoveryOrder
-import time
-import uuid
-from ztom import ccxtExchangeWrapper
+from tkgpro.threshold_order import price_levels
+from tkgpro.threshold_order.order_command import OrderCommands
+from tkgpro.threshold_order.check_cadence import CheckCadence, ticker_timestamp
+from tkgpro.threshold_order.fill_ledger import FillLedger
+from tkgpro.threshold_order.last_response import LastResponse
+from tkgpro.threshold_order.market_index import MarketIndex
 
 
 class ThresholdRecoveryOrder(RecoveryOrder):
@@ -14,7 +13,7 @@ class ThresholdRecoveryOrder(RecoveryOrder):
     def __init__(self, symbol, start_currency: str, start_amount: float, dest_currency: str,
                  dest_amount: float = 0.0, taker_price_threshold:float = -0.01,
                  fee: float=0.0, cancel_threshold: float=0.000001, max_best_amount_order_updates: int=50,
-                 max_order_updates: int=10):
+                 max_order_updates: int=10, amount_precision: int = None, markets: MarketIndex = None):
         """
         ThresholdRecovery Order is aimed to be filled for the setted dest amount and if fails fills
         on best market price. If the price will drop (or raise) belowe the threshold - order will be filled via taker
@@ -40,11 +39,41 @@ class ThresholdRecoveryOrder(RecoveryOrder):
              In ccxt: markets[symbol]["limits"]["amount"]["min"]
         :param max_best_amount_order_updates: number of best amount trade order updates before cancelling
         :param max_order_updates:  max order updates for market price trade orders
+        :param amount_precision: number of decimals of the base currency amount of the market (in ccxt:
+        markets[symbol]["precision"]["amount"]) for the exact accounting of the filled amount. None for float accounting.
+        :param markets: MarketIndex to take the minimum order amount of the symbol as the lowest cancel threshold, the
+        amount precision (if not set) and to round the trade orders' prices to the symbol's price precision
 
         """
         self.taker_price_threshold = taker_price_threshold
         self.tags = list()
 
+        self.taker_trigger_price = None  # absolute taker price at which the taker_price_threshold is reached
+        self.maker_trigger_price = None  # maker price is not checked by the ThresholdRecoveryOrder
+
+        self._last_taker_price = 0.0  # last checked taker price in best_amount state
+
+        self._commands = OrderCommands.get(symbol)  # preallocated order commands for the symbol
+
+        self.cadence = CheckCadence()  # suggested delay till the next price check in best_amount state
+        self.trigger_book = None  # PriceTriggerBook with the order's taker trigger price
+
+        self.markets = markets
+        self._market = markets.get(symbol) if markets is not None else None  # MarketRecord of the symbol
+
+        if self._market is not None:
+            cancel_threshold = self._market.cancel_threshold(cancel_threshold)
+            if amount_precision is None:
+                amount_precision = self._market.amount_precision
+
+        self.amount_precision = amount_precision
+
+        # the only fill state of the order: _prev_filled_* of RecoveryOrder are derived from the ledger
+        self._fills = FillLedger(core.get_trade_direction_to_currency(symbol, dest_currency), amount_precision)
+
+        self.short_circuited_updates = 0  # updates which returned the previous command because nothing has changed
+        self._last_response = LastResponse()
+
         super().__init__(symbol, start_currency, start_amount, dest_currency, dest_amount, fee, cancel_threshold,
                          max_best_amount_order_updates)
 
@@ -99,15 +128,105 @@ class ThresholdRecoveryOrder(RecoveryOrder):
         #
         # self._init_best_amount()
 
+    @property
+    def _prev_price_diff(self):
+        """
+        relative difference between the best_amount price and the last checked taker price. Calculated on request,
+        the threshold check uses the precalculated taker_trigger_price.
+        """
+        if not self._last_taker_price:
+            return 0.0
+
+        return core.relative_target_price_difference(self.side, self.best_price, self._last_taker_price)
+
+    @_prev_price_diff.setter
+    def _prev_price_diff(self, value):
+        # the value is derived from _last_taker_price, setting is kept for the compatibility with RecoveryOrder
+        pass
+
+    @property
+    def _prev_filled(self):
+        """
+        filled amount of the previous trade orders, kept by the fill ledger
+        """
+        return self._fills.previous_totals(self.active_trade_order)[0]
+
+    @_prev_filled.setter
+    def _prev_filled(self, value):
+        # the fills are accumulated by the ledger, setting is kept for the compatibility with RecoveryOrder
+        pass
+
+    @property
+    def _prev_filled_start_amount(self):
+        return self._fills.previous_totals(self.active_trade_order)[1]
+
+    @_prev_filled_start_amount.setter
+    def _prev_filled_start_amount(self, value):
+        pass
+
+    @property
+    def _prev_filled_dest_amount(self):
+        return self._fills.previous_totals(self.active_trade_order)[2]
+
+    @_prev_filled_dest_amount.setter
+    def _prev_filled_dest_amount(self, value):
+        pass
+
+    @property
+    def next_check_delay(self):
+        """
+        suggested delay in seconds till the next update of the order. Min delay of the cadence if not in best_amount
+        state.
+        """
+        if self.state != "best_amount":
+            return self.cadence.min_delay
+
+        return self.cadence.delay
+
     def _init_best_amount(self):
         price = self._get_recovery_price_for_best_dest_amount()
 
         self.status = "open"
         self.state = "best_amount"
         self.best_price = price
+        self.taker_trigger_price = price_levels.trigger_price(self.side, price, self.taker_price_threshold)
 
         self.active_trade_order = self._create_recovery_order(price, self.state)
-        self.order_command = "new tickers {}".format(self.symbol)  # will start requesting the tickers from the creation
+        self.order_command = self._commands.new_tickers  # will start requesting the tickers from the creation
+
+        if self.trigger_book is not None:
+            self.trigger_book.update_order(self)
+
+    def _create_recovery_order(self, price, state):
+        if self._market is not None:
+            price = self._market.round_price(price)
+
+        return super()._create_recovery_order(price, state)
+
+    def _is_update_unchanged(self, resp, market_data):
+        """
+        :return: True if the update would not change anything except the update counter: the same response of the open
+        trade order, the updates limit is not reached and the taker price is the same as on the last threshold check
+        """
+        trade_order = self.active_trade_order
+
+        if trade_order is None or trade_order.status != "open" \
+                or self.order_command is not self._commands.hold_tickers \
+                or not self._last_response.matches(trade_order, resp):
+            return False
+
+        max_order_updates = self.max_best_amount_orders_updates if self.state == "best_amount" \
+            else self.max_order_updates
+
+        if trade_order.update_requests_count + 1 >= max_order_updates:
+            return False
+
+        if self.state == "best_amount" and market_data is not None:
+            current_taker_price = price_levels.ticker_prices(self.side, market_data[0])[0]
+            if current_taker_price > 0 and current_taker_price != self._last_taker_price:
+                return False
+
+        return True
 
     def update_from_exchange(self, resp, market_data=None):
         """
@@ -116,45 +235,55 @@ class ThresholdRecoveryOrder(RecoveryOrder):
         :return: updates the self.order_command
 
         """
+        # nothing has changed since the previous update: just count the update
+        if self._is_update_unchanged(resp, market_data):
+            self.active_trade_order.update_requests_count += 1
+            self.short_circuited_updates += 1
+            return self.order_command
+
+        self._last_response.remember(self.active_trade_order, resp)
         self.active_trade_order.update_order_from_exchange_resp(resp)
 
-        self.filled_dest_amount = self._prev_filled_dest_amount + self.active_trade_order.filled_dest_amount
-        self.filled_start_amount = self._prev_filled_start_amount + self.active_trade_order.filled_start_amount
+        # fill totals are recalculated only if the response changed the trade order's fill
+        if self._fills.update(self.active_trade_order):
+            self.filled_dest_amount = self._fills.filled_dest_amount
+            self.filled_start_amount = self._fills.filled_start_amount
 
-        if self.filled_dest_amount != 0 and self.filled_start_amount != 0:
-            self.filled_price = self.filled_start_amount / self.filled_dest_amount if self.side == "buy" else \
-                self.filled_dest_amount / self.filled_start_amount
+            if self.filled_dest_amount != 0 and self.filled_start_amount != 0:
+                self.filled_price = self._fills.filled_price
 
-        self.filled = self._prev_filled + self.active_trade_order.filled
+            self.filled = self._fills.filled
 
         current_state_max_order_updates = self.max_order_updates
 
         if self.state == "best_amount" and self.active_trade_order.status == "open":
 
             current_state_max_order_updates = self.max_best_amount_orders_updates
-            self.order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+            self.order_command = self._commands.hold_tickers
 
             try:
 
-                current_taker_price = core.get_symbol_order_price_from_tickers(self.start_currency, self.dest_currency,
-                                                                               {self.symbol: market_data[0]})["price"]
+                current_taker_price = price_levels.ticker_prices(self.side, market_data[0])[0]
                 if current_taker_price > 0:
-                    price_diff = core.relative_target_price_difference(self.side, self.best_price, current_taker_price)
-                    self._prev_price_diff = price_diff
-
-                    if price_diff is not None and price_diff <= self.taker_price_threshold:
-                        self.order_command = "cancel tickers {symbol}".format(symbol=self.active_trade_order.symbol)
+                    self._last_taker_price = current_taker_price
+                    self.cadence.update(current_taker_price,
+                                        price_levels.trigger_headroom(self.side, self.taker_trigger_price,
+                                                                      current_taker_price),
+                                        ticker_timestamp(market_data[0]))
+
+                    if price_levels.is_price_triggered(self.side, self.taker_trigger_price, current_taker_price):
+                        self.order_command = self._commands.cancel_tickers
                         if "#below_threshold" not in self.tags:
                             self.tags.append("#below_threshold")
 
                         return self.order_command
 
             except Exception as e:
-                self.order_command = "hold tickers {symbol}".format(symbol=self.symbol)
+                self.order_command = self._commands.hold_tickers
 
         if self.state == "market_price":
             current_state_max_order_updates = self.max_order_updates
-            self.order_command = "hold tickers {symbol}".format(symbol=self.active_trade_order.symbol)
+            self.order_command = self._commands.hold_tickers
 
         if self.active_trade_order.status == "open":
 
@@ -162,14 +291,14 @@ class ThresholdRecoveryOrder(RecoveryOrder):
                     and self.active_trade_order.amount - self.active_trade_order.filled > self.cancel_threshold:
 
                 # add ticker request command to order manager
-                self.order_command = "cancel tickers {symbol}".format(symbol=self.active_trade_order.symbol)
+                self.order_command = self._commands.cancel_tickers
 
             return self.order_command
 
         if self.active_trade_order.status == "closed" or self.active_trade_order.status == "canceled":
 
-            if self.filled_start_amount >= self.start_amount*0.99999:  # close order if filled amount is OK
-                self.order_command = ""
+            if self._fills.is_start_amount_filled(self.start_amount):  # close order if filled amount is OK
+                self.order_command = self._commands.none
                 self._close_active_order()
                 self.close_order()
                 return self.order_command
@@ -184,10 +313,10 @@ class ThresholdRecoveryOrder(RecoveryOrder):
                                                                      {self.symbol: ticker})["price"]
 
                 self.active_trade_order = self._create_recovery_order(new_price, self.state)
-                self.order_command = "new"
+                self.order_command = self._commands.new
             else:
                 # if we did not received ticker - so just re request the ticker
-                self.order_command = "hold tickers {symbol}".format(symbol=self.active_trade_order.symbol)
+                self.order_command = self._commands.hold_tickers
 
                 # print("New price not set... Hodling..")
                 # raise errors.OrderError("New price not set")
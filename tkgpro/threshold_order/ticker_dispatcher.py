@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING
+
+from tkgpro.threshold_order import price_levels
+
+if TYPE_CHECKING:
+    from ztom import ActionOrder
+
+
+class TickerDispatcher(object):
+    """
+    Keeps the index of live threshold orders by symbol and fans out the incoming tickers only to the orders on the
+    changed symbols whose current taker or maker price crossed the order's threshold levels.
+
+    Usage:
+    - add_order() for every live ThresholdRecoveryOrder / MakerStopLossOrder, remove_order() when closed
+    - update_tickers(tickers) with the incoming tickers (full snapshot or delta): returns the orders which should be
+    re-evaluated because of the price change
+    - get_market_data(order) returns the latest ticker of the order's symbol in the market_data shape used by
+    update_from_exchange. The same list object is reused for all orders of the symbol.
+    """
+
+    def __init__(self):
+        self.orders_by_symbol = dict()  # symbol -> {order.id: order}
+        self.tickers = dict()  # symbol -> last received ticker
+
+        self._market_data = dict()  # symbol -> [ticker]
+
+    def add_order(self, order: "ActionOrder"):
+        self.orders_by_symbol.setdefault(order.symbol, dict())[order.id] = order
+
+    def remove_order(self, order: "ActionOrder"):
+        orders = self.orders_by_symbol.get(order.symbol)
+        if orders is None:
+            return
+
+        orders.pop(order.id, None)
+        if not orders:
+            del self.orders_by_symbol[order.symbol]
+
+    def get_orders(self, symbol: str):
+        """
+        :return: list of live orders for the symbol
+        """
+        return list(self.orders_by_symbol.get(symbol, dict()).values())
+
+    def get_market_data(self, order: "ActionOrder"):
+        """
+        :return: market data list [ticker] for the order's symbol or None if there were no tickers for the symbol yet
+        """
+        return self._market_data.get(order.symbol)
+
+    @staticmethod
+    def get_trigger_levels(order: "ActionOrder"):
+        """
+        :return: tuple of (taker trigger price, maker trigger price) precalculated by the order for its active trade
+        order. Trigger price is None if the price threshold is not checked in the order's current state.
+        """
+        if order.state in ("maker", "best_amount") and order.active_trade_order is not None:
+            return order.taker_trigger_price, order.maker_trigger_price
+
+        return None, None
+
+    @classmethod
+    def is_triggered(cls, order: "ActionOrder", ticker: dict):
+        """
+        :return: True if the ticker's taker or maker price crossed the order's trigger levels
+        """
+        taker_trigger, maker_trigger = cls.get_trigger_levels(order)
+        if taker_trigger is None and maker_trigger is None:
+            return False
+
+        taker_price, maker_price = price_levels.ticker_prices(order.side, ticker)
+
+        return price_levels.is_price_triggered(order.side, taker_trigger, taker_price) \
+            or price_levels.is_price_triggered(order.side, maker_trigger, maker_price)
+
+    def update_tickers(self, tickers: dict):
+        """
+        updates the latest tickers and finds the orders to re-evaluate. Orders are checked only for the symbols with
+        changed bid or ask price.
+
+        :param tickers: dict of tickers {symbol: {"ask": <ask_price>, "bid": <bid_price>}}
+        :return: list of orders whose thresholds were crossed by the new prices
+        """
+        triggered = list()
+
+        for symbol, ticker in tickers.items():
+            last_ticker = self.tickers.get(symbol)
+
+            if last_ticker is not None and last_ticker.get("bid") == ticker.get("bid") \
+                    and last_ticker.get("ask") == ticker.get("ask"):
+                continue
+
+            self.tickers[symbol] = ticker
+
+            market_data = self._market_data.get(symbol)
+            if market_data is None:
+                self._market_data[symbol] = [ticker]
+            else:
+                market_data[0] = ticker
+
+            orders = self.orders_by_symbol.get(symbol)
+            if not orders:
+                continue
+
+            for order in orders.values():
+                if self.is_triggered(order, ticker):
+                    triggered.append(order)
+
+        return triggered